@@ -41,6 +41,12 @@ setup(
     'simpy'
   ],
 
+  entry_points = {
+    'console_scripts': [
+      'siamese = siamese.cli:main'
+    ]
+  },
+
   classifiers = [
     'Development Status :: 3 - Alpha',
     'Intended Audience :: Manufacturing',
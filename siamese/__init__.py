@@ -79,9 +79,12 @@ https://github.com/GusFurtado/siamese-optimizer
 
 """
 
+from .models.assembly import Assembly
 from .models.buffer import Buffer
 from .models.machine import Machine
 from .models.line import Line
+from .models.router import Router
+from .models.sink import Sink
 from .models.source import Source
 
 
@@ -0,0 +1,10 @@
+"""Run the `siamese` command through `python -m siamese`."""
+
+import sys
+
+from siamese.cli import main
+
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,179 @@
+"""The checkpoint submodule.
+
+Functions that capture the full state of a paused simulation and rebuild a
+`Line` from it:
+- The simulation clock and the state of the random number generator;
+- The attributes of every model, including their statistics;
+- The content of each buffer;
+- The events each model process is waiting for, such as in-progress timers
+  and pending buffer requests.
+
+SimPy processes are generators and can't be serialized. Instead, the event each
+process is waiting for is recorded, and restored processes resume by waiting for
+an equivalent event scheduled at the same time and in the same order.
+
+"""
+
+from heapq import heappush
+import random
+
+import simpy
+from simpy.core import NORMAL
+from simpy.resources.store import StoreGet, StorePut
+
+import siamese
+
+
+
+def dump(line) -> dict:
+    """Capture the state of a paused simulation.
+
+    Parameters
+    ----------
+    line : Line
+        A line whose simulation has started.
+
+    Returns
+    -------
+    dict
+        Picklable state of the simulation.
+
+    """
+
+    env = line.env
+    models = line._models
+
+    # Events scheduled in the environment, by event
+    scheduled = {entry[3]: entry[:3] for entry in env._queue}
+
+    # Events each process is waiting for
+    targets = {}
+    for model in models:
+        for attr in ('process', 'failure_process'):
+            process = getattr(model, attr, None)
+            if process is not None and process.is_alive:
+                targets[process._target] = (model.name, attr)
+
+    timeouts = []
+    waiting = []
+    for event, owner in targets.items():
+        if event in scheduled:
+            timeouts.append((scheduled[event], owner))
+        elif not isinstance(event, (StoreGet, StorePut)):
+            waiting.append(owner)
+    timeouts.sort(key=lambda entry: entry[0])
+
+    # Pending buffer requests, including orphans left by interruptions
+    requests = {}
+    for model in models:
+        store = getattr(model, '_buffer', None)
+        if store is None:
+            continue
+        queue = []
+        for event in store.get_queue:
+            queue.append(('get', targets.get(event), None))
+        for event in store.put_queue:
+            queue.append(('put', targets.get(event), event.item))
+        requests[model.name] = queue
+
+    return {
+        'version': siamese.__version__,
+        'now': env.now,
+        'random': random.getstate(),
+        'models': [
+            (type(model), model._get_state()) for model in models
+        ],
+        'timeouts': [(time, owner) for (time, _, _), owner in timeouts],
+        'requests': requests,
+        'waiting': waiting
+    }
+
+
+
+def models(state:dict) -> list:
+    """Create the models of a state captured by `dump`.
+
+    The models are only meant to build a line for `load`, which sets their
+    attributes properly.
+
+    """
+
+    models = []
+    for model_type, attributes in state['models']:
+        model = object.__new__(model_type)
+        model.__dict__.update(attributes)
+        models.append(model)
+    return models
+
+
+
+def load(state:dict, line) -> None:
+    """Restore a state captured by `dump` into a line.
+
+    Parameters
+    ----------
+    state : dict
+        State returned by `dump`.
+    line : Line
+        A line with the same models of the captured line. Its models are
+        updated in place and its simulation continues from the captured time.
+
+    """
+
+    if state['version'] != siamese.__version__:
+        raise ValueError(
+            f"Checkpoint was created with version {state['version']} and "
+            f"can't be restored by version {siamese.__version__}."
+        )
+
+    models = []
+    for model_type, attributes in state['models']:
+        model = line.__dict__.get(attributes['name'])
+        if type(model) is not model_type:
+            raise ValueError(
+                f"The line has no <{model_type.__name__}> named '{attributes['name']}'."
+            )
+        model.__dict__.clear()
+        model.__dict__.update(attributes)
+        models.append(model)
+
+    env = simpy.Environment(initial_time=state['now'])
+    line.env = env
+    objects = line.__dict__
+    # Recreate timers in their original order
+    events = {}
+    for time, owner in state['timeouts']:
+        event = simpy.Event(env)
+        event._ok = True
+        event._value = None
+        heappush(env._queue, (time, NORMAL, next(env._eid), event))
+        events[owner] = event
+
+    # Restore buffers and recreate their requests in their original order
+    for model in models:
+        if model.name in state['requests']:
+            model._resume_run(env, objects)
+            store = model._buffer
+            for kind, owner, item in state['requests'][model.name]:
+                event = store.get() if kind == 'get' else store.put(item)
+                if owner is not None:
+                    events[owner] = event
+
+    # Repairs being waited for
+    for owner in state['waiting']:
+        events[owner] = simpy.Event(env)
+
+    # Resume processes
+    for model in models:
+        if model.name not in state['requests']:
+            model._resume_run(
+                env = env,
+                objects = objects,
+                event = events.get((model.name, 'process')),
+                failure_event = events.get((model.name, 'failure_process')),
+                repairing = (model.name, 'failure_process') in state['waiting']
+            )
+
+    if state['random'] is not None:
+        random.setstate(state['random'])
+    line._started = True
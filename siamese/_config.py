@@ -0,0 +1,337 @@
+"""The configuration submodule.
+
+Functions that convert a `Line` to and from a declarative configuration, made
+of plain dicts, lists, strings and numbers, so it can be stored as JSON or
+YAML and shared with other systems:
+
+>>> {
+...     'distributions': {
+...         'press': {'type': 'Triangular', 'min': 8, 'mode': 10, 'max': 14}
+...     },
+...     'models': [
+...         {'type': 'Source', 'name': 'source', 'processing_time': 5,
+...          'output_buffer': 'buffer1'},
+...         {'type': 'Buffer', 'name': 'buffer1', 'capacity': 10},
+...         {'type': 'Machine', 'name': 'press1', 'processing_time': 'press',
+...          'input_buffer': 'buffer1', 'output_buffer': 'buffer2',
+...          'failure': {'type': 'TimeFailure', 'time_between_failures': 500,
+...                      'time_to_repair': {'type': 'Exponential', 'mean': 20}}},
+...         ...
+...     ]
+... }
+
+Distributions and failures are given inline, as a dict with their `type` and
+fields, or as a number, for constant times. Fields left out take their default
+values. Distributions listed in the `distributions` registry are referenced
+by name, and every model that references one shares the same instance, which
+each model copies for its own draws when a simulation starts.
+
+"""
+
+from dataclasses import fields, MISSING
+import inspect
+from numbers import Number
+
+from siamese import distributions as dist
+from siamese import failures as fail
+
+
+
+def build(config:dict, line_type) -> tuple:
+    """Validate a configuration and create its models.
+
+    Parameters
+    ----------
+    config : dict
+        Line configuration.
+    line_type : type
+        Class of the line, whose attributes models can't be named after.
+
+    Returns
+    -------
+    list[Model]
+        Models of the line.
+    dict[str, Distribution]
+        Distribution registry.
+
+    """
+
+    # Avoid circular imports
+    import siamese
+    from siamese.models.base import Model
+
+    models_types = _classes(siamese, Model)
+    distribution_types = _classes(dist, dist.Distribution)
+    failure_types = _classes(fail, fail.Failure)
+
+    _check(isinstance(config, dict), 'config', 'must be a mapping')
+    unknown = set(config) - {'distributions', 'models'}
+    _check(not unknown, 'config', f'has unknown keys {sorted(unknown)}')
+
+    registry = {}
+    distributions = config.get('distributions') or {}
+    _check(isinstance(distributions, dict), 'distributions', 'must be a mapping')
+    for name, spec in distributions.items():
+        path = f'distributions.{name}'
+        _check(isinstance(spec, dict), path, 'must be a mapping')
+        registry[name] = _create(spec, distribution_types, path, registry)
+
+    def distribution(value, path):
+        if isinstance(value, str):
+            _check(value in registry, path, f"references unknown distribution '{value}'")
+            return registry[value]
+        if isinstance(value, dict):
+            return _create(value, distribution_types, path, registry)
+        _check(_number(value) and value > 0, path,
+            'must be a positive number, a distribution or a registry name')
+        return value
+
+    def failure(value, path):
+        if value is None:
+            return None
+        _check(isinstance(value, dict), path, 'must be a mapping')
+        return _create(value, failure_types, path, registry, distribution)
+
+    specs = config.get('models')
+    _check(isinstance(specs, list) and specs, 'models', 'must be a non-empty list')
+
+    reserved = set(line_type().__dict__) | set(dir(line_type))
+    names = set()
+    models = []
+    buffers = []
+    for i, spec in enumerate(specs):
+        path = f'models[{i}]'
+        _check(isinstance(spec, dict), path, 'must be a mapping')
+        name = spec.get('name')
+        _check(isinstance(name, str) and name, f'{path}.name', 'must be a non-empty string')
+        path = f'models[{name}]'
+        _check(name not in names, path, 'is a duplicated name')
+        _check(name not in reserved, path, 'is a reserved name')
+        names.add(name)
+
+        values = {}
+        cls = _type(spec, models_types, path)
+        for field in fields(cls):
+            if field.name not in spec:
+                continue
+            value = spec[field.name]
+            field_path = f'{path}.{field.name}'
+            if field.name == 'processing_time':
+                value = distribution(value, field_path)
+            elif field.name == 'failure':
+                value = failure(value, field_path)
+            elif field.name == 'capacity':
+                _check(isinstance(value, int) and not isinstance(value, bool) and value > 0,
+                    field_path, 'must be a positive integer')
+            elif field.name in ('input_buffer', 'output_buffer'):
+                if field.type is str:
+                    _check(isinstance(value, str), field_path, 'must be a buffer name')
+                    buffers.append((field_path, value))
+                else:
+                    _check(isinstance(value, (list, tuple)) and all(isinstance(v, str) for v in value),
+                        field_path, 'must be a list of buffer names')
+                    buffers.extend((field_path, v) for v in value)
+            elif field.name == 'ratios' and value is not None:
+                _check(isinstance(value, (list, tuple)) and all(_number(v) for v in value),
+                    field_path, 'must be a list of numbers')
+            values[field.name] = value
+        models.append(_instance(cls, values, spec, path))
+
+    buffer_names = {m.name for m in models if type(m).__name__ == 'Buffer'}
+    for path, name in buffers:
+        _check(name in buffer_names, path, f"references unknown buffer '{name}'")
+
+    return models, registry
+
+
+
+def dump(line) -> dict:
+    """Configuration of the models of a line.
+
+    Distributions in the registry of the line, or shared by many models, are
+    listed in the `distributions` registry and referenced by name. Fields
+    equal to their default values are left out, and models of a started
+    simulation give the values they were configured with.
+
+    """
+
+    models = line._models
+    registry = getattr(line, '_registry', {})
+    names = {id(instance): name for name, instance in registry.items()}
+
+    # Distributions shared by many models, but not registered, are named too
+    counts = {}
+    for model in models:
+        for value in _distributions(model):
+            counts[id(value)] = counts.get(id(value), 0) + 1
+    k = 0
+    for model in models:
+        for value in _distributions(model):
+            if counts[id(value)] > 1 and id(value) not in names:
+                name = None
+                while name is None or name in registry:
+                    k += 1
+                    name = f'{type(value).__name__.lower()}_{k}'
+                names[id(value)] = name
+
+    instances = {}
+    for model in models:
+        for value in _distributions(model):
+            if id(value) in names:
+                instances[names[id(value)]] = value
+    for name, value in registry.items():
+        instances.setdefault(name, value)
+
+    def encode(value, reference=True):
+        value = dist._configured(value)
+        if isinstance(value, dist.Distribution):
+            if reference and id(value) in names:
+                return names[id(value)]
+            return _encode(value, encode)
+        if isinstance(value, fail.Failure):
+            return _encode(value, encode)
+        if isinstance(value, (list, tuple)):
+            return [encode(v) for v in value]
+        if hasattr(value, 'tolist'):
+            return value.tolist()
+        return value
+
+    config = {}
+    if instances:
+        config['distributions'] = {
+            name: encode(value, reference=False) for name, value in instances.items()
+        }
+    config['models'] = [_encode(model, encode) for model in models]
+    return config
+
+
+
+def decode(value, path:str='value'):
+    """Create the distribution or failure of a parameter value.
+
+    Dicts with the `type` of a distribution or failure are created as one,
+    and other values are returned as they are.
+
+    """
+
+    if not isinstance(value, dict) or 'type' not in value:
+        return value
+
+    distribution_types = _classes(dist, dist.Distribution)
+    failure_types = _classes(fail, fail.Failure)
+
+    def distribution(value, path):
+        if isinstance(value, dict):
+            return _create(value, distribution_types, path, {})
+        _check(_number(value) and value > 0, path, 'must be a positive number or a distribution')
+        return value
+
+    if value['type'] in failure_types:
+        return _create(value, failure_types, path, {}, distribution)
+    return _create(value, distribution_types, path, {})
+
+
+
+def _classes(module, base) -> dict:
+    """Public subclasses of `base` in a module, by name."""
+    return {
+        name: cls for name, cls in vars(module).items() \
+            if inspect.isclass(cls) and issubclass(cls, base) and cls is not base \
+                and not name.startswith('_')
+    }
+
+
+
+def _distributions(model) -> list:
+    """Distribution instances held by a model and its failure."""
+    values = [dist._configured(getattr(model, 'processing_time', None))]
+    failure = getattr(model, 'failure', None)
+    if failure is not None:
+        values.extend(getattr(failure, field.name) for field in fields(failure))
+    return [v for v in values if isinstance(v, dist.Distribution)]
+
+
+
+def _encode(obj, encode) -> dict:
+    config = {'type': type(obj).__name__}
+    for field in fields(obj):
+        value = getattr(obj, field.name)
+        if not _default(field, value):
+            config[field.name] = encode(value)
+    return config
+
+
+
+def _default(field, value) -> bool:
+    """Whether a value is the default value of a field."""
+    if field.default is not MISSING:
+        default = field.default
+    elif field.default_factory is not MISSING:
+        default = field.default_factory()
+    else:
+        return False
+    try:
+        return type(value) is type(default) and bool(value == default)
+    except ValueError:
+        return False
+
+
+
+def _create(spec:dict, types:dict, path:str, registry:dict, distribution=None):
+    """Create a distribution or failure from its configuration."""
+    cls = _type(spec, types, path)
+    values = {}
+    for field in fields(cls):
+        if field.name not in spec:
+            continue
+        value = spec[field.name]
+        field_path = f'{path}.{field.name}'
+        if value is None and field.default is None:
+            pass
+        elif distribution is not None:
+            value = distribution(value, field_path)
+        elif isinstance(value, (list, tuple)):
+            _check(all(_number(v) for v in value), field_path, 'must be a list of numbers')
+        else:
+            _check(_number(value) or isinstance(value, bool), field_path, 'must be a number')
+        values[field.name] = value
+    return _instance(cls, values, spec, path)
+
+
+
+def _type(spec:dict, types:dict, path:str):
+    name = spec.get('type')
+    _check(name in types, f'{path}.type', f'must be one of {sorted(types)}, not {name!r}')
+    return types[name]
+
+
+
+def _instance(cls, values:dict, spec:dict, path:str):
+    """Create an object, checking for missing and unknown fields."""
+
+    known = {field.name for field in fields(cls)}
+    unknown = set(spec) - known - {'type'}
+    _check(not unknown, path, f'has unknown fields {sorted(unknown)}')
+
+    missing = [
+        field.name for field in fields(cls) \
+            if field.name not in spec and field.default is MISSING \
+                and field.default_factory is MISSING
+    ]
+    _check(not missing, path, f'is missing the fields {missing}')
+
+    try:
+        return cls(**values)
+    except (TypeError, ValueError) as error:
+        raise ValueError(f'`{path}` is not valid: {error}') from None
+
+
+
+def _number(value) -> bool:
+    return isinstance(value, Number) and not isinstance(value, bool)
+
+
+
+def _check(condition:bool, path:str, message:str) -> None:
+    if not condition:
+        raise ValueError(f'`{path}` {message}.')
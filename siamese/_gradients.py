@@ -0,0 +1,233 @@
+"""The gradients submodule.
+
+The `PerturbationAnalyzer` class estimates, alongside a simulation run, how
+the throughput of a `Line` responds to its parameters:
+- The derivative with respect to the mean processing time of each `Source`
+  and `Machine`, through infinitesimal perturbation analysis [1]_;
+- The change caused by one more slot in each `Buffer`, through finite
+  perturbation analysis [2]_.
+
+Every buffer request completes at the latest of two moments: when the model
+became ready to request it, and when the buffer could fulfill it, which is
+the put of the same entity, for gets, or the get that freed a slot, for puts.
+Each model carries the perturbation of its current event time, which is
+generated by its processing times and propagated by the constraint that set
+each request completion. A perturbation of a mean processing time scales all
+the values drawn for it. One more slot in a buffer lets the `k`-th put wait
+for the get `capacity + 1` entities before, instead of `capacity`.
+
+Failures are taken to shift along with the failing model, as if they
+happened after a fixed amount of its time, so a processing time interrupted
+by a failure only perturbs by the share processed before it. Derivatives
+are exact for lines without failures whose entities follow fixed routes, and
+approximations otherwise.
+
+Marginal values of the buffers are always estimates: one more slot is
+propagated along the events of the simulated run, but a re-simulation with
+it would also change the order of later events.
+
+References
+----------
+.. [1] Ho, Y. C. and Cao, X. R. (1991). Perturbation Analysis of Discrete
+   Event Dynamic Systems. Kluwer Academic Publishers.
+.. [2] Ho, Y. C., Eyler, M. A. and Chien, T. T. (1979). A gradient technique
+   for general buffer storage design in a production line. International
+   Journal of Production Research, 17(6), 557-580.
+
+"""
+
+from collections import deque
+
+import numpy as np
+
+from siamese.distributions import Distribution
+from siamese.status import Status
+from siamese._hooks import Hooks
+
+
+
+class PerturbationAnalyzer(Hooks):
+    """Perturbations of the event times of the models of a simulation.
+
+    It keeps its state between runs, so it must be attached to every run of
+    a simulation, from time zero.
+
+    Parameters
+    ----------
+    models : list[Model]
+        Models of the line.
+
+    Attributes
+    ----------
+    parameters : list[str]
+        Names of the models whose mean processing time is perturbed.
+    buffers : list[str]
+        Names of the buffers whose capacity is perturbed.
+    outputs : dict[str, list]
+        Number of entities received by each `Sink`, the time of the last one
+        and its perturbations.
+
+    """
+
+    def __init__(self, models:list):
+
+        # Avoid circular imports
+        from siamese.models.sink import Sink
+
+        super().__init__()
+        self.parameters = [m.name for m in models if hasattr(m, 'processing_time')]
+        self.buffers = [m.name for m in models if hasattr(m, 'capacity')]
+        self._parameter = {name: i for i, name in enumerate(self.parameters)}
+        self._buffer = {name: j for j, name in enumerate(self.buffers)}
+
+        # Derivatives and finite shifts of the current event time of each model
+        self._d = {m.name: np.zeros(len(self.parameters)) for m in models}
+        self._f = {m.name: np.zeros(len(self.buffers)) for m in models}
+
+        # Start and value of the latest processing time drawn by each model
+        self._drawn = {}
+
+        # Completion time and perturbations of the entities in each buffer,
+        # and of its latest gets
+        self._items = {name: deque() for name in self.buffers}
+        self._gets = {name: deque() for name in self.buffers}
+        self._puts_done = dict.fromkeys(self.buffers, 0)
+        self._gets_done = dict.fromkeys(self.buffers, 0)
+
+        self.outputs = {
+            m.name: [0, 0.0, None, None] for m in models if isinstance(m, Sink)
+        }
+        self._owners = {}
+
+
+    def attach(self, model) -> None:
+        """Instrument a model whose processes are already created."""
+
+        process = getattr(model, 'process', None)
+        if process is not None:
+            self._owners[process] = model.name
+
+        distribution = getattr(model, 'processing_time', None)
+        if isinstance(distribution, Distribution):
+            mean = distribution.expected_value
+            if mean is not None and mean > 0:
+                i = self._parameter[model.name]
+                self._patch(distribution, 'generate',
+                    self._generated(distribution.generate, model, i, mean))
+                if hasattr(model, '_before_failing'):
+                    self._patch(model, '_before_failing',
+                        self._failing(model._before_failing, model, i, mean))
+
+        store = getattr(model, '_buffer', None)
+        if store is not None:
+            self._patch(store, 'put', self._request(store.put, model, self._on_put))
+            self._patch(store, 'get', self._request(store.get, model, self._on_get))
+
+
+    def _generated(self, method, model, i:int, mean:float):
+        d = self._d[model.name]
+        drawn = self._drawn
+        env = model.env
+        def wrapper():
+            value = method()
+            d[i] += value / mean
+            drawn[model.name] = (env.now, value)
+            return value
+        return wrapper
+
+
+    def _failing(self, method, model, i:int, mean:float):
+        d = self._d[model.name]
+        drawn = self._drawn
+        env = model.env
+        def wrapper():
+            method()
+            # The rest of an interrupted processing time is drawn again
+            if model.status == Status.PROCESSING and model.name in drawn:
+                start, value = drawn.pop(model.name)
+                d[i] -= max(start + value - env.now, 0) / mean
+        return wrapper
+
+
+    def _request(self, method, buffer, callback):
+        env = buffer.env
+        owners = self._owners
+        def wrapper(*args, **kwargs):
+            event = method(*args, **kwargs)
+            owner = owners.get(env.active_process)
+            if owner is not None:
+                ready = env.now
+                event.callbacks.append(
+                    lambda event: callback(buffer, owner, ready, env.now))
+            return event
+        return wrapper
+
+
+    def _on_put(self, buffer, owner:str, ready:float, now:float) -> None:
+        name = buffer.name
+        k = self._puts_done[name] + 1
+        gets = self._gets[name]
+        first = self._gets_done[name] - len(gets) + 1
+
+        def get(i):
+            return gets[i - first] if i >= first else None
+
+        # The put waits for the get `capacity` entities before, or one more
+        # with one more slot
+        capacity = buffer._buffer.capacity
+        slot = get(k - capacity)
+        extra = get(k - capacity - 1)
+
+        other = None
+        if slot is not None:
+            time, d, f = slot
+            other = (time, d, time + f)
+            if extra is not None:
+                other[2][self._buffer[name]] = extra[0] + extra[2][self._buffer[name]]
+            else:
+                other[2][self._buffer[name]] = -np.inf
+
+        d, f = self._complete(owner, ready, now, other)
+        self._items[name].append((now, d, f))
+        self._puts_done[name] = k
+
+        # Gets older than the one an extra slot waits for are not needed
+        while gets and first < k + 1 - capacity - 1:
+            gets.popleft()
+            first += 1
+
+
+    def _on_get(self, buffer, owner:str, ready:float, now:float) -> None:
+        name = buffer.name
+        time, d, f = self._items[name].popleft()
+        d, f = self._complete(owner, ready, now, (time, d, time + f))
+        self._gets[name].append((now, d, f))
+        self._gets_done[name] += 1
+
+        output = self.outputs.get(owner)
+        if output is not None:
+            output[0] += 1
+            output[1:] = [now, d, f]
+
+
+    def _complete(self, owner:str, ready:float, now:float, other) -> tuple:
+        """Perturbations of a request completed at `now`, set by the latest
+        of the model being ready and the `other` constraint."""
+
+        current_d = self._d[owner]
+        current_f = self._f[owner]
+        d = current_d.copy()
+        f = ready + current_f
+        if other is not None:
+            time, other_d, other_f = other
+            if time > ready:
+                d = other_d.copy()
+            elif time == ready:
+                d = np.maximum(d, other_d)
+            f = np.maximum(f, other_f)
+        f -= now
+
+        # Updated in place, as processing times and failures hold them
+        current_d[:] = d
+        current_f[:] = f
+        return d, f
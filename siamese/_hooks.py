@@ -0,0 +1,47 @@
+"""The hooks submodule.
+
+Instrumentation of a `Line` (profiling, observers, ...) is done by shadowing
+methods of the model instances with wrappers for the duration of a run. The
+`Hooks` base class keeps track of these wrappers so they can be removed
+afterwards, leaving models that are not instrumented running their original
+code untouched.
+
+"""
+
+from siamese.status import Status
+
+
+
+# Transition methods and the status each of them enters.
+TRANSITIONS = {
+    '_before_starving': Status.STARVING,
+    '_before_processing': Status.PROCESSING,
+    '_before_blocking': Status.BLOCKED,
+    '_before_failing': Status.FAILURE
+}
+
+# Transition method that enters each status.
+METHODS = {status: method for method, status in TRANSITIONS.items()}
+
+
+
+class Hooks:
+    """Base class of objects that instrument models during a run."""
+
+    def __init__(self):
+        self._patched = []
+
+
+    def detach(self) -> None:
+        """Remove every instrumentation, restoring the original methods."""
+        for obj, name, original in reversed(self._patched):
+            if original is None:
+                delattr(obj, name)
+            else:
+                setattr(obj, name, original)
+        self._patched = []
+
+
+    def _patch(self, obj, name:str, wrapper) -> None:
+        self._patched.append((obj, name, obj.__dict__.get(name)))
+        setattr(obj, name, wrapper)
@@ -0,0 +1,115 @@
+"""The observers submodule.
+
+The `Dispatcher` class delivers status transitions of the models of a `Line`
+to the callbacks subscribed through `Line.subscribe`.
+
+Dispatch tables are built right before the simulation starts, and only the
+transitions with subscribers are instrumented. Every other transition runs the
+original model code, paying nothing for the observer API.
+
+"""
+
+from siamese.status import BufferEvent
+from siamese._hooks import Hooks, METHODS
+
+
+
+class Dispatcher(Hooks):
+    """Instruments the subscribed transitions of the models of a run.
+
+    Parameters
+    ----------
+    subscriptions : dict[str, dict[Status | BufferEvent, list]]
+        Callbacks subscribed to each status of each model, by model name.
+
+    """
+
+    def __init__(self, subscriptions:dict):
+        super().__init__()
+        self.subscriptions = subscriptions
+
+
+    def attach(self, model) -> None:
+        """Instrument the subscribed transitions of a model.
+
+        It must be called after the model's `_before_run`, since buffer events
+        are observed through the store created there.
+
+        """
+
+        subscriptions = self.subscriptions.get(model.name)
+        if not subscriptions:
+            return
+
+        for status, callbacks in subscriptions.items():
+            if not callbacks:
+                continue
+            callbacks = tuple(callbacks)
+            if status == BufferEvent.FULL:
+                store = model._buffer
+                self._patch(store, '_do_put',
+                    self._on_full(model, store, store._do_put, callbacks))
+            elif status == BufferEvent.EMPTY:
+                store = model._buffer
+                self._patch(store, '_do_get',
+                    self._on_empty(model, store, store._do_get, callbacks))
+            elif status == BufferEvent.PUT:
+                store = model._buffer
+                self._patch(store, '_do_put',
+                    self._on_request(model, status, store._do_put, callbacks))
+            elif status == BufferEvent.GET:
+                store = model._buffer
+                self._patch(store, '_do_get',
+                    self._on_request(model, status, store._do_get, callbacks))
+            else:
+                method = METHODS[status]
+                self._patch(model, method,
+                    self._on_enter(model, status, getattr(model, method), callbacks))
+
+
+    @staticmethod
+    def _on_enter(model, status, method, callbacks:tuple):
+        env = model.env
+        def wrapper():
+            method()
+            for callback in callbacks:
+                callback(model, status, env.now)
+        return wrapper
+
+
+    @staticmethod
+    def _on_full(model, store, method, callbacks:tuple):
+        env = model.env
+        status = BufferEvent.FULL
+        def wrapper(event):
+            result = method(event)
+            if event.triggered and len(store.items) >= store.capacity:
+                for callback in callbacks:
+                    callback(model, status, env.now)
+            return result
+        return wrapper
+
+
+    @staticmethod
+    def _on_empty(model, store, method, callbacks:tuple):
+        env = model.env
+        status = BufferEvent.EMPTY
+        def wrapper(event):
+            result = method(event)
+            if event.triggered and not store.items:
+                for callback in callbacks:
+                    callback(model, status, env.now)
+            return result
+        return wrapper
+
+
+    @staticmethod
+    def _on_request(model, status, method, callbacks:tuple):
+        env = model.env
+        def wrapper(event):
+            result = method(event)
+            if event.triggered:
+                for callback in callbacks:
+                    callback(model, status, env.now)
+            return result
+        return wrapper
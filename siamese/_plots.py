@@ -0,0 +1,85 @@
+"""Plots of the simulation results."""
+
+import numpy as np
+import plotly.graph_objects as go
+
+from siamese.status import Status
+
+
+
+COLORS = {
+    Status.STARVING: '#f2c14e',
+    Status.PROCESSING: '#5b9f5b',
+    Status.BLOCKED: '#4a7fb5',
+    Status.FAILURE: '#d1495b'
+}
+
+
+
+def status_timeline(name:str, timeline:list, end:float, width:int=1000, **kwargs) -> go.Figure:
+    """Gantt chart of the status of a model.
+
+    The run-length encoded status of the model is downsampled to `width`
+    time slots, each one drawn with the status that lasted the most in it, so
+    the figure size doesn't depend on the number of transitions.
+
+    Parameters
+    ----------
+    name : str
+        Name of the model.
+    timeline : list[tuple[float, Status]]
+        Start time and status of each run.
+    end : float
+        End time of the last run.
+    width : int, default=1000
+        Number of time slots, usually the figure width in pixels.
+    **kwargs
+        Arguments of the `go.Bar` traces.
+
+    """
+
+    statuses = list(COLORS)
+    edges = np.linspace(0, end, width + 1)
+
+    if timeline:
+        starts = np.array([time for time, _ in timeline] + [end], dtype=float)
+        codes = np.array([statuses.index(status) for _, status in timeline])
+        durations = np.diff(starts)
+
+        # Time in each status up to each slot edge, through the cumulative
+        # time at the run boundaries.
+        shares = np.empty((len(statuses), width))
+        for i in range(len(statuses)):
+            cumulative = np.concatenate([[0], np.cumsum(np.where(codes == i, durations, 0))])
+            shares[i] = np.diff(np.interp(edges, starts, cumulative))
+        dominant = np.where(shares.max(axis=0) > 0, shares.argmax(axis=0), -1)
+    else:
+        dominant = np.full(width, -1)
+
+    # Merge consecutive slots of the same status
+    changes = np.flatnonzero(np.diff(dominant)) + 1
+    bounds = np.concatenate([[0], changes, [width]])
+    runs = [(edges[a], edges[b], dominant[a]) for a, b in zip(bounds, bounds[1:])]
+
+    traces = []
+    for i, status in enumerate(statuses):
+        selected = [(a, b) for a, b, code in runs if code == i]
+        traces.append(go.Bar(
+            name = status.name.title(),
+            y = [name] * len(selected),
+            base = [a for a, _ in selected],
+            x = [b - a for a, b in selected],
+            orientation = 'h',
+            marker_color = COLORS[status],
+            **kwargs
+        ))
+
+    return go.Figure(
+        data = traces,
+        layout = {
+            'title': {'text': f'{name} Status'},
+            'xaxis': {'title': 'Time'},
+            'barmode': 'overlay',
+            'bargap': 0
+        }
+    )
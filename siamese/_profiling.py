@@ -0,0 +1,151 @@
+"""The profiling submodule.
+
+The `Profiler` class instruments the models of a `Line` during a simulation
+run and counts where the simulation spends its time:
+- Events processed by each model process;
+- Status transitions of each model;
+- Wall time spent inside each model process;
+- Random draws of each model, by distribution;
+- Put and get requests of each buffer.
+
+Models of a line that is not being profiled run their original code untouched.
+
+"""
+
+from collections import Counter
+from time import perf_counter
+
+from siamese.distributions import Distribution
+from siamese._hooks import Hooks, TRANSITIONS
+
+
+
+# Runtime attributes that hold the distributions of a model.
+_DISTRIBUTIONS = {
+    'processing_time': 'processing_time',
+    'tbf': 'time_between_failures',
+    'ttr': 'time_to_repair'
+}
+
+
+
+class Profiler(Hooks):
+    """Collects performance counters of a simulation run.
+
+    Attributes
+    ----------
+    events : Counter
+        Number of events processed by each model.
+    transitions : dict[str, Counter]
+        Number of times each model entered each `Status`.
+    wall_time : Counter
+        Seconds spent inside each model process.
+    draws : dict[str, Counter]
+        Number of values generated by each distribution of each model.
+    puts : Counter
+        Number of put requests of each buffer.
+    gets : Counter
+        Number of get requests of each buffer.
+    waits : Counter
+        Number of requests of each buffer that could not be fulfilled
+        immediately.
+    run_time : float
+        Seconds spent inside the simulation run.
+
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.events = Counter()
+        self.transitions = {}
+        self.wall_time = Counter()
+        self.draws = {}
+        self.puts = Counter()
+        self.gets = Counter()
+        self.waits = Counter()
+        self.run_time = 0
+
+
+    def attach(self, model) -> None:
+        """Instrument a model whose processes are already created."""
+
+        for attr in ('process', 'failure_process'):
+            process = getattr(model, attr, None)
+            if process is not None and process.is_alive:
+                generator = self._timed(model.name, process._generator, process._target)
+                next(generator)
+                self._patch(process, '_generator', generator)
+
+        transitions = self.transitions.setdefault(model.name, Counter())
+        for method, status in TRANSITIONS.items():
+            if hasattr(model, method):
+                self._patch(model, method,
+                    self._counted(getattr(model, method), transitions, status))
+
+        draws = self.draws.setdefault(model.name, Counter())
+        for attr, label in _DISTRIBUTIONS.items():
+            distribution = getattr(model, attr, None)
+            if isinstance(distribution, Distribution):
+                self._patch(distribution, 'generate',
+                    self._counted(distribution.generate, draws, label))
+
+        store = getattr(model, '_buffer', None)
+        if store is not None:
+            self._patch(store, 'put', self._request(store.put, self.puts, model.name))
+            self._patch(store, 'get', self._request(store.get, self.gets, model.name))
+
+
+    def _timed(self, name:str, generator, target):
+        """Wrap a running process generator, timing each of its steps.
+
+        The wrapper must be started with `next` before replacing the original
+        generator, so it yields the event the process is already waiting for.
+        Closing the wrapper doesn't close the original generator.
+
+        """
+
+        events = self.events
+        wall_time = self.wall_time
+        event = target
+
+        while True:
+            try:
+                value = yield event
+                error = None
+            except GeneratorExit:
+                # The wrapper is closed when it's discarded after a detach,
+                # and the original generator must keep running
+                raise
+            except BaseException as e:
+                value = None
+                error = e
+            start = perf_counter()
+            try:
+                if error is None:
+                    event = generator.send(value)
+                else:
+                    event = generator.throw(error)
+            except StopIteration:
+                return
+            finally:
+                wall_time[name] += perf_counter() - start
+                events[name] += 1
+
+
+    @staticmethod
+    def _counted(method, counter:Counter, key):
+        def wrapper(*args, **kwargs):
+            counter[key] += 1
+            return method(*args, **kwargs)
+        return wrapper
+
+
+    def _request(self, method, counter:Counter, name:str):
+        waits = self.waits
+        def wrapper(*args, **kwargs):
+            counter[name] += 1
+            event = method(*args, **kwargs)
+            if not event.triggered:
+                waits[name] += 1
+            return event
+        return wrapper
@@ -3,13 +3,24 @@
 This submodule contains each model report, including:
 - MachineReport
 - SourceReport
+- SinkReport
 - LineReport
+- ProfileReport
+- GradientReport
+- BottleneckReport
+- ReplicationReport
 
 These reports are loaded after the simulation run.
 
 """
 
 from abc import ABC, abstractmethod
+import csv
+from typing import Sequence
+
+import numpy as np
+
+from siamese._stats import t_quantile
 
 
 
@@ -39,6 +50,16 @@ class MachineReport(Report):
         self.time_broken = machine.time_broken.total
         self.total = self.time_starved+self.time_processing+self.time_blocked+self.time_broken
 
+    def to_dict(self) -> dict:
+        """KPIs of the report."""
+        return {
+            'items_processed': self.machine.items_processed,
+            'time_starved': self.time_starved,
+            'time_processing': self.time_processing,
+            'time_blocked': self.time_blocked,
+            'time_broken': self.time_broken
+        }
+
     def __str__(self):
         return f'''
         {self.machine.name} report
@@ -101,6 +122,15 @@ class SourceReport(Report):
         self.time_broken = source.time_broken.total
         self.total = self.time_processing+self.time_blocked+self.time_broken
 
+    def to_dict(self) -> dict:
+        """KPIs of the report."""
+        return {
+            'items_processed': self.source.items_processed,
+            'time_processing': self.time_processing,
+            'time_blocked': self.time_blocked,
+            'time_broken': self.time_broken
+        }
+
     def __str__(self):
         return f'''
         {self.source.name} report
@@ -148,6 +178,56 @@ class SourceReport(Report):
 
 
 
+class SinkReport(Report):
+
+    def __init__(self, sink:object):
+        self.sink = sink
+        self.lead_time = sink.lead_time
+
+    def to_dict(self) -> dict:
+        """KPIs of the report."""
+        return {
+            'items_received': self.sink.items_received,
+            'lead_time': float(self.lead_time.mean) if self.lead_time.len else float('nan')
+        }
+
+    def _lead_time(self) -> str:
+        if not self.lead_time.len:
+            return '-'
+        return f'{self.lead_time.mean:,.2f} (max {self.lead_time.max:,.2f})'
+
+    def __str__(self):
+        return f'''
+        {self.sink.name} report
+        {'-' * (len(self.sink.name)+7)}
+        Model type       :  Sink
+        Items received   :  {self.sink.items_received}
+        Mean lead time   :  {self._lead_time()}
+        '''
+
+    def _repr_html_(self):
+        return f'''<table>
+            <thead>
+                <th colspan="2">{self.sink.name} report</th>
+            </thead>
+            <tbody>
+                <tr>
+                    <td>Model type</td>
+                    <td>Sink</td>
+                </tr>
+                <tr>
+                    <td>Items received</td>
+                    <td>{self.sink.items_received}</td>
+                </tr>
+                <tr>
+                    <td>Mean lead time</td>
+                    <td>{self._lead_time()}</td>
+                </tr>
+            </tbody>
+        </table>'''
+
+
+
 class LineReport(Report):
 
     def __init__(self, line:object):
@@ -155,8 +235,553 @@ class LineReport(Report):
         self._equips = [equip for equip in line.__dict__.values() \
             if hasattr(equip, 'report')]
 
+    def to_dict(self) -> dict:
+        """KPIs of each model report, by model name."""
+        return {equip.name: equip.report.to_dict() for equip in self._equips}
+
     def __str__(self) -> str:
         return ''.join([equip.report.__str__() for equip in self._equips])
 
     def _repr_html_(self) -> str:
         return '<br>'.join([equip.report._repr_html_() for equip in self._equips])
+
+
+
+class ProfileReport(Report):
+
+    def __init__(self, profiler:object):
+        self.profiler = profiler
+        self.models = list(profiler.transitions) + \
+            [name for name in profiler.puts if name not in profiler.transitions]
+
+    def to_dict(self) -> dict:
+        """Counters of the profiled run, grouped by model name."""
+        p = self.profiler
+        return {
+            name: {
+                'events': p.events[name],
+                'wall_time': p.wall_time[name],
+                'transitions': {status.name: count for status, count \
+                    in p.transitions.get(name, {}).items()},
+                'draws': dict(p.draws.get(name, {})),
+                'puts': p.puts[name],
+                'gets': p.gets[name],
+                'waits': p.waits[name]
+            } for name in self.models
+        }
+
+    def _rows(self) -> list:
+        p = self.profiler
+        rows = []
+        for name in self.models:
+            transitions = sum(p.transitions.get(name, {}).values())
+            draws = sum(p.draws.get(name, {}).values())
+            requests = p.puts[name] + p.gets[name]
+            share = p.wall_time[name]/p.run_time if p.run_time else 0
+            rows.append((name, p.events[name], transitions, draws, requests,
+                p.waits[name], p.wall_time[name], share))
+        return rows
+
+    def __str__(self):
+        lines = [
+            '',
+            f"{'Model':<20} {'Events':>10} {'Transitions':>12} {'Draws':>10} "
+            f"{'Requests':>10} {'Waits':>10} {'Wall time':>12}",
+            '-' * 90
+        ]
+        for name, events, transitions, draws, requests, waits, wall, share \
+                in self._rows():
+            lines.append(
+                f'{name:<20} {events:>10,} {transitions:>12,} {draws:>10,} '
+                f'{requests:>10,} {waits:>10,} {wall:>9.4f}s ({share:.2%})'
+            )
+        lines.append('-' * 90)
+        lines.append(f'Total run time: {self.profiler.run_time:.4f}s')
+        return '\n'.join(lines) + '\n'
+
+    def _repr_html_(self):
+        rows = ''.join(f'''
+                <tr>
+                    <td>{name}</td>
+                    <td>{events:,}</td>
+                    <td>{transitions:,}</td>
+                    <td>{draws:,}</td>
+                    <td>{requests:,}</td>
+                    <td>{waits:,}</td>
+                    <td>{wall:.4f}s</td>
+                    <td>{share:.2%}</td>
+                </tr>''' for name, events, transitions, draws, requests, waits, \
+                    wall, share in self._rows())
+        return f'''<table>
+            <thead>
+                <th>Model</th>
+                <th>Events</th>
+                <th>Transitions</th>
+                <th>Draws</th>
+                <th>Requests</th>
+                <th>Waits</th>
+                <th colspan="2">Wall time</th>
+            </thead>
+            <tbody>{rows}
+            </tbody>
+        </table>
+        <p>Total run time: {self.profiler.run_time:.4f}s</p>'''
+
+
+
+class GradientReport(Report):
+    """Sensitivity of the throughput to the parameters of a line.
+
+    The throughput is the number of entities received by every `Sink` over
+    the time each of them received its last one.
+
+    Attributes
+    ----------
+    throughput : float
+        Entities received per time unit.
+    gradient : dict[str, float]
+        Derivative of the throughput with respect to the mean processing time
+        of each `Source` and `Machine`.
+    marginal_value : dict[str, float]
+        Estimated change of the throughput with one more slot in each
+        `Buffer`.
+
+    """
+
+    def __init__(self, analyzer:object):
+        throughput = 0
+        gradient = np.zeros(len(analyzer.parameters))
+        marginal_value = np.zeros(len(analyzer.buffers))
+        for n, time, d, f in analyzer.outputs.values():
+            if n == 0 or time <= 0:
+                continue
+            throughput += n / time
+            gradient -= n / time**2 * d
+            marginal_value += n / (time + f) - n / time
+
+        self.throughput = throughput
+        self.gradient = dict(zip(analyzer.parameters, gradient.tolist()))
+        self.marginal_value = dict(zip(analyzer.buffers, marginal_value.tolist()))
+
+    def to_dict(self) -> dict:
+        """Throughput, gradient and marginal values."""
+        return {
+            'throughput': self.throughput,
+            'gradient': dict(self.gradient),
+            'marginal_value': dict(self.marginal_value)
+        }
+
+    def __str__(self):
+        lines = [
+            '',
+            f'Throughput: {self.throughput:.6g} per time unit',
+            '',
+            f"{'Model':<20} {'d throughput / d mean processing time':>40}",
+            '-' * 61
+        ]
+        for name, value in self.gradient.items():
+            lines.append(f'{name:<20} {value:>40.6g}')
+        lines.extend([
+            '',
+            f"{'Buffer':<20} {'Throughput change with one more slot':>40}",
+            '-' * 61
+        ])
+        for name, value in self.marginal_value.items():
+            lines.append(f'{name:<20} {value:>+40.6g}')
+        return '\n'.join(lines) + '\n'
+
+    def _repr_html_(self):
+        gradient = ''.join(f'''
+                <tr>
+                    <td>{name}</td>
+                    <td>{value:.6g}</td>
+                </tr>''' for name, value in self.gradient.items())
+        marginal_value = ''.join(f'''
+                <tr>
+                    <td>{name}</td>
+                    <td>{value:+.6g}</td>
+                </tr>''' for name, value in self.marginal_value.items())
+        return f'''<p>Throughput: {self.throughput:.6g} per time unit</p>
+        <table>
+            <thead>
+                <th>Model</th>
+                <th>d throughput / d mean processing time</th>
+            </thead>
+            <tbody>{gradient}
+            </tbody>
+        </table>
+        <table>
+            <thead>
+                <th>Buffer</th>
+                <th>Throughput change with one more slot</th>
+            </thead>
+            <tbody>{marginal_value}
+            </tbody>
+        </table>'''
+
+
+
+class BottleneckReport(Report):
+    """Sole and shifting bottleneck time of each machine, by time window.
+
+    Attributes
+    ----------
+    machines : list[str]
+        Names of the tracked machines.
+    window : float
+        Length of the time windows.
+    time : float
+        Simulation time of the report.
+    sole : np.ndarray
+        Sole bottleneck time of each machine (rows) in each window (columns).
+    shifting : np.ndarray
+        Shifting bottleneck time of each machine in each window.
+
+    """
+
+    def __init__(
+            self,
+            machines:list,
+            window:float,
+            time:float,
+            sole:np.ndarray,
+            shifting:np.ndarray
+        ):
+        self.machines = machines
+        self.window = window
+        self.time = time
+        self.sole = sole
+        self.shifting = shifting
+
+    @property
+    def windows(self) -> np.ndarray:
+        """Start time of each window."""
+        return np.arange(self.sole.shape[1]) * self.window
+
+    @property
+    def shares(self) -> dict:
+        """Sole and shifting share of each window length, as arrays."""
+        lengths = np.minimum(self.window, self.time - self.windows)
+        return {
+            'sole': self.sole / lengths,
+            'shifting': self.shifting / lengths
+        }
+
+    def to_dict(self) -> dict:
+        """Share of the simulation time of each machine as the bottleneck."""
+        return {
+            name: {
+                'sole': float(self.sole[i].sum() / self.time) if self.time else 0.0,
+                'shifting': float(self.shifting[i].sum() / self.time) if self.time else 0.0
+            } for i, name in enumerate(self.machines)
+        }
+
+    def bottleneck(self) -> list:
+        """Name of the machine with the biggest bottleneck share of each window."""
+        total = self.sole + self.shifting
+        return [
+            self.machines[i] if total[i, j] > 0 else None \
+                for j, i in enumerate(total.argmax(axis=0))
+        ] if self.machines else []
+
+    def _rows(self) -> list:
+        shares = self.to_dict()
+        return sorted(
+            ((name, s['sole'], s['shifting']) for name, s in shares.items()),
+            key = lambda row: row[1] + row[2],
+            reverse = True
+        )
+
+    def __str__(self):
+        lines = [
+            '',
+            f"{'Machine':<20} {'Sole':>10} {'Shifting':>10} {'Total':>10}",
+            '-' * 53
+        ]
+        for name, sole, shifting in self._rows():
+            lines.append(f'{name:<20} {sole:>10.2%} {shifting:>10.2%} {sole+shifting:>10.2%}')
+        lines.append('-' * 53)
+        lines.append(f'{self.sole.shape[1]} windows of {self.window:,} up to time {self.time:,}')
+        return '\n'.join(lines) + '\n'
+
+    def _repr_html_(self):
+        rows = ''.join(f'''
+                <tr>
+                    <td>{name}</td>
+                    <td>{sole:.2%}</td>
+                    <td>{shifting:.2%}</td>
+                    <td>{sole+shifting:.2%}</td>
+                </tr>''' for name, sole, shifting in self._rows())
+        return f'''<table>
+            <thead>
+                <th>Machine</th>
+                <th>Sole</th>
+                <th>Shifting</th>
+                <th>Total</th>
+            </thead>
+            <tbody>{rows}
+            </tbody>
+        </table>
+        <p>{self.sole.shape[1]} windows of {self.window:,} up to time {self.time:,}</p>'''
+
+
+
+class ReplicationReport(Report):
+    """Statistics of each KPI over many replications of one or more scenarios.
+
+    Each design point of the results is a scenario. KPIs are aggregated as
+    arrays with one row per scenario and one column per KPI.
+
+    Replications of a scenario that share a seed, as antithetic pairs do, are
+    averaged into a single observation of the mean. With control variates,
+    the mean of each KPI is the intercept of its least squares regression on
+    the controls, whose expected value is zero [1]_.
+
+    Parameters
+    ----------
+    results : SweepResults
+        Results of `Line.replicate` or `experiments.sweep`.
+    confidence : float, default=0.95
+        Confidence level of the intervals of the means.
+    percentiles : Sequence[float], default=(5, 50, 95)
+        Percentiles of each KPI, between 0 and 100.
+    controls : bool, default=False
+        Adjust the means by the control variates of the results. Controls
+        that don't vary within a scenario are left out, and so are all of
+        them if there are not at least two more observations than controls.
+
+    Attributes
+    ----------
+    points : np.ndarray
+        Design point of each scenario.
+    kpis : list[str]
+        KPI names, as `'model.kpi'`.
+    n : np.ndarray
+        Number of replications of each scenario.
+    mean, std, ci_low, ci_high : np.ndarray
+        Mean, sample standard deviation and confidence interval of the mean
+        of each KPI. The standard deviation is the one of single
+        replications.
+    percentile : dict[float, np.ndarray]
+        Each percentile of each KPI.
+
+    References
+    ----------
+    .. [1] Law, A. M. (2015). Simulation Modeling and Analysis (5th ed.),
+       section 11.4. McGraw-Hill.
+
+    """
+
+    def __init__(
+            self,
+            results:object,
+            confidence:float = 0.95,
+            percentiles:Sequence[float] = (5, 50, 95),
+            controls:bool = False
+        ):
+
+        if not 0 < confidence < 1:
+            raise ValueError('`confidence` must be between 0 and 1.')
+
+        if controls and not results.controls:
+            raise ValueError('The results have no control variates.')
+
+        columns = results.columns
+        ignored = {'point', 'replication', 'seed', *results.parameters,
+            *results.controls}
+        self.kpis = [column for column in columns if column not in ignored]
+        self.confidence = confidence
+
+        values = np.array([columns[kpi] for kpi in self.kpis], dtype=float).T
+        points = np.asarray(columns.get('point', [0]*len(results)))
+        seeds = np.asarray(columns.get('seed', range(len(results))))
+        deviations = np.array(
+            [columns[c] for c in results.controls] if controls else [],
+            dtype = float
+        ).reshape(-1, len(results)).T
+        self.points = np.unique(points)
+        self.parameters = [
+            {p: columns[p][list(points).index(point)] for p in results.parameters} \
+                for point in self.points
+        ]
+
+        shape = (len(self.points), len(self.kpis))
+        self.n = np.zeros(len(self.points), dtype=int)
+        self.mean = np.full(shape, np.nan)
+        self.std = np.full(shape, np.nan)
+        self.percentile = {q: np.full(shape, np.nan) for q in percentiles}
+        half_width = np.full(shape, np.nan)
+
+        for i, point in enumerate(self.points):
+            rows = points == point
+            x = values[rows]
+            n = len(x)
+            self.n[i] = n
+            for q, array in zip(percentiles, np.percentile(x, percentiles, axis=0)):
+                self.percentile[q][i] = array
+            if n > 1:
+                self.std[i] = x.std(axis=0, ddof=1)
+
+            # Independent observations, averaging replications of a seed
+            _, group = np.unique(seeds[rows], return_inverse=True)
+            size = np.bincount(group)[:, None]
+            y = np.zeros((len(size), x.shape[1]))
+            np.add.at(y, group, x)
+            y /= size
+            c = np.zeros((len(size), deviations.shape[1]))
+            np.add.at(c, group, deviations[rows])
+            c /= size
+
+            self.mean[i], half_width[i] = _controlled_mean(y, c, confidence)
+
+        self.ci_low = self.mean - half_width
+        self.ci_high = self.mean + half_width
+
+    def to_dict(self) -> dict:
+        """Statistics as flat columns, with one row per scenario and KPI."""
+        p, k = len(self.points), len(self.kpis)
+        models, kpis = zip(*(kpi.rsplit('.', 1) for kpi in self.kpis)) \
+            if self.kpis else ((), ())
+        columns = {
+            'point': np.repeat(self.points, k),
+            'model': np.tile(models, p),
+            'kpi': np.tile(kpis, p),
+            'n': np.repeat(self.n, k),
+            'mean': self.mean.ravel(),
+            'std': self.std.ravel(),
+            'ci_low': self.ci_low.ravel(),
+            'ci_high': self.ci_high.ravel()
+        }
+        for q, array in self.percentile.items():
+            columns[f'p{q:g}'] = array.ravel()
+        return columns
+
+    def to_frame(self):
+        """Statistics as a pandas DataFrame."""
+        try:
+            import pandas as pd
+        except ImportError:
+            raise ImportError('`to_frame` requires pandas to be installed.')
+        return pd.DataFrame(self.to_dict()).set_index(['point', 'model', 'kpi'])
+
+    def to_csv(self, path:str) -> None:
+        """Write the statistics to a CSV file."""
+        columns = self.to_dict()
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            writer.writerows(zip(*[
+                values.tolist() for values in columns.values()
+            ]))
+
+    def to_parquet(self, path:str, **kwargs) -> None:
+        """Write the statistics to a Parquet file through pandas."""
+        self.to_frame().to_parquet(path, **kwargs)
+
+    def _rows(self, point:int=0) -> list:
+        """Throughput and status shares of each model of a scenario."""
+        index = {kpi: j for j, kpi in enumerate(self.kpis)}
+        models = list(dict.fromkeys(kpi.rsplit('.', 1)[0] for kpi in self.kpis))
+        statuses = ('time_starved', 'time_processing', 'time_blocked', 'time_broken')
+        rows = []
+        for model in models:
+            j = index.get(f'{model}.items_processed')
+            if j is None:
+                continue
+            times = np.array([
+                self.mean[point, index[f'{model}.{s}']] \
+                    if f'{model}.{s}' in index else 0 for s in statuses
+            ])
+            total = times.sum()
+            shares = times / total if total else times
+            half = (self.ci_high[point, j] - self.ci_low[point, j]) / 2
+            rows.append((model, self.mean[point, j], half, *shares))
+        return rows
+
+    def _summary_rows(self, point:int=0, max_rows:int=20) -> list:
+        rows = self._rows(point)
+        if len(rows) > max_rows:
+            return rows[:max_rows//2] + [None] + rows[-(max_rows//2):]
+        return rows
+
+    def __str__(self):
+        header = (f"{'Model':<20} {'Items processed':>24} {'Starved':>9} "
+            f"{'Processing':>11} {'Blocked':>9} {'Broken':>9}")
+        lines = ['']
+        for i, point in enumerate(self.points):
+            if len(self.points) > 1:
+                lines.append(f'Point {point}: {self.parameters[i]}')
+            lines.extend([header, '-' * len(header)])
+            for row in self._summary_rows(i):
+                if row is None:
+                    lines.append('...')
+                    continue
+                name, mean, half, starved, processing, blocked, broken = row
+                items = f'{mean:,.1f} \u00b1 {half:,.1f}' if not np.isnan(half) \
+                    else f'{mean:,.1f}'
+                lines.append(
+                    f'{name:<20} {items:>24} {starved:>9.2%} {processing:>11.2%} '
+                    f'{blocked:>9.2%} {broken:>9.2%}'
+                )
+            lines.append('-' * len(header))
+            lines.append(f'{self.n[i]} replications, '
+                f'{self.confidence:.0%} confidence intervals')
+            lines.append('')
+        return '\n'.join(lines)
+
+    def _repr_html_(self):
+        tables = []
+        for i, point in enumerate(self.points):
+            rows = ''.join(
+                '''
+                <tr><td colspan="6">...</td></tr>''' if row is None else f'''
+                <tr>
+                    <td>{row[0]}</td>
+                    <td>{row[1]:,.1f} &plusmn; {row[2]:,.1f}</td>
+                    <td>{row[3]:.2%}</td>
+                    <td>{row[4]:.2%}</td>
+                    <td>{row[5]:.2%}</td>
+                    <td>{row[6]:.2%}</td>
+                </tr>''' for row in self._summary_rows(i))
+            title = f'<p>Point {point}: {self.parameters[i]}</p>' \
+                if len(self.points) > 1 else ''
+            tables.append(f'''{title}<table>
+            <thead>
+                <th>Model</th>
+                <th>Items processed</th>
+                <th>Starved</th>
+                <th>Processing</th>
+                <th>Blocked</th>
+                <th>Broken</th>
+            </thead>
+            <tbody>{rows}
+            </tbody>
+        </table>
+        <p>{self.n[i]} replications, {self.confidence:.0%} confidence intervals</p>''')
+        return '<br>'.join(tables)
+
+
+
+def _controlled_mean(y:np.ndarray, c:np.ndarray, confidence:float) -> tuple:
+    """Mean of each column of `y` adjusted by the controls `c`, of expected
+    value zero, and the half width of its confidence interval."""
+
+    n = len(y)
+    keep = np.isfinite(c).all(axis=0) & (np.ptp(c, axis=0) > 0)
+    c = c[:, keep] if n - keep.sum() >= 2 else c[:, :0]
+
+    if c.shape[1] == 0:
+        mean = y.mean(axis=0)
+        if n < 2:
+            return mean, np.full(y.shape[1], np.nan)
+        t = t_quantile((1 + confidence) / 2, n - 1)
+        return mean, t * y.std(axis=0, ddof=1) / np.sqrt(n)
+
+    design = np.column_stack([np.ones(n), c])
+    coefficients = np.linalg.pinv(design) @ y
+    residuals = y - design @ coefficients
+    df = n - design.shape[1]
+    variance = (residuals**2).sum(axis=0) / df \
+        * np.linalg.pinv(design.T @ design)[0, 0]
+    t = t_quantile((1 + confidence) / 2, df)
+    return coefficients[0], t * np.sqrt(variance)
@@ -7,6 +7,7 @@ accessed through the object's properties.
 
 from dataclasses import dataclass
 from numbers import Number
+from typing import Union
 
 import numpy as np
 import plotly.graph_objects as go
@@ -41,18 +42,141 @@ class Stats:
     def percentile(self, p:float, **kwargs) -> Number:
         return np.percentile(self.values, p, **kwargs)
 
-    def histogram(self, **kwargs) -> go.Figure:
-        return self._plot(go.Histogram, **kwargs)
+    def histogram(self, bins:Union[int, str]='auto', **kwargs) -> go.Figure:
+        """Histogram of the values, binned with NumPy.
 
-    def boxplot(self, **kwargs) -> go.Figure:
-        return self._plot(go.Box, **kwargs)
+        Only the bins are sent to plotly, so the figure size doesn't depend on
+        the number of values.
+
+        Parameters
+        ----------
+        bins : int | str, default='auto'
+            Number of bins, or a NumPy binning method.
+        **kwargs
+            Arguments of the `go.Bar` trace.
+
+        """
 
-    def _plot(self, plot_type, **kwargs) -> go.Figure:
+        counts, edges = np.histogram(self.values, bins=bins)
+        return self._plot(go.Bar(
+            x = (edges[:-1] + edges[1:]) / 2,
+            y = counts,
+            width = np.diff(edges),
+            **kwargs
+        ))
+
+    def boxplot(self, **kwargs) -> go.Figure:
+        """Box plot of the quartiles of the values, computed with NumPy.
+
+        Whiskers reach the furthest values within 1.5 times the interquartile
+        range, and values outside of them aren't drawn.
+
+        Parameters
+        ----------
+        **kwargs
+            Arguments of the `go.Box` trace.
+
+        """
+
+        summary = self.summary()
+        return self._plot(go.Box(
+            q1 = [summary['q1']],
+            median = [summary['median']],
+            q3 = [summary['q3']],
+            lowerfence = [summary['lower_fence']],
+            upperfence = [summary['upper_fence']],
+            mean = [summary['mean']],
+            orientation = 'h',
+            **kwargs
+        ))
+
+    def summary(self) -> dict:
+        """Quartiles, mean and box plot fences of the values.
+
+        Every statistic is NaN if there are no values.
+
+        """
+        values = np.asarray(self.values, dtype=float)
+        if values.size == 0:
+            return dict.fromkeys(('min', 'q1', 'median', 'q3', 'max', 'mean',
+                'lower_fence', 'upper_fence'), float('nan'))
+        q1, median, q3 = np.percentile(values, (25, 50, 75))
+        iqr = q3 - q1
+        return {
+            'min': float(values.min()),
+            'q1': float(q1),
+            'median': float(median),
+            'q3': float(q3),
+            'max': float(values.max()),
+            'mean': float(values.mean()),
+            'lower_fence': float(values[values >= q1 - 1.5*iqr].min()),
+            'upper_fence': float(values[values <= q3 + 1.5*iqr].max())
+        }
+
+    def _plot(self, trace) -> go.Figure:
         return go.Figure(
-            data = plot_type(x=self.values, **kwargs),
+            data = trace,
             layout = {
                 'title': {'text': 'Time Distribution'},
                 'xaxis': {'title': 'Time'},
                 'yaxis': {'title': 'Frequency'}
             }
         )
+
+
+
+def normal_quantile(p:float) -> float:
+    """Quantile of the standard normal distribution.
+
+    Acklam's rational approximation, with relative error below 1.2e-9.
+
+    """
+
+    if not 0 < p < 1:
+        raise ValueError('`p` must be between 0 and 1.')
+
+    a = (-3.969683028665376e+01, 2.209460984245205e+02, -2.759285104469687e+02,
+        1.383577518672690e+02, -3.066479806614716e+01, 2.506628277459239e+00)
+    b = (-5.447609879822406e+01, 1.615858368580409e+02, -1.556989798598866e+02,
+        6.680131188771972e+01, -1.328068155288572e+01)
+    c = (-7.784894002430293e-03, -3.223964580411365e-01, -2.400758277161838e+00,
+        -2.549732539343734e+00, 4.374664141464968e+00, 2.938163982698783e+00)
+    d = (7.784695709041462e-03, 3.224671290700398e-01, 2.445134137142996e+00,
+        3.754408661907416e+00)
+
+    if p < 0.02425:
+        q = np.sqrt(-2*np.log(p))
+        return (((((c[0]*q+c[1])*q+c[2])*q+c[3])*q+c[4])*q+c[5]) / \
+            ((((d[0]*q+d[1])*q+d[2])*q+d[3])*q+1)
+    if p > 1 - 0.02425:
+        return -normal_quantile(1 - p)
+    q = p - 0.5
+    r = q*q
+    return (((((a[0]*r+a[1])*r+a[2])*r+a[3])*r+a[4])*r+a[5])*q / \
+        (((((b[0]*r+b[1])*r+b[2])*r+b[3])*r+b[4])*r+1)
+
+
+
+def t_quantile(p:float, df:int) -> float:
+    """Quantile of the Student's t distribution with `df` degrees of freedom.
+
+    Exact for 1 and 2 degrees of freedom, and a Cornish-Fisher expansion of
+    the normal quantile otherwise.
+
+    """
+
+    if df < 1:
+        raise ValueError('`df` must be at least 1.')
+    if df == 1:
+        return float(np.tan(np.pi * (p - 0.5)))
+    if df == 2:
+        return float((2*p - 1) / np.sqrt(2 * p * (1 - p)))
+
+    z = normal_quantile(p)
+    return float(
+        z
+        + (z**3 + z) / (4*df)
+        + (5*z**5 + 16*z**3 + 3*z) / (96*df**2)
+        + (3*z**7 + 19*z**5 + 17*z**3 - 15*z) / (384*df**3)
+        + (79*z**9 + 776*z**7 + 1482*z**5 - 1920*z**3 - 945*z) / (92160*df**4)
+    )
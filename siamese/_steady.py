@@ -0,0 +1,168 @@
+"""The steady state submodule.
+
+A line whose models all have constant times and no failures is deterministic,
+so after a transient it repeats the same cycle of states until the end of the
+simulation. `run` detects the cycle and skips the whole cycles that fit in the
+horizon, adding what each model accrues in a cycle as many times as skipped.
+
+The state of a line, at each advance of the clock, is made of:
+- The remaining time of each scheduled event, and the model waiting for it;
+- The content and the waiting requests of each buffer;
+- The state of each model, as returned by its `_cycle_state` method.
+
+How each model accrues in a cycle is set by its class attributes:
+- `_cycle_totals` grow by their change over a cycle, including the time
+  spent in the current status, as returned in the same order by the
+  `_current_totals` method of the models that have it;
+- `_cycle_records` are lists extended with the records of a cycle;
+- `_cycle_timelines` are lists of `(time, value)` records, extended with the
+  records of a cycle shifted by the cycle period;
+- `_cycle_timestamps` are shifted by the skipped time, so the time spent in
+  the current status, whenever it started, grows by the skipped time too.
+
+"""
+
+import math
+
+import numpy as np
+
+
+
+# Decimal places of the remaining times compared between states
+_DECIMALS = 9
+
+# States kept while looking for a cycle, before giving up
+_MAX_STATES = 10000
+
+
+
+def run(line, until:float) -> None:
+    """Run the simulation of a line, fast-forwarding its steady state.
+
+    Lines that aren't deterministic, or whose state doesn't repeat soon
+    enough, are simulated event by event.
+
+    Parameters
+    ----------
+    line : Line
+        A line whose simulation has started.
+    until : float
+        Run the simulation until given time.
+
+    """
+
+    env = line.env
+    models = line._models
+
+    if any(model._entities or model._cycle_state() is None for model in models):
+        env.run(until=until)
+        return
+
+    seen = {}
+    while env.peek() < until:
+        env.step()
+        if env.peek() == env.now:
+            continue
+
+        state = _state(env, models)
+        if state is None or len(seen) >= _MAX_STATES:
+            break
+
+        if state in seen:
+            start, snapshot = seen[state]
+            period = env.now - start
+            cycles = math.floor((until - env.now) / period) - 1
+            if cycles > 0:
+                _fast_forward(env, models, start, snapshot, period, cycles)
+            break
+
+        seen[state] = (env.now, _snapshot(models))
+
+    env.run(until=until)
+
+
+
+def _state(env, models:list):
+    """Hashable state of a line, or `None` if it can't be determined."""
+
+    # Events each process is waiting for
+    targets = {}
+    for model in models:
+        for attr in ('process', 'failure_process'):
+            process = getattr(model, attr, None)
+            if process is not None and process.is_alive:
+                targets[process._target] = (model.name, attr)
+
+    events = []
+    for time, priority, _, event in sorted(env._queue):
+        owner = targets.get(event)
+        if owner is None:
+            return None
+        events.append((round(time - env.now, _DECIMALS), priority, owner))
+
+    buffers = []
+    for model in models:
+        store = getattr(model, '_buffer', None)
+        if store is not None:
+            buffers.append((
+                len(store.items),
+                tuple(targets.get(event) for event in store.get_queue),
+                tuple(targets.get(event) for event in store.put_queue)
+            ))
+
+    return (
+        tuple(events),
+        tuple(buffers),
+        tuple(model._cycle_state() for model in models)
+    )
+
+
+
+def _snapshot(models:list) -> list:
+    """Totals and record counts of each model."""
+    return [(
+        _totals(model),
+        {attr: len(getattr(model, attr)) \
+            for attr in model._cycle_records + model._cycle_timelines}
+    ) for model in models]
+
+
+
+def _totals(model) -> dict:
+    """Totals of a model, including the time spent in its current status."""
+    if hasattr(model, '_current_totals'):
+        return dict(zip(model._cycle_totals, model._current_totals()))
+    return {attr: getattr(model, attr) for attr in model._cycle_totals}
+
+
+
+def _fast_forward(
+        env,
+        models:list,
+        start:float,
+        snapshot:list,
+        period:float,
+        cycles:int
+    ) -> None:
+    """Skip `cycles` repetitions of the cycle that started at `start`."""
+
+    skipped = cycles * period
+
+    for model, (totals, counts) in zip(models, snapshot):
+        for attr, value in _totals(model).items():
+            setattr(model, attr, getattr(model, attr) + cycles*(value - totals[attr]))
+        for attr in model._cycle_records:
+            records = getattr(model, attr)
+            records.extend(records[counts[attr]:] * cycles)
+        for attr in model._cycle_timelines:
+            records = getattr(model, attr)
+            times = [time for time, _ in records[counts[attr]:]]
+            values = [value for _, value in records[counts[attr]:]]
+            times = np.add.outer(np.arange(1, cycles+1) * period, times)
+            records.extend(zip(times.ravel().tolist(), values * cycles))
+        for attr in model._cycle_timestamps:
+            setattr(model, attr, getattr(model, attr) + skipped)
+
+    # Shifting every event keeps the order of the event queue
+    env._now += skipped
+    env._queue[:] = [(time + skipped, *rest) for time, *rest in env._queue]
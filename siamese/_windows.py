@@ -0,0 +1,42 @@
+"""Time window accumulators.
+
+Windowed quantities are kept as lists that grow as the simulation advances,
+where item `i` holds the value accumulated in the window that starts at time
+`i * length`.
+
+"""
+
+import numpy as np
+
+
+
+def add(windows:list, start:float, end:float, length:float, weight:float=1) -> None:
+    """Add the interval between `start` and `end` to the windows it spans."""
+
+    while start < end:
+        i = int(start // length)
+        stop = min(end, (i+1) * length)
+        if len(windows) <= i:
+            windows.extend([0] * (i + 1 - len(windows)))
+        windows[i] += weight * (stop - start)
+        start = stop
+
+
+
+def count(windows:list, time:float, length:float) -> None:
+    """Count an event at `time` in its window."""
+
+    i = int(time // length)
+    if len(windows) <= i:
+        windows.extend([0] * (i + 1 - len(windows)))
+    windows[i] += 1
+
+
+
+def to_array(windows:list, n:int) -> np.ndarray:
+    """Array of the first `n` windows of each list of windows."""
+
+    array = np.zeros((len(windows), n))
+    for i, values in enumerate(windows):
+        array[i, :len(values)] = values[:n]
+    return array
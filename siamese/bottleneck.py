@@ -0,0 +1,241 @@
+"""The bottleneck detection submodule.
+
+A `BottleneckDetector` finds the shifting bottleneck of a `Line` during the
+simulation, through the active period method [1]_:
+- A machine is active while processing or being repaired, and inactive while
+  starving or blocked;
+- At each moment, the bottleneck is the machine with the longest active
+  period covering that moment;
+- Where the active periods of two consecutive bottlenecks overlap, both are
+  shifting bottlenecks. Otherwise, the bottleneck is a sole bottleneck.
+
+Active periods are tracked through the status transitions observed with
+`Line.subscribe`, and each moment is attributed to a bottleneck as soon as no
+ongoing active period can cover it anymore, so only the active periods that
+may still change the attribution are kept in memory.
+
+>>> from siamese.bottleneck import BottleneckDetector
+>>> detector = BottleneckDetector(line, window=60)
+>>> line.simulate(1000)
+>>> detector.report
+
+References
+----------
+.. [1] Roser, C., Nakano, M. and Tanaka, M. (2002). Shifting bottleneck
+   detection. Proceedings of the Winter Simulation Conference.
+
+"""
+
+from copy import deepcopy
+from typing import Optional
+
+import numpy as np
+
+from siamese import _windows
+from siamese.status import Status
+from siamese._reports import BottleneckReport
+
+
+
+_ACTIVE = {Status.PROCESSING, Status.FAILURE}
+
+
+
+class BottleneckDetector:
+    """Online shifting bottleneck detection of the machines of a line.
+
+    Parameters
+    ----------
+    line : Line
+        Line to be observed. Every `Machine` of the line is tracked.
+    window : float
+        Length of the time windows of the report.
+    machines : list[str], optional
+        Names of the machines to be tracked, instead of every `Machine`.
+
+    Methods
+    -------
+    detach()
+        Stop observing the line.
+
+    Properties
+    ----------
+    report : BottleneckReport
+        Sole and shifting bottleneck time of each machine, by time window.
+
+    """
+
+    def __init__(self, line, window:float, machines:Optional[list]=None):
+
+        # Avoid circular imports
+        from siamese.models.machine import Machine
+
+        if window <= 0:
+            raise ValueError('`window` must be bigger than zero.')
+
+        if machines is None:
+            machines = [model.name for model in line._models \
+                if isinstance(model, Machine)]
+
+        self.line = line
+        self.window = window
+        self.machines = list(machines)
+        self._index = {name: i for i, name in enumerate(self.machines)}
+
+        # Active periods, and those whose machine became inactive at a time
+        # that hasn't advanced yet, which go on if it becomes active again
+        self._active_start = [None] * len(self.machines)
+        self._inactive = [None] * len(self.machines)
+        self._pending = []
+
+        # Attribution
+        self._finalized = 0
+        self._reign = None
+        self._sole = [[] for _ in self.machines]
+        self._shifting = [[] for _ in self.machines]
+
+        self._subscriptions = [
+            (name, status) for name in self.machines for status in Status
+        ]
+        for name, status in self._subscriptions:
+            line.subscribe(name, status, self._on_transition)
+
+
+    def detach(self) -> None:
+        """Stop observing the line."""
+        for name, status in self._subscriptions:
+            self.line.unsubscribe(name, status, self._on_transition)
+        self._subscriptions = []
+
+
+    @property
+    def report(self) -> BottleneckReport:
+        """Sole and shifting bottleneck time of each machine, by time window.
+
+        Active periods still in progress are considered to end at the current
+        simulation time, without changing the state of the detector.
+
+        """
+
+        now = self.line.now
+        snapshot = deepcopy({
+            key: value for key, value in self.__dict__.items() if key != 'line'
+        })
+        detector = object.__new__(type(self))
+        detector.__dict__.update(snapshot)
+
+        for i, start in enumerate(detector._active_start):
+            if start is not None:
+                detector._end_period(i, start, now)
+        for i, deferred in enumerate(detector._inactive):
+            if deferred is not None:
+                detector._end_period(i, *deferred)
+        detector._finalize(now)
+        detector._close_reign(None)
+
+        n = max(int(np.ceil(now / self.window)), 1)
+        return BottleneckReport(
+            machines = self.machines,
+            window = self.window,
+            time = now,
+            sole = _windows.to_array(detector._sole, n),
+            shifting = _windows.to_array(detector._shifting, n)
+        )
+
+
+    def _on_transition(self, model, status, time) -> None:
+        self._end_inactive(time)
+        i = self._index[model.name]
+        start = self._active_start[i]
+        if status in _ACTIVE:
+            if start is None:
+                deferred = self._inactive[i]
+                self._inactive[i] = None
+                self._active_start[i] = time if deferred is None else deferred[0]
+        elif start is not None:
+            self._active_start[i] = None
+            self._inactive[i] = (start, time)
+
+
+    def _end_inactive(self, now:float) -> None:
+        """End the active periods of machines that stayed inactive until
+        `now`, so for a positive time."""
+
+        ended = False
+        for i, deferred in enumerate(self._inactive):
+            if deferred is not None and deferred[1] < now:
+                self._inactive[i] = None
+                self._end_period(i, *deferred)
+                ended = True
+
+        if ended:
+            ongoing = [s for s in self._active_start if s is not None] \
+                + [d[0] for d in self._inactive if d is not None]
+            self._finalize(min(ongoing, default=now))
+
+
+    def _end_period(self, machine:int, start:float, end:float) -> None:
+        if end > start:
+            self._pending.append((start, end, machine))
+
+
+    def _finalize(self, until:float) -> None:
+        """Attribute the time up to `until` to the bottlenecks."""
+
+        if until <= self._finalized:
+            return
+
+        periods = [p for p in self._pending if p[1] > self._finalized]
+        points = sorted({self._finalized, until} | {
+            x for p in periods for x in p[:2] if self._finalized < x < until
+        })
+
+        for x0, x1 in zip(points, points[1:]):
+            longest = None
+            for period in periods:
+                if period[0] <= x0 and period[1] >= x1 and (longest is None \
+                        or period[1]-period[0] > longest[1]-longest[0]):
+                    longest = period
+            if self._reign is not None and longest is self._reign['period']:
+                self._reign['end'] = x1
+            else:
+                self._close_reign(longest)
+                if longest is not None:
+                    self._reign['start'] = x0
+                    self._reign['end'] = x1
+
+        self._finalized = until
+        self._pending = [p for p in periods if p[1] > until]
+
+
+    def _close_reign(self, period:Optional[tuple]) -> None:
+        """End the current bottleneck reign, which `period` succeeds."""
+
+        reign = self._reign
+        shift_end = None
+
+        if reign is not None:
+            current = reign['period']
+            sole_start = reign['start'] if reign['shift_end'] is None \
+                else max(reign['start'], reign['shift_end'])
+            sole_end = reign['end']
+
+            # Consecutive bottlenecks of different machines that overlap
+            if period is not None and period[2] != current[2] \
+                    and period[0] < current[1]:
+                shift_start, shift_end = period[0], current[1]
+                _windows.add(self._shifting[current[2]], shift_start, shift_end, self.window)
+                _windows.add(self._shifting[period[2]], shift_start, shift_end, self.window)
+                sole_end = min(sole_end, shift_start)
+
+            _windows.add(self._sole[current[2]], sole_start, sole_end, self.window)
+
+        if period is None:
+            self._reign = None
+        else:
+            self._reign = {
+                'period': period,
+                'shift_end': shift_end,
+                'start': None,
+                'end': None
+            }
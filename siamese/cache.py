@@ -0,0 +1,223 @@
+"""The result cache submodule.
+
+A `ResultCache` stores the results of seeded simulations on disk, so running
+an identical scenario again returns them instantly.
+
+Results are addressed by a hash of the canonical configuration of the line
+(every model, distribution and failure, in order), the simulation horizon, the
+seed, the entity mode and the library version.
+
+>>> from siamese.cache import ResultCache
+>>> cache = ResultCache('.siamese_cache', max_size=500*2**20)
+>>> line.simulate(1000, seed=42, cache=cache)
+
+"""
+
+from dataclasses import fields, is_dataclass
+import hashlib
+import os
+import pickle
+import shutil
+from typing import Optional
+
+import numpy as np
+
+import siamese
+from siamese.distributions import Constant
+
+
+
+# Subfolder of the cache directory that holds the version folders
+_NAMESPACE = 'siamese-cache'
+
+
+
+class ResultCache:
+    """Content-addressed, size-bounded cache of simulation results.
+
+    Entries are evicted in least recently used order when the total size of
+    the cache exceeds `max_size`. Entries created by other versions of the
+    library are removed when the cache is opened.
+
+    Parameters
+    ----------
+    directory : str
+        Folder where the results are stored, in a `siamese-cache` subfolder
+        that holds a folder for each library version.
+    max_size : int, default=1 GiB
+        Maximum size of the stored results, in bytes.
+
+    Methods
+    -------
+    key(line, time, seed, entities=False, ...)
+        Hash of a simulation scenario.
+    get(key)
+        Stored results of a scenario, if any.
+    put(key, results)
+        Store the results of a scenario.
+    clear()
+        Remove every stored result.
+
+    """
+
+    def __init__(self, directory:str, max_size:int=2**30):
+        if max_size <= 0:
+            raise ValueError('`max_size` must be bigger than zero.')
+
+        self.max_size = max_size
+        namespace = os.path.join(directory, _NAMESPACE)
+        self.directory = os.path.join(namespace, siamese.__version__)
+        os.makedirs(self.directory, exist_ok=True)
+
+        # Invalidate results of other library versions. Only the folders of
+        # the namespace are created by the cache, so nothing else is removed
+        for entry in os.scandir(namespace):
+            if entry.is_dir() and entry.name != siamese.__version__:
+                shutil.rmtree(entry.path, ignore_errors=True)
+
+
+    def key(
+            self,
+            line,
+            time:float,
+            seed,
+            entities:bool = False,
+            antithetic:bool = False,
+            timeline:bool = False
+        ) -> str:
+        """Hash of a simulation scenario.
+
+        Parameters
+        ----------
+        line : Line
+            Line to be simulated.
+        time : float
+            Simulation horizon.
+        seed : int | str
+            Seed of the simulation.
+        entities : bool, default=False
+            Whether entities are tracked as `Part` records.
+        antithetic : bool, default=False
+            Whether the complement of the seeded values is drawn.
+        timeline : bool, default=False
+            Whether status changes are recorded for the timeline plot.
+
+        Returns
+        -------
+        str
+            Hexadecimal hash of the scenario.
+
+        """
+
+        scenario = (
+            siamese.__version__,
+            [_canonical(model) for model in line._models],
+            _canonical(time),
+            _canonical(seed),
+            entities,
+            antithetic,
+            timeline
+        )
+        return hashlib.sha256(repr(scenario).encode()).hexdigest()
+
+
+    def get(self, key:str) -> Optional[dict]:
+        """Stored results of a scenario, if any.
+
+        Parameters
+        ----------
+        key : str
+            Hash returned by the `key` method.
+
+        Returns
+        -------
+        dict | None
+            The stored results, or `None` on a cache miss.
+
+        """
+
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                results = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        os.utime(path)
+        return results
+
+
+    def put(self, key:str, results:dict) -> None:
+        """Store the results of a scenario.
+
+        Parameters
+        ----------
+        key : str
+            Hash returned by the `key` method.
+        results : dict
+            Picklable results.
+
+        """
+
+        path = self._path(key)
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        with open(temp_path, 'wb') as f:
+            pickle.dump(results, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+        self._evict()
+
+
+    def clear(self) -> None:
+        """Remove every stored result."""
+        for entry in os.scandir(self.directory):
+            os.remove(entry.path)
+
+
+    def _path(self, key:str) -> str:
+        return os.path.join(self.directory, f'{key}.pkl')
+
+
+    def _evict(self) -> None:
+        entries = [
+            (entry.stat().st_mtime, entry.stat().st_size, entry.path) \
+                for entry in os.scandir(self.directory) \
+                    if entry.name.endswith('.pkl')
+        ]
+        size = sum(entry[1] for entry in entries)
+        for _, entry_size, path in sorted(entries):
+            if size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            size -= entry_size
+
+
+
+def _canonical(obj):
+    """Representation of a configuration that ignores equivalent spellings."""
+
+    # Numbers are simulated as `Constant` distributions
+    if isinstance(obj, Constant):
+        return _canonical(obj.value)
+
+    if is_dataclass(obj):
+        return (
+            f'{type(obj).__module__}.{type(obj).__qualname__}',
+            tuple((f.name, _canonical(getattr(obj, f.name))) for f in fields(obj))
+        )
+
+    if isinstance(obj, (list, tuple)):
+        return tuple(_canonical(item) for item in obj)
+
+    # Arrays' `repr` elides their middle items
+    if isinstance(obj, np.ndarray):
+        return _canonical(obj.tolist())
+
+    if isinstance(obj, dict):
+        return tuple(sorted((repr(k), _canonical(v)) for k, v in obj.items()))
+
+    if isinstance(obj, float) and obj.is_integer():
+        return int(obj)
+
+    return obj
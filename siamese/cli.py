@@ -0,0 +1,277 @@
+"""The command-line interface submodule.
+
+The `siamese` command runs simulations of a line configuration, as read by
+`Line.from_config`, from schedulers and CI pipelines:
+
+    $ siamese run plant.yaml --time 10000 --seed 42 --output kpis.json
+    $ siamese run plant.json --time 10000 --replications 30 --workers 8 --output kpis.csv
+    $ siamese run plant.json --time 1000 --seed 1 --trace trace.csv
+    $ siamese validate plant.yaml
+    $ siamese serve plant.yaml warehouse.json --port 8000 --workers 8
+
+`siamese serve` runs a `WhatIfService` of the given lines, named after their
+files, until interrupted.
+
+KPIs are written as JSON or CSV, by the extension of `--output`, or as JSON
+to the standard output. Progress messages go to the standard error, unless
+`--quiet` is given.
+
+Exit codes:
+- 0: success;
+- 1: the simulation failed;
+- 2: invalid arguments or configuration;
+- 130: interrupted.
+
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+from typing import Optional, Sequence
+
+from siamese import __version__, Line
+from siamese.experiments import sweep
+from siamese.service import WhatIfService, _finite, _statistics
+from siamese.status import BufferEvent, Status
+from siamese._reports import ReplicationReport
+
+
+
+EXIT_OK = 0
+EXIT_FAILURE = 1
+EXIT_USAGE = 2
+EXIT_INTERRUPTED = 130
+
+# Progress messages of a single run
+_STEPS = 10
+
+
+
+def main(argv:Optional[Sequence[str]]=None) -> int:
+    """Run the `siamese` command.
+
+    Parameters
+    ----------
+    argv : Sequence[str], optional
+        Command-line arguments. If `None`, `sys.argv` is used.
+
+    Returns
+    -------
+    int
+        Exit code.
+
+    """
+
+    args = _parser().parse_args(argv)
+    log = (lambda message: None) if args.quiet else _log
+
+    if args.command == 'serve':
+        return _serve(args, log)
+
+    try:
+        line = Line.from_config(args.config)
+    except (OSError, ValueError, ImportError) as error:
+        print(f'siamese: error: {error}', file=sys.stderr)
+        return EXIT_USAGE
+    log(f'Loaded {len(line._models)} models from {args.config}.')
+
+    if args.command == 'validate':
+        return EXIT_OK
+
+    try:
+        _check(args)
+    except ValueError as error:
+        print(f'siamese: error: {error}', file=sys.stderr)
+        return EXIT_USAGE
+
+    try:
+        if args.replications == 1:
+            kpis = _simulate(line, args, log)
+        else:
+            kpis = _replicate(line, args, log)
+        _write(kpis, args.output, args.replications)
+    except KeyboardInterrupt:
+        print('siamese: interrupted', file=sys.stderr)
+        return EXIT_INTERRUPTED
+    except Exception as error:
+        print(f'siamese: simulation failed: {type(error).__name__}: {error}', file=sys.stderr)
+        return EXIT_FAILURE
+
+    if args.output is not None:
+        log(f'KPIs written to {args.output}.')
+    return EXIT_OK
+
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog = 'siamese',
+        description = 'Simulate manufacturing and assembly lines.'
+    )
+    parser.add_argument('--version', action='version', version=f'%(prog)s {__version__}')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help='simulate a line configuration')
+    run.add_argument('config', help='JSON or YAML line configuration')
+    run.add_argument('--time', type=float, required=True, help='simulation horizon')
+    run.add_argument('--replications', type=int, default=1,
+        help='number of independent replications (default: 1)')
+    run.add_argument('--seed', type=int, default=None,
+        help='seed of the first replication (default: unseeded, or 0 for replications)')
+    run.add_argument('--workers', type=int, default=None,
+        help='number of worker processes for replications (default: number of CPUs)')
+    run.add_argument('--confidence', type=float, default=0.95,
+        help='confidence level of the replication intervals (default: 0.95)')
+    run.add_argument('--output', default=None,
+        help='JSON or CSV file of the KPIs, by its extension (default: JSON to stdout)')
+    run.add_argument('--trace', default=None,
+        help='CSV file where every status change is streamed, for a single replication')
+    run.add_argument('--quiet', action='store_true', help='do not print progress messages')
+
+    validate = commands.add_parser('validate', help='check a line configuration')
+    validate.add_argument('config', help='JSON or YAML line configuration')
+    validate.add_argument('--quiet', action='store_true', help='do not print progress messages')
+
+    serve = commands.add_parser('serve', help='serve what-if simulations over HTTP')
+    serve.add_argument('configs', nargs='+', help='JSON or YAML line configurations')
+    serve.add_argument('--host', default='127.0.0.1', help='address to listen to (default: 127.0.0.1)')
+    serve.add_argument('--port', type=int, default=8000, help='port to listen to (default: 8000)')
+    serve.add_argument('--workers', type=int, default=None,
+        help='number of worker processes (default: number of CPUs)')
+    serve.add_argument('--quiet', action='store_true', help='do not print progress messages')
+
+    return parser
+
+
+
+def _check(args) -> None:
+    if args.time <= 0:
+        raise ValueError('`--time` must be bigger than zero.')
+    if args.replications <= 0:
+        raise ValueError('`--replications` must be bigger than zero.')
+    if args.trace is not None and args.replications > 1:
+        raise ValueError('`--trace` requires a single replication.')
+    if args.output is not None and not args.output.endswith(('.json', '.csv')):
+        raise ValueError('`--output` must be a .json or .csv file.')
+
+
+
+def _simulate(line, args, log) -> dict:
+    """KPIs of a single run, by model."""
+
+    trace = None
+    if args.trace is not None:
+        trace = open(args.trace, 'w', newline='')
+        writer = csv.writer(trace)
+        writer.writerow(['time', 'model', 'status'])
+        callback = lambda model, status, time: writer.writerow([time, model.name, status.name])
+        for model in line._models:
+            for status in (*Status, *BufferEvent):
+                try:
+                    line.subscribe(model, status, callback)
+                except ValueError:
+                    pass
+
+    def progress(now):
+        log(f'Simulated {now:g} of {args.time:g} ({now / args.time:.0%}).')
+
+    try:
+        line.simulate(args.time, seed=args.seed, progress=progress,
+            progress_interval=args.time / _STEPS)
+    finally:
+        if trace is not None:
+            trace.close()
+
+    return line.report.to_dict()
+
+
+
+def _replicate(line, args, log) -> dict:
+    """Statistics of the KPIs over the replications, by model."""
+
+    done = []
+    def progress(row):
+        done.append(row)
+        log(f'Replication {row["replication"]} done ({len(done)} of {args.replications}).')
+
+    results = sweep(
+        line = line,
+        design = [{}],
+        time = args.time,
+        replications = args.replications,
+        seed = args.seed or 0,
+        workers = args.workers,
+        callback = progress
+    )
+    # Sweeps return the rows completed so far when interrupted
+    if len(results) < args.replications:
+        raise KeyboardInterrupt
+
+    return _statistics(ReplicationReport(results, args.confidence))
+
+
+
+def _serve(args, log) -> int:
+    """Serve the lines of the configurations until interrupted."""
+
+    names = [os.path.splitext(os.path.basename(path))[0] for path in args.configs]
+    if len(set(names)) < len(names):
+        print('siamese: error: configuration files must have distinct names.', file=sys.stderr)
+        return EXIT_USAGE
+
+    try:
+        service = WhatIfService(
+            lines = dict(zip(names, args.configs)),
+            host = args.host,
+            port = args.port,
+            workers = args.workers
+        )
+    except (OSError, ValueError, ImportError) as error:
+        print(f'siamese: error: {error}', file=sys.stderr)
+        return EXIT_USAGE
+
+    log(f'Serving {", ".join(names)} on http://{args.host}:{args.port}.')
+    try:
+        service.run()
+    except OSError as error:
+        print(f'siamese: error: {error}', file=sys.stderr)
+        return EXIT_USAGE
+    except KeyboardInterrupt:
+        print('siamese: interrupted', file=sys.stderr)
+        return EXIT_INTERRUPTED
+    return EXIT_OK
+
+
+
+def _write(kpis:dict, path:Optional[str], replications:int) -> None:
+    """Write the KPIs as JSON or CSV."""
+
+    if path is not None and path.endswith('.csv'):
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            if replications == 1:
+                writer.writerow(['model', 'kpi', 'value'])
+                for model, values in kpis.items():
+                    for kpi, value in values.items():
+                        writer.writerow([model, kpi, value])
+            else:
+                stats = list(next(iter(next(iter(kpis.values())).values())))
+                writer.writerow(['model', 'kpi', *stats])
+                for model, values in kpis.items():
+                    for kpi, value in values.items():
+                        writer.writerow([model, kpi, *value.values()])
+        return
+
+    text = json.dumps(_finite(kpis), indent=2)
+    if path is None:
+        print(text)
+    else:
+        with open(path, 'w') as f:
+            f.write(text + '\n')
+
+
+
+def _log(message:str) -> None:
+    print(message, file=sys.stderr, flush=True)
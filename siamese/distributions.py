@@ -1,21 +1,58 @@
 """Submodule for statistical distribution objects."""
 
 from abc import ABC, abstractmethod
+from copy import copy
 from dataclasses import dataclass
+import math
 from numbers import Number
 import random
-from typing import Sequence, Union
+from typing import Optional, Sequence, Union
+
+import numpy as np
 
 
 
 class Distribution(ABC):
-    """Abstract base class for distributions."""
+    """Abstract base class for distributions.
+
+    Values are drawn from the `_random` attribute, which is the `random`
+    module itself unless the distribution is bound to a `random.Random`
+    stream of a seeded simulation.
+
+    """
+
+    _random = random
 
     @abstractmethod
     def generate(self):
         """Generates a value based on the subclass distribution."""
         pass
 
+    @property
+    def expected_value(self) -> Optional[float]:
+        """Mean of the generated values, or `None` if it's unknown."""
+        return None
+
+    def sample(self, size:int) -> np.ndarray:
+        """Generate many values at once.
+
+        Parameters
+        ----------
+        size : int
+            Number of values to be generated.
+
+        Returns
+        -------
+        np.ndarray
+            The generated values.
+
+        """
+        return np.fromiter(
+            (self.generate() for _ in range(size)),
+            dtype = float,
+            count = size
+        )
+
 
 
 @dataclass
@@ -62,26 +99,104 @@ class Beta(Distribution):
 
     def generate(self):
         return (self.max - self.min) \
-            * random.betavariate(self.alpha, self.beta) \
+            * self._random.betavariate(self.alpha, self.beta) \
             + self.min
 
+    @property
+    def expected_value(self) -> float:
+        return self.min + (self.max - self.min) \
+            * self.alpha / (self.alpha + self.beta)
+
 
 
 @dataclass
 class Choice(Distribution):
     """Randomly picks a value from a list of values.
 
+    Weighted picks take constant time, whatever the number of values, through
+    the alias method [1]_.
+
     Parameters
     ----------
     values : Squence[Number]
         A sequence of numbers.
+    weights : Sequence[Number], optional
+        Relative weight of each value. If `None`, every value is equally
+        likely to be picked.
+
+    References
+    ----------
+    .. [1] Vose, M. D. (1991). A linear algorithm for generating random
+       numbers with a given distribution. IEEE Transactions on Software
+       Engineering, 17(9), 972-975.
     
     """
 
     values: Sequence[Number]
+    weights: Optional[Sequence[Number]] = None
+
+    def __post_init__(self):
+        self._build()
+
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        # Parameters changed after construction, such as by a sweep, are
+        # validated and tabled again before the next draw
+        if name in ('values', 'weights'):
+            self.__dict__.pop('_probability', None)
+            self.__dict__.pop('_alias', None)
+
+    def __getattr__(self, name):
+        if name in ('_probability', '_alias'):
+            self._build()
+            return self.__dict__[name]
+        raise AttributeError(name)
+
+    def _build(self):
+        """Validate the parameters and build the alias table."""
+        if len(self.values) == 0:
+            raise ValueError(
+                'The `values` parameter must not be empty.'
+            )
+        if self.weights is not None:
+            if len(self.weights) != len(self.values):
+                raise ValueError(
+                    'The `weights` parameter must have one weight for each value.'
+                )
+            if min(self.weights) < 0 or sum(self.weights) <= 0:
+                raise ValueError(
+                    'The `weights` must be non-negative, with a positive sum.'
+                )
+            probability, alias = _alias_table(self.weights)
+        else:
+            probability = alias = None
+        self.__dict__.update(_probability=probability, _alias=alias)
 
     def generate(self):
-        return random.choice(self.values)
+        if self._alias is None:
+            return self._random.choice(self.values)
+        u = self._random.random() * len(self.values)
+        i = min(int(u), len(self.values) - 1)
+        if u - i < self._probability[i]:
+            return self.values[i]
+        return self.values[self._alias[i]]
+
+    @property
+    def expected_value(self) -> float:
+        if self.weights is None:
+            return sum(self.values) / len(self.values)
+        return sum(v * w for v, w in zip(self.values, self.weights)) \
+            / sum(self.weights)
+
+    def sample(self, size:int) -> np.ndarray:
+        rng = _generator(self._random)
+        values = np.asarray(self.values)
+        if self._alias is None:
+            return values[rng.integers(len(values), size=size)]
+        u = rng.random(size) * len(values)
+        i = np.minimum(u.astype(int), len(values) - 1)
+        keep = u - i < np.asarray(self._probability)[i]
+        return values[np.where(keep, i, np.asarray(self._alias)[i])]
 
 
 
@@ -107,6 +222,94 @@ class Constant(Distribution):
     def generate(self):
         return self.value
 
+    @property
+    def expected_value(self) -> float:
+        return self.value
+
+
+
+@dataclass
+class Empirical(Distribution):
+    """Generate a value based on observed samples.
+
+    Values are drawn in constant time, whatever the number of samples, by
+    inverting the empirical cumulative distribution function:
+    - Without interpolation, each sample is equally likely to be drawn;
+    - With interpolation, values are drawn uniformly between consecutive
+      sorted samples, so any value between the smallest and the biggest
+      sample can be generated.
+
+    Parameters
+    ----------
+    samples : Sequence[Number]
+        Observed values, such as processing times logged by a manufacturing
+        execution system.
+    interpolate : bool, default=False
+        Interpolate linearly between consecutive sorted samples.
+
+    References
+    ----------
+    .. [1] https://en.wikipedia.org/wiki/Empirical_distribution_function
+
+    """
+
+    samples: Sequence[Number]
+    interpolate: bool = False
+
+    def __post_init__(self):
+        self._build()
+
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        # Samples changed after construction, such as by a sweep, are
+        # validated and sorted again before the next draw
+        if name == 'samples':
+            self.__dict__.pop('_sorted', None)
+            self.__dict__.pop('_values', None)
+
+    def __getattr__(self, name):
+        if name in ('_sorted', '_values'):
+            self._build()
+            return self.__dict__[name]
+        raise AttributeError(name)
+
+    def _build(self):
+        """Validate and sort the samples."""
+        values = np.sort(np.asarray(self.samples, dtype=float).ravel())
+        if values.size == 0:
+            raise ValueError(
+                'The `samples` parameter must not be empty.'
+            )
+        if not np.isfinite(values).all():
+            raise ValueError(
+                'The `samples` parameter must only have finite numbers.'
+            )
+        self.__dict__.update(_sorted=values, _values=values.tolist())
+
+    def generate(self):
+        values = self._values
+        if not self.interpolate or len(values) == 1:
+            return self._random.choice(values)
+        position = self._random.random() * (len(values) - 1)
+        i = min(int(position), len(values) - 2)
+        return values[i] + (position - i) * (values[i+1] - values[i])
+
+    @property
+    def expected_value(self) -> float:
+        values = self._sorted
+        if not self.interpolate or len(values) == 1:
+            return float(values.mean())
+        return float((values[1:] + values[:-1]).mean() / 2)
+
+    def sample(self, size:int) -> np.ndarray:
+        rng = _generator(self._random)
+        values = self._sorted
+        if not self.interpolate or len(values) == 1:
+            return values[rng.integers(len(values), size=size)]
+        position = rng.random(size) * (len(values) - 1)
+        i = np.minimum(position.astype(int), len(values) - 2)
+        return values[i] + (position - i) * (values[i+1] - values[i])
+
 
 
 @dataclass
@@ -140,10 +343,14 @@ class Exponential(Distribution):
             )
 
     def generate(self):
-        return random.expovariate(
+        return self._random.expovariate(
             lambd = 1/(self.mean-self.min)
         ) + self.min
 
+    @property
+    def expected_value(self) -> float:
+        return self.mean
+
 
 
 @dataclass
@@ -178,7 +385,11 @@ class Gamma(Distribution):
             )
 
     def generate(self):
-        return random.gammavariate(self.shape, self.scale)
+        return self._random.gammavariate(self.shape, self.scale)
+
+    @property
+    def expected_value(self) -> float:
+        return self.shape * self.scale
 
 
 
@@ -209,11 +420,15 @@ class Normal(Distribution):
             )
 
     def generate(self):
-        return random.normalvariate(
+        return self._random.normalvariate(
             mu = self.mean,
             sigma = self.std
         )
 
+    @property
+    def expected_value(self) -> float:
+        return self.mean
+
 
 
 @dataclass
@@ -258,12 +473,16 @@ class Triangular(Distribution):
             )
 
     def generate(self):
-        return random.triangular(
+        return self._random.triangular(
             low = self.min,
             mode = self.mode,
             high = self.max,
         )
 
+    @property
+    def expected_value(self) -> float:
+        return (self.min + self.mode + self.max) / 3
+
 
 
 @dataclass
@@ -292,11 +511,15 @@ class Uniform(Distribution):
     max: Number = 1
 
     def generate(self):
-        return random.uniform(
+        return self._random.uniform(
             a = self.min,
             b = self.max
         )
 
+    @property
+    def expected_value(self) -> float:
+        return (self.min + self.max) / 2
+
 
 
 @dataclass
@@ -331,11 +554,117 @@ class Weibull(Distribution):
             )
 
     def generate(self):
-        return random.weibullvariate(self.scale, self.shape)
+        return self._random.weibullvariate(self.scale, self.shape)
+
+    @property
+    def expected_value(self) -> float:
+        return self.scale * math.gamma(1 + 1/self.shape)
+
 
 
+def _create_dist(
+        dist:Union[Distribution, Number],
+        stream:Optional[random.Random] = None
+    ) -> Distribution:
+    """Copy of a distribution bound to the random stream of a model.
 
-def _create_dist(dist:Union[Distribution, Number]) -> Distribution:
-    if isinstance(dist, Number):
-        return Constant(dist)
+    Each model draws from its own copy, even of distributions shared by many
+    models, so its draws can be instrumented apart from the others. The copy
+    keeps the configured value in its `_origin` attribute.
+
+    """
+
+    origin = dist
+    if isinstance(dist, Distribution):
+        origin = dist.__dict__.get('_origin', dist)
+    else:
+        dist = Constant(dist)
+    dist = copy(dist)
+    if stream is None:
+        dist.__dict__.pop('_random', None)
+    else:
+        dist._random = stream
+    dist._origin = origin
     return dist
+
+
+
+def _configured(value):
+    """Configured value of a distribution copied by `_create_dist`, unless
+    the copy was changed since."""
+
+    if not isinstance(value, Distribution) or '_origin' not in value.__dict__:
+        return value
+    origin = value._origin
+    if value == (Constant(origin) if isinstance(origin, Number) else origin):
+        return origin
+    return value
+
+
+
+class _Antithetic(random.Random):
+    """Random stream that draws the complement of each value of its seed.
+
+    Every uniform `u` becomes `1 - u`, and every pick among `n` items the
+    mirrored pick, so a simulation seeded with the same seed draws values
+    negatively correlated with the original ones. Vectorized draws are
+    complemented by the generator `_generator` creates from it. Weighted
+    `Choice` picks go through an alias table, which doesn't keep the order of
+    the values, so they aren't negatively correlated.
+
+    """
+
+    def random(self) -> float:
+        u = super().random()
+        return 1.0 - u if u > 0 else 0.0
+
+    def _randbelow(self, n:int) -> int:
+        return n - 1 - super()._randbelow(n)
+
+
+
+def _alias_table(weights:Sequence[Number]) -> tuple:
+    """Probability and alias tables of the alias method."""
+
+    n = len(weights)
+    total = sum(weights)
+    scaled = [w * n / total for w in weights]
+    probability = [1.0] * n
+    alias = list(range(n))
+
+    small = [i for i, p in enumerate(scaled) if p < 1]
+    large = [i for i, p in enumerate(scaled) if p >= 1]
+    while small and large:
+        i = small.pop()
+        j = large.pop()
+        probability[i] = scaled[i]
+        alias[i] = j
+        scaled[j] -= 1 - scaled[i]
+        (small if scaled[j] < 1 else large).append(j)
+
+    return probability, alias
+
+
+
+def _generator(stream) -> np.random.Generator:
+    """NumPy generator seeded by a `random` stream, for vectorized draws."""
+    generator = np.random.default_rng(stream.getrandbits(64))
+    if isinstance(stream, _Antithetic):
+        return _AntitheticGenerator(generator)
+    return generator
+
+
+
+class _AntitheticGenerator:
+    """NumPy generator that draws the complement of each value of another,
+    as `_Antithetic` does."""
+
+    def __init__(self, generator:np.random.Generator):
+        self._generator = generator
+
+    def random(self, size=None):
+        u = self._generator.random(size)
+        return np.where(u > 0, 1.0 - u, 0.0)
+
+    def integers(self, high:int, size=None):
+        return high - 1 - self._generator.integers(high, size=size)
@@ -0,0 +1,60 @@
+"""The entities submodule.
+
+In entity mode, enabled through `Line.simulate(..., entities=True)`, each
+`Source` creates a `Part` record instead of an anonymous entity. Every model
+that takes a part stamps the time it did so, and a `Sink` turns the records it
+receives into lead time statistics, so only the parts in progress are kept in
+memory.
+
+Entity mode is off by default, and throughput-only runs don't create any
+record.
+
+"""
+
+from typing import Optional
+
+
+
+class Part:
+    """Compact record of an entity.
+
+    Attributes
+    ----------
+    id : int
+        Sequential number of the part in its source.
+    source : str
+        Name of the `Source` that created the part.
+    created : float
+        Simulation time when the part was created.
+    stamps : list[tuple[str, float]]
+        Name of each model that took the part and when, in order.
+
+    """
+
+    __slots__ = ('id', 'source', 'created', 'stamps')
+
+    def __init__(self, id:int, source:str, created:float):
+        self.id = id
+        self.source = source
+        self.created = created
+        self.stamps = []
+
+
+    def __getstate__(self) -> tuple:
+        return (self.id, self.source, self.created, self.stamps)
+
+
+    def __setstate__(self, state:tuple) -> None:
+        self.id, self.source, self.created, self.stamps = state
+
+
+    def __repr__(self):
+        return f"Part(id={self.id}, source='{self.source}', created={self.created})"
+
+
+    def time_at(self, model:str) -> Optional[float]:
+        """Time when the part was taken by `model`, if it was."""
+        for name, time in self.stamps:
+            if name == model:
+                return time
+        return None
@@ -0,0 +1,663 @@
+"""The design of experiments submodule.
+
+Functions to sweep the parameters of a `Line` over a design of experiments:
+- `grid` creates a full factorial design;
+- `latin_hypercube` creates a Latin hypercube design;
+- `sweep` simulates every design point, with replications, over a process
+  pool, and collects the KPIs in a columnar `SweepResults` table;
+- `load` reads the rows of a sweep stored in a CSV file;
+- `branch` continues a warmed-up line under every design point, so the
+  warm-up is simulated once for all of them.
+
+Parameters are addressed by dotted paths that start with a model name:
+- `'first_machine.processing_time'`
+- `'buffer1.capacity'`
+- `'first_machine.failure.time_between_failures.mean'`
+
+>>> from siamese.experiments import grid, sweep
+>>> design = grid({
+...     'first_machine.processing_time': [8, 10, 12],
+...     'buffer1.capacity': [5, 10, 20]
+... })
+>>> results = sweep(line, design, time=1000, replications=5, path='sweep.csv')
+>>> results.to_frame()
+
+>>> line.simulate(200, seed=42)
+>>> results = branch(line, design, time=1000)
+
+"""
+
+from concurrent.futures import as_completed, ProcessPoolExecutor
+import csv
+import hashlib
+from itertools import product
+import json
+from numbers import Number
+import os
+from typing import Callable, Optional, Sequence, Union
+
+import numpy as np
+
+from siamese.cache import ResultCache, _canonical
+from siamese.distributions import _create_dist
+
+
+
+def grid(ranges:dict) -> list:
+    """Full factorial design.
+
+    Parameters
+    ----------
+    ranges : dict[str, Sequence]
+        Values of each parameter, by parameter path.
+
+    Returns
+    -------
+    list[dict]
+        One dict of parameter values for each combination of values.
+
+    """
+
+    paths = list(ranges)
+    return [dict(zip(paths, values)) for values in product(*ranges.values())]
+
+
+
+def latin_hypercube(ranges:dict, n:int, seed:Optional[int]=None) -> list:
+    """Latin hypercube design.
+
+    The range of each parameter is split in `n` equally probable strata, and
+    each stratum is sampled exactly once.
+
+    Parameters
+    ----------
+    ranges : dict[str, tuple | Sequence]
+        Range of each parameter, by parameter path. A `(min, max)` tuple
+        defines a continuous range, which is sampled as integers if both
+        bounds are integers. A list defines the possible values of a
+        categorical parameter.
+    n : int
+        Number of design points.
+    seed : int, optional
+        Random state for reproducible designs.
+
+    Returns
+    -------
+    list[dict]
+        One dict of parameter values for each design point.
+
+    """
+
+    if n <= 0:
+        raise ValueError('`n` must be bigger than zero.')
+
+    rng = np.random.default_rng(seed)
+    columns = {
+        path: _scale((rng.permutation(n) + rng.random(n)) / n, bounds) \
+            for path, bounds in ranges.items()
+    }
+    return [{path: columns[path][i] for path in ranges} for i in range(n)]
+
+
+
+class SweepResults:
+    """Columnar table of sweep results.
+
+    Each row holds the design point index, the replication index, the seed,
+    the parameter values and the KPIs of a simulation, as columns named
+    `'model.kpi'`.
+
+    Attributes
+    ----------
+    columns : dict[str, list]
+        Values of each column.
+    parameters : list[str]
+        Names of the parameter columns.
+    controls : list[str]
+        Names of the control variate columns.
+
+    Methods
+    -------
+    append(row)
+        Add a row to the table.
+    to_numpy()
+        Columns as NumPy arrays.
+    to_frame()
+        Table as a pandas DataFrame.
+
+    """
+
+    def __init__(self, parameters:Sequence[str]=(), controls:Sequence[str]=()):
+        self.columns = {}
+        self.parameters = list(parameters)
+        self.controls = list(controls)
+        self._len = 0
+
+
+    def __len__(self):
+        return self._len
+
+
+    def append(self, row:dict) -> None:
+        """Add a row to the table. Missing values are filled with `None`."""
+        for column in row:
+            if column not in self.columns:
+                self.columns[column] = [None] * self._len
+        for column, values in self.columns.items():
+            values.append(row.get(column))
+        self._len += 1
+
+
+    def to_numpy(self) -> dict:
+        """Columns as NumPy arrays."""
+        return {column: np.asarray(values) for column, values in self.columns.items()}
+
+
+    def to_frame(self):
+        """Table as a pandas DataFrame."""
+        try:
+            import pandas as pd
+        except ImportError:
+            raise ImportError('`to_frame` requires pandas to be installed.')
+        return pd.DataFrame(self.columns)
+
+
+    def __repr__(self):
+        return f'<SweepResults: {self._len} rows, {len(self.columns)} columns>'
+
+
+
+def sweep(
+        line,
+        design:Sequence[dict],
+        time:float,
+        replications:int = 1,
+        seed:int = 0,
+        workers:Optional[int] = None,
+        path:Optional[str] = None,
+        callback:Optional[Callable] = None,
+        antithetic:bool = False,
+        controls:bool = False,
+        cache:Optional[ResultCache] = None
+    ) -> SweepResults:
+    """Simulate a line over a design of experiments.
+
+    Every design point is simulated `replications` times. Replication `r` of
+    every point uses the seed `seed + r`, so points are compared under common
+    random numbers.
+
+    Antithetic replications come in pairs: replications `2k` and `2k+1` use
+    the seed `seed + k`, and the second draws the complement of every value
+    drawn by the first.
+
+    Control variates are the observed minus the expected mean processing time
+    of each `Source` and `Machine` whose distribution has a known mean, in
+    columns named `'model.processing_time_deviation'`. Their expected value is
+    zero, so `ReplicationReport` can subtract from each KPI the part of its
+    error they explain.
+
+    Parameters
+    ----------
+    line : Line
+        Base line. Its models configuration is copied for each simulation.
+    design : Sequence[dict]
+        Parameter values of each design point, by parameter path.
+    time : float
+        Simulation horizon.
+    replications : int, default=1
+        Number of simulations of each design point.
+    seed : int, default=0
+        Seed of the first replication.
+    workers : int, optional
+        Number of worker processes. If `None`, the number of CPUs is used. If
+        1, simulations run in the current process.
+    path : str, optional
+        CSV file where each row is appended as soon as it is ready. If the
+        file already exists, rows of the simulations it holds are loaded
+        instead of simulated, so an interrupted sweep can be resumed. The
+        settings of the sweep are kept alongside, in a `.settings.json`
+        file, and a file stored with another line, time, seed or design is
+        rejected. Points may be appended to the design of a resumed sweep,
+        and the file gets a column for each parameter they add.
+    callback : Callable, optional
+        Function called with each new row as soon as it is ready.
+    antithetic : bool, default=False
+        Simulate antithetic pairs of replications. `replications` must be
+        even.
+    controls : bool, default=False
+        Add the control variate columns to each row.
+    cache : ResultCache, optional
+        Cache of simulation results, shared by every worker process, so
+        scenarios simulated by previous sweeps are loaded instead.
+
+    Returns
+    -------
+    SweepResults
+        The rows, in order of completion. If the sweep is interrupted by a
+        `KeyboardInterrupt`, the rows completed so far are returned.
+
+    """
+
+    if replications <= 0:
+        raise ValueError('`replications` must be bigger than zero.')
+
+    if antithetic and replications % 2:
+        raise ValueError('`replications` must be even for antithetic pairs.')
+
+    probe = line.copy()
+    for parameters in design:
+        for parameter, value in parameters.items():
+            _set_parameter(probe, parameter, value)
+
+    results = SweepResults(
+        parameters = dict.fromkeys(p for point in design for p in point),
+        controls = [_control(model) for model in line._models \
+            if _known_mean(model)] if controls else ()
+    )
+    done = set()
+    if path is not None:
+        settings = _settings(line, design, time, seed, antithetic, controls)
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            _check_settings(path, settings)
+            for row in _read(path):
+                results.append(row)
+                done.add((row['point'], row['replication']))
+        with open(_settings_path(path), 'w') as f:
+            json.dump(settings, f)
+
+    tasks = [
+        (point, replication) \
+            for point in range(len(design)) \
+                for replication in range(replications) \
+                    if (point, replication) not in done
+    ]
+
+    writer = _Writer(path) if path is not None else None
+
+    def arguments(point, replication):
+        if antithetic:
+            return (line, design[point], time, seed + replication//2, point,
+                replication, bool(replication % 2), controls, cache)
+        return (line, design[point], time, seed + replication, point,
+            replication, False, controls, cache)
+
+    def collect(row):
+        results.append(row)
+        if writer is not None:
+            writer.write(row)
+        if callback is not None:
+            callback(row)
+
+    try:
+        if workers == 1:
+            for point, replication in tasks:
+                collect(_run(*arguments(point, replication)))
+        else:
+            with ProcessPoolExecutor(workers) as executor:
+                futures = [
+                    executor.submit(_run, *arguments(point, replication)) \
+                        for point, replication in tasks
+                ]
+                try:
+                    for future in as_completed(futures):
+                        collect(future.result())
+                except KeyboardInterrupt:
+                    for future in futures:
+                        future.cancel()
+                    raise
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return results
+
+
+
+def load(path:str) -> SweepResults:
+    """Load the rows of a sweep stored in a CSV file.
+
+    Parameters
+    ----------
+    path : str
+        CSV file written by `sweep`.
+
+    Returns
+    -------
+    SweepResults
+        The stored rows.
+
+    """
+
+    results = SweepResults()
+    for row in _read(path):
+        results.append(row)
+    return results
+
+
+
+def branch(
+        line,
+        design:Sequence[dict],
+        time:float,
+        workers:Optional[int] = None,
+        callback:Optional[Callable] = None
+    ) -> SweepResults:
+    """Continue a started simulation under each design point.
+
+    Each design point is simulated by a fork of the line, as created by
+    `Line.fork`, from its current time until `time`. The forks share the
+    state of the line, so its warm-up is simulated once for the whole design,
+    and they draw the same values, so points are compared under common random
+    numbers. The line itself is not simulated further.
+
+    The KPIs of each fork cover the whole simulation, warm-up included.
+
+    Parameters
+    ----------
+    line : Line
+        Base line, whose simulation has started.
+    design : Sequence[dict]
+        Parameter values of each design point, by parameter path.
+    time : float
+        Simulation horizon of the forks.
+    workers : int, optional
+        Number of worker processes. If `None`, the number of CPUs is used. If
+        1, forks run in the current process. Each worker receives the state
+        of the line once.
+    callback : Callable, optional
+        Function called with each new row as soon as it is ready.
+
+    Returns
+    -------
+    SweepResults
+        The rows, in order of completion. If it is interrupted by a
+        `KeyboardInterrupt`, the rows completed so far are returned.
+
+    """
+
+    if not line._started:
+        raise RuntimeError('The simulation has not started yet.')
+
+    if time <= line.now:
+        raise ValueError(f'`time` must be bigger than the current time {line.now}.')
+
+    probe = line.copy()
+    for parameters in design:
+        for parameter, value in parameters.items():
+            _set_parameter(probe, parameter, value)
+
+    results = SweepResults(dict.fromkeys(p for point in design for p in point))
+
+    def collect(row):
+        results.append(row)
+        if callback is not None:
+            callback(row)
+
+    try:
+        if workers == 1:
+            for point, parameters in enumerate(design):
+                collect(_run_branch(line, parameters, time, point))
+        else:
+            with ProcessPoolExecutor(workers, initializer=_set_base,
+                    initargs=(line,)) as executor:
+                futures = [
+                    executor.submit(_run_branch, None, parameters, time, point) \
+                        for point, parameters in enumerate(design)
+                ]
+                try:
+                    for future in as_completed(futures):
+                        collect(future.result())
+                except KeyboardInterrupt:
+                    for future in futures:
+                        future.cancel()
+                    raise
+    except KeyboardInterrupt:
+        pass
+
+    return results
+
+
+
+class _Writer:
+    """Appends rows to a CSV file, flushing each one."""
+
+    def __init__(self, path:str):
+        self.path = path
+        self.file = None
+        self.writer = None
+
+    def write(self, row:dict) -> None:
+        if self.writer is None:
+            exists = os.path.exists(self.path) and os.path.getsize(self.path) > 0
+            self.file = open(self.path, 'a', newline='')
+            if exists:
+                with open(self.path, newline='') as f:
+                    fieldnames = next(csv.reader(f))
+            else:
+                fieldnames = list(row)
+            self.writer = csv.DictWriter(self.file, fieldnames)
+            if not exists:
+                self.writer.writeheader()
+        extra = [column for column in row if column not in self.writer.fieldnames]
+        if extra:
+            self._widen(self.writer.fieldnames + extra)
+        self.writer.writerow(row)
+        self.file.flush()
+
+    def _widen(self, fieldnames:list) -> None:
+        """Rewrite the file with more columns, left empty in its rows."""
+        self.file.close()
+        with open(self.path, newline='') as f:
+            rows = list(csv.DictReader(f))
+        temporary = f'{self.path}.tmp'
+        with open(temporary, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames)
+            writer.writeheader()
+            writer.writerows(rows)
+        os.replace(temporary, self.path)
+        self.file = open(self.path, 'a', newline='')
+        self.writer = csv.DictWriter(self.file, fieldnames)
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+
+
+
+def _run(
+        line,
+        parameters:dict,
+        time:float,
+        seed:int,
+        point:int,
+        replication:int,
+        antithetic:bool = False,
+        controls:bool = False,
+        cache:Optional[ResultCache] = None,
+        progress:Optional[Callable] = None,
+        progress_interval:Optional[float] = None
+    ) -> dict:
+    """Simulate a design point and return its row."""
+
+    line = line.copy()
+    for parameter, value in parameters.items():
+        _set_parameter(line, parameter, value)
+    line.simulate(time, seed=seed, antithetic=antithetic, cache=cache,
+        progress=progress, progress_interval=progress_interval)
+
+    row = {'point': point, 'replication': replication, 'seed': seed}
+    row.update(parameters)
+    for model, kpis in line.report.to_dict().items():
+        for kpi, value in kpis.items():
+            row[f'{model}.{kpi}'] = value
+
+    if controls:
+        for model in line._models:
+            if _known_mean(model):
+                row[_control(model)] = _deviation(model)
+
+    return row
+
+
+
+# Base line of the forks simulated by a worker process
+_base = None
+
+
+
+def _set_base(line) -> None:
+    global _base
+    _base = line
+
+
+
+def _run_branch(line, parameters:dict, time:float, point:int) -> dict:
+    """Simulate a fork of the line, or of the worker base line, and return its row."""
+
+    line = (_base if line is None else line).fork(parameters)
+    line.simulate(time)
+
+    row = {'point': point}
+    row.update(parameters)
+    for model, kpis in line.report.to_dict().items():
+        for kpi, value in kpis.items():
+            row[f'{model}.{kpi}'] = value
+    return row
+
+
+
+def _control(model) -> str:
+    """Name of the control variate column of a model."""
+    return f'{model.name}.processing_time_deviation'
+
+
+
+def _known_mean(model) -> bool:
+    """Whether a model has a processing time of known mean, which makes a
+    control variate."""
+    if not hasattr(model, 'processing_time'):
+        return False
+    return _create_dist(model.processing_time).expected_value is not None
+
+
+
+def _deviation(model) -> Optional[float]:
+    """Observed minus expected mean processing time of a simulated model."""
+    times = model._processing_tracking
+    if not times:
+        return None
+    expected = model.processing_time.expected_value
+    if expected is None:
+        return None
+    return float(np.mean(times)) - expected
+
+
+
+def _set_parameter(line, parameter:str, value) -> None:
+    """Set a model attribute of a line through its dotted path."""
+
+    name, *attributes = parameter.split('.')
+    if not attributes:
+        raise ValueError(f"Parameter '{parameter}' must be a dotted path, like 'model.attribute'.")
+
+    obj = line.__dict__.get(name)
+    if obj is None:
+        raise ValueError(f"There is no model named '{name}' in the line.")
+    for attribute in attributes[:-1]:
+        obj = getattr(obj, attribute)
+    if not hasattr(obj, attributes[-1]):
+        raise ValueError(f"Parameter '{parameter}' does not exist.")
+    setattr(obj, attributes[-1], value)
+
+
+
+def _scale(u:np.ndarray, bounds:Union[tuple, Sequence]) -> list:
+    """Map uniform values in [0, 1) to the range of a parameter."""
+
+    if isinstance(bounds, tuple):
+        low, high = bounds
+        if isinstance(low, int) and isinstance(high, int):
+            values = np.floor(low + u*(high - low + 1)).astype(int)
+            return [int(v) for v in np.minimum(values, high)]
+        return [float(v) for v in low + u*(high - low)]
+    return [bounds[i] for i in (np.asarray(u)*len(bounds)).astype(int)]
+
+
+
+def _read(path:str):
+    """Rows of a CSV file, with numbers parsed."""
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            yield {column: _parse(value) for column, value in row.items()}
+
+
+
+def _settings(
+        line,
+        design:Sequence[dict],
+        time:float,
+        seed:int,
+        antithetic:bool,
+        controls:bool
+    ) -> dict:
+    """Settings a stored sweep must match to be resumed."""
+    return {
+        'line': _hash([_canonical(model) for model in line._models]),
+        'design': [_hash(_canonical(point)) for point in design],
+        'time': _canonical(time),
+        'seed': seed,
+        'antithetic': antithetic,
+        'controls': controls
+    }
+
+
+
+def _check_settings(path:str, settings:dict) -> None:
+    """Reject a stored sweep whose settings differ from `settings`."""
+
+    try:
+        with open(_settings_path(path)) as f:
+            stored = json.load(f)
+    except (OSError, ValueError):
+        raise ValueError(
+            f"The settings of the sweep stored in '{path}' are missing, so it "
+            'can\'t be resumed. Use another `path`, or remove the file.'
+        )
+
+    differences = [
+        name for name in ('line', 'time', 'seed', 'antithetic', 'controls') \
+            if stored.get(name) != settings[name]
+    ]
+    stored_design = stored.get('design', [])
+    if stored_design != settings['design'][:len(stored_design)]:
+        differences.append('design')
+    if differences:
+        raise ValueError(
+            f"The sweep stored in '{path}' has a different {', '.join(differences)}. "
+            'Use another `path`, or remove the file.'
+        )
+
+
+
+def _settings_path(path:str) -> str:
+    return f'{path}.settings.json'
+
+
+
+def _hash(obj) -> str:
+    return hashlib.sha256(repr(obj).encode()).hexdigest()
+
+
+
+def _parse(value:str) -> Union[Number, str, None]:
+    # Missing values are written as empty cells
+    if value == '':
+        return None
+    for parser in (int, float):
+        try:
+            return parser(value)
+        except ValueError:
+            pass
+    return value
@@ -0,0 +1,437 @@
+"""The distribution fitting submodule.
+
+Functions that fit `Distribution` objects to observed values, such as the
+processing times or the times between failures logged by a manufacturing
+execution system:
+- `fit` fits every candidate family to a sample by maximum likelihood, and
+  ranks the fitted distributions by their Akaike information criterion;
+- `fit_many` fits the samples of many models over a process pool.
+
+Samples can be arrays, memory-mapped arrays or paths to `.npy` files, which
+are memory-mapped. They are read in chunks, so their size is only bounded by
+the disk: each family is fitted from sufficient statistics accumulated over a
+few passes, with vectorized NumPy reductions.
+
+>>> from siamese.fitting import fit, fit_many
+>>> fit(processing_times).best
+Gamma(shape=4.02, scale=2.49)
+>>> results = fit_many({'first_machine': 'logs/first_machine.npy', ...})
+>>> line.first_machine.processing_time = results['first_machine'].best
+
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import math
+from typing import Optional, Sequence, Union
+
+import numpy as np
+
+from siamese.distributions import (
+    Beta,
+    Distribution,
+    Exponential,
+    Gamma,
+    Triangular,
+    Weibull
+)
+
+
+
+# Candidate families, by default
+FAMILIES = (Exponential, Gamma, Weibull, Beta, Triangular)
+
+# Number of values read at once
+_CHUNK_SIZE = 1_000_000
+
+# Newton iterations of the numerical estimators
+_ITERATIONS = 100
+_TOLERANCE = 1e-10
+
+
+
+class FitResults:
+    """Distributions fitted to a sample, ranked by AIC.
+
+    The Akaike information criterion is `2k - 2L`, where `k` is the number of
+    parameters of the distribution and `L` is its log-likelihood. The lower,
+    the better.
+
+    Attributes
+    ----------
+    n : int
+        Number of observations.
+    distributions : list[Distribution]
+        Fitted distributions, from best to worst.
+    log_likelihood : list[float]
+        Log-likelihood of each fitted distribution.
+    aic : list[float]
+        Akaike information criterion of each fitted distribution.
+
+    Properties
+    ----------
+    best : Distribution
+        Fitted distribution with the lowest AIC.
+
+    """
+
+    def __init__(self, n:int, distributions:list, log_likelihood:list, parameters:list):
+        aic = [2*k - 2*ll for ll, k in zip(log_likelihood, parameters)]
+        order = sorted(range(len(aic)), key=lambda i: aic[i])
+        self.n = n
+        self.distributions = [distributions[i] for i in order]
+        self.log_likelihood = [log_likelihood[i] for i in order]
+        self.aic = [aic[i] for i in order]
+
+
+    @property
+    def best(self) -> Distribution:
+        """Fitted distribution with the lowest AIC."""
+        return self.distributions[0]
+
+
+    def __str__(self):
+        width = max(len(repr(d)) for d in self.distributions)
+        lines = [
+            f'Distributions fitted to {self.n:,} observations',
+            f"{'Distribution':<{width}}  {'Log-likelihood':>16}  {'AIC':>16}",
+            '-' * (width + 36)
+        ]
+        for dist, ll, aic in zip(self.distributions, self.log_likelihood, self.aic):
+            lines.append(f'{dist!r:<{width}}  {ll:>16.4f}  {aic:>16.4f}')
+        return '\n'.join(lines)
+
+
+    def __repr__(self):
+        return self.__str__()
+
+
+
+def fit(
+        data:Union[np.ndarray, Sequence[float], str],
+        families:Sequence[type] = FAMILIES,
+        chunk_size:int = _CHUNK_SIZE
+    ) -> FitResults:
+    """Fit candidate distributions to a sample.
+
+    Non-finite values are ignored. Families that can't describe the sample,
+    such as an `Exponential` for a sample with negative values, or that give
+    some of its values a null density, are skipped.
+
+    `Exponential`, `Gamma` and `Weibull` distributions are fitted with no
+    location parameter. `Beta` and `Triangular` distributions are bounded by
+    the sample range, widened by the mean spacing of the sorted values on
+    each side, but never below zero for non-negative samples. The mode of
+    the `Triangular` distribution is estimated by the method of moments.
+
+    Parameters
+    ----------
+    data : np.ndarray | Sequence[float] | str
+        Observed values, as an array, a memory-mapped array or the path to a
+        `.npy` file.
+    families : Sequence[type], default=FAMILIES
+        Candidate `Distribution` classes, among `Exponential`, `Gamma`,
+        `Weibull`, `Beta` and `Triangular`.
+    chunk_size : int, default=1_000_000
+        Number of values read at once.
+
+    Returns
+    -------
+    FitResults
+        The fitted distributions, ranked by AIC.
+
+    """
+
+    for family in families:
+        if family not in _ESTIMATORS:
+            raise ValueError(f"Can't fit <{getattr(family, '__name__', family)}> distributions.")
+
+    if isinstance(data, str):
+        data = np.load(data, mmap_mode='r')
+    else:
+        data = np.asarray(data)
+    data = data.reshape(-1)
+
+    stats = _Stats(data, chunk_size)
+    if stats.n < 2:
+        raise ValueError('The sample must have at least two finite values.')
+
+    distributions = []
+    log_likelihood = []
+    parameters = []
+    for family in families:
+        estimate = _ESTIMATORS[family](stats)
+        if estimate is not None and math.isfinite(estimate[1]):
+            distributions.append(estimate[0])
+            log_likelihood.append(estimate[1])
+            parameters.append(estimate[2])
+
+    if not distributions:
+        raise ValueError('No candidate family can describe the sample.')
+
+    return FitResults(stats.n, distributions, log_likelihood, parameters)
+
+
+
+def fit_many(
+        data:dict,
+        families:Sequence[type] = FAMILIES,
+        chunk_size:int = _CHUNK_SIZE,
+        workers:Optional[int] = None
+    ) -> dict:
+    """Fit candidate distributions to many samples in parallel.
+
+    Parameters
+    ----------
+    data : dict[str, np.ndarray | Sequence[float] | str]
+        Observed values of each sample, by name, as in `fit`. Paths are
+        opened by the worker processes, so files aren't copied between them.
+    families : Sequence[type], default=FAMILIES
+        Candidate `Distribution` classes.
+    chunk_size : int, default=1_000_000
+        Number of values read at once.
+    workers : int, optional
+        Number of worker processes. If `None`, the number of CPUs is used. If
+        1, samples are fitted in the current process.
+
+    Returns
+    -------
+    dict[str, FitResults]
+        The fitted distributions of each sample, by name.
+
+    """
+
+    if workers == 1:
+        return {name: fit(values, families, chunk_size) for name, values in data.items()}
+
+    with ProcessPoolExecutor(workers) as executor:
+        futures = {
+            name: executor.submit(fit, values, families, chunk_size) \
+                for name, values in data.items()
+        }
+        return {name: future.result() for name, future in futures.items()}
+
+
+
+class _Stats:
+    """Sufficient statistics of a sample, accumulated over its chunks."""
+
+    def __init__(self, data:np.ndarray, chunk_size:int):
+        self.data = data
+        self.chunk_size = chunk_size
+        self.n = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.positive = True
+
+        # Centered on the first chunk mean, for an accurate variance
+        self._shift = None
+        shifted = 0.0
+        shifted_squares = 0.0
+        for x in self.chunks():
+            if x.size == 0:
+                continue
+            if self._shift is None:
+                self._shift = float(x.mean())
+            d = x - self._shift
+            self.n += x.size
+            self.sum += float(x.sum())
+            shifted += float(d.sum())
+            shifted_squares += float(d @ d)
+            self.min = min(self.min, float(x.min()))
+            self.max = max(self.max, float(x.max()))
+        if self.n < 2:
+            return
+
+        self.mean = self.sum / self.n
+        self.variance = max(shifted_squares/self.n - (shifted/self.n)**2, 0.0)
+        self.positive = self.min > 0
+
+        # Logarithms of positive samples
+        if self.positive:
+            self.log_sum, self.log_squares = self.reduce(
+                lambda x: (np.log(x).sum(), np.square(np.log(x)).sum())
+            )
+            self.log_mean = self.log_sum / self.n
+            self.log_variance = max(self.log_squares/self.n - self.log_mean**2, 0.0)
+
+        # Support of bounded families, which stays non-negative for
+        # non-negative samples, such as times
+        spacing = (self.max - self.min) / (self.n - 1)
+        self.low = self.min - spacing
+        if self.min >= 0:
+            self.low = max(self.low, 0.0)
+        self.high = self.max + spacing
+
+
+    def chunks(self):
+        """Finite values of the sample, chunk by chunk."""
+        for start in range(0, self.data.size, self.chunk_size):
+            x = np.asarray(self.data[start:start+self.chunk_size], dtype=float)
+            yield x[np.isfinite(x)]
+
+
+    def reduce(self, function) -> tuple:
+        """Sum the values `function` returns for each chunk."""
+        totals = None
+        for x in self.chunks():
+            values = function(x)
+            totals = values if totals is None \
+                else tuple(t + v for t, v in zip(totals, values))
+        return tuple(float(t) for t in totals)
+
+
+
+def _exponential(stats:_Stats) -> Optional[tuple]:
+    if not stats.positive:
+        return None
+    mean = stats.mean
+    return Exponential(mean=mean), -stats.n*math.log(mean) - stats.n, 1
+
+
+
+def _gamma(stats:_Stats) -> Optional[tuple]:
+    if not stats.positive:
+        return None
+    s = math.log(stats.mean) - stats.log_mean
+    if s <= 0:
+        return None
+
+    # Minka's approximation, refined by Newton's method
+    shape = (3 - s + math.sqrt((s - 3)**2 + 24*s)) / (12*s)
+    for _ in range(_ITERATIONS):
+        step = (math.log(shape) - _digamma(shape) - s) / (1/shape - _trigamma(shape))
+        shape = max(shape - step, shape / 10)
+        if abs(step) < _TOLERANCE * shape:
+            break
+
+    scale = stats.mean / shape
+    n = stats.n
+    ll = (shape - 1)*stats.log_sum - stats.sum/scale \
+        - n*shape*math.log(scale) - n*math.lgamma(shape)
+    return Gamma(shape=shape, scale=scale), ll, 2
+
+
+
+def _weibull(stats:_Stats) -> Optional[tuple]:
+    if not stats.positive or stats.log_variance == 0:
+        return None
+
+    # Values are scaled by the maximum, so powers don't overflow
+    log_max = math.log(stats.max)
+    log_mean = stats.log_mean - log_max
+    shape = math.pi / math.sqrt(6 * stats.log_variance)
+
+    def sums(k):
+        def function(x):
+            y = np.log(x) - log_max
+            p = np.exp(k*y)
+            return p.sum(), (p*y).sum(), (p*y*y).sum()
+        return stats.reduce(function)
+
+    for _ in range(_ITERATIONS):
+        a, b, c = sums(shape)
+        f = b/a - 1/shape - log_mean
+        df = (c*a - b*b)/(a*a) + 1/shape**2
+        step = f / df
+        shape = max(shape - step, shape / 10)
+        if abs(step) < _TOLERANCE * shape:
+            break
+
+    a = sums(shape)[0]
+    scale = stats.max * (a / stats.n)**(1/shape)
+    n = stats.n
+    ll = n*math.log(shape) - n*shape*math.log(scale) \
+        + (shape - 1)*stats.log_sum - n
+    return Weibull(shape=shape, scale=scale), ll, 2
+
+
+
+def _beta(stats:_Stats) -> Optional[tuple]:
+    if stats.variance == 0 or stats.low == stats.min:
+        return None
+    low, width = stats.low, stats.high - stats.low
+    g1, g2 = stats.reduce(lambda x: (
+        np.log((x - low) / width).sum(),
+        np.log1p(-(x - low) / width).sum()
+    ))
+    g1 /= stats.n
+    g2 /= stats.n
+
+    # Method of moments, refined by Newton's method
+    m = (stats.mean - low) / width
+    v = stats.variance / width**2
+    common = m*(1 - m)/v - 1
+    alpha, beta = m*common, (1 - m)*common
+    for _ in range(_ITERATIONS):
+        total = _digamma(alpha + beta)
+        f1 = _digamma(alpha) - total - g1
+        f2 = _digamma(beta) - total - g2
+        t = _trigamma(alpha + beta)
+        j11, j22, j12 = _trigamma(alpha) - t, _trigamma(beta) - t, -t
+        det = j11*j22 - j12*j12
+        step_a = (f1*j22 - f2*j12) / det
+        step_b = (f2*j11 - f1*j12) / det
+        alpha = max(alpha - step_a, alpha / 10)
+        beta = max(beta - step_b, beta / 10)
+        if abs(step_a) < _TOLERANCE*alpha and abs(step_b) < _TOLERANCE*beta:
+            break
+
+    n = stats.n
+    log_beta = math.lgamma(alpha) + math.lgamma(beta) - math.lgamma(alpha + beta)
+    ll = (alpha - 1)*g1*n + (beta - 1)*g2*n - n*log_beta - n*math.log(width)
+    return Beta(alpha=alpha, beta=beta, max=stats.high, min=low), ll, 4
+
+
+
+def _triangular(stats:_Stats) -> Optional[tuple]:
+    if stats.variance == 0:
+        return None
+    low, high = stats.low, stats.high
+    mode = min(max(3*stats.mean - low - high, low), high)
+
+    def function(x):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            density = np.where(
+                x < mode,
+                2*(x - low) / ((high - low)*(mode - low)),
+                2*(high - x) / ((high - low)*(high - mode))
+            )
+            return (np.log(density).sum(),)
+
+    ll, = stats.reduce(function)
+    return Triangular(min=low, mode=mode, max=high), ll, 3
+
+
+
+_ESTIMATORS = {
+    Exponential: _exponential,
+    Gamma: _gamma,
+    Weibull: _weibull,
+    Beta: _beta,
+    Triangular: _triangular
+}
+
+
+
+def _digamma(x:float) -> float:
+    """Digamma function, through its asymptotic series."""
+    result = 0.0
+    while x < 6:
+        result -= 1/x
+        x += 1
+    x2 = 1 / (x*x)
+    return result + math.log(x) - 0.5/x \
+        - x2*(1/12 - x2*(1/120 - x2*(1/252 - x2*(1/240 - x2/132))))
+
+
+
+def _trigamma(x:float) -> float:
+    """Trigamma function, through its asymptotic series."""
+    result = 0.0
+    while x < 6:
+        result += 1/(x*x)
+        x += 1
+    x2 = 1 / (x*x)
+    return result + 1/x + x2/2 \
+        + x2/x*(1/6 - x2*(1/30 - x2*(1/42 - x2/30)))
@@ -0,0 +1,430 @@
+"""The metamodel submodule.
+
+`Metamodel` is a Gaussian process regression of KPIs over the parameters of a
+`Line`, trained on sweep results [1]_. It predicts the KPIs of configurations
+that were never simulated, with their uncertainty, in a fraction of the time
+of a simulation, and suggests which configurations to simulate next.
+
+Rows are added incrementally, as simulations complete, by extending the
+Cholesky factor of the covariance matrix instead of computing it again. The
+kernel hyperparameters, and the scaling of the parameters and KPIs, are tuned
+when the first rows arrive, again whenever the number of rows doubles, and
+whenever `fit` is called.
+
+Parameters are addressed by dotted paths, as in the `experiments` submodule,
+and must be numeric.
+
+>>> from siamese.experiments import latin_hypercube, load, sweep
+>>> from siamese.metamodel import Metamodel
+>>> metamodel = Metamodel(
+...     parameters = ['first_machine.processing_time', 'buffer1.capacity'],
+...     outputs = ['last_machine.items_processed', 'first_machine.time_blocked']
+... )
+>>> metamodel.update(load('sweep.csv'))
+>>> metamodel.predict([{'first_machine.processing_time': 9.5, 'buffer1.capacity': 12}])
+
+>>> candidates = latin_hypercube({...}, n=1000)
+>>> design = metamodel.suggest(candidates, n=8)
+>>> sweep(line, design, time=1000, callback=metamodel.update)
+
+References
+----------
+.. [1] Rasmussen, C. E. and Williams, C. K. I. (2006). Gaussian Processes for
+   Machine Learning. MIT Press.
+
+"""
+
+from copy import deepcopy
+import math
+from numbers import Number
+from typing import Iterable, Optional, Sequence, Union
+
+import numpy as np
+
+
+
+# Rows used to tune the kernel hyperparameters, at most
+_MAX_TUNING_ROWS = 500
+
+# Candidate length scales, for parameters scaled to [0, 1], and noise
+# variances, for standardized KPIs
+_LENGTH_SCALES = np.geomspace(0.05, 2, 9)
+_NOISES = np.array([1e-4, 1e-3, 1e-2, 0.05, 0.2, 0.5])
+
+
+
+class Metamodel:
+    """Gaussian process regression of KPIs over line parameters.
+
+    Each KPI has its own squared exponential kernel, over the parameters
+    scaled to the range of the rows seen when it was tuned, and its own noise
+    variance, which captures the variability between replications.
+
+    Parameters
+    ----------
+    parameters : Sequence[str]
+        Parameter paths, as sweep columns.
+    outputs : Sequence[str]
+        KPI columns to be predicted.
+    length_scale : float, optional
+        Kernel length scale, in units of the scaled parameters. If `None`, it
+        is tuned by maximum marginal likelihood.
+    noise : float, optional
+        Noise variance, in units of the variance of the KPIs. If `None`, it
+        is tuned by maximum marginal likelihood.
+
+    Attributes
+    ----------
+    parameters : list[str]
+        Parameter paths.
+    outputs : list[str]
+        KPI columns.
+    hyperparameters : dict[str, tuple]
+        Length scale and noise variance of each KPI.
+
+    Methods
+    -------
+    update(rows)
+        Add simulated rows.
+    fit()
+        Tune the hyperparameters again, on every row.
+    predict(design)
+        Predictive mean and standard deviation of each KPI.
+    suggest(candidates, n=1, output=None, maximize=True)
+        Candidates whose simulation is most informative.
+
+    """
+
+    def __init__(
+            self,
+            parameters:Sequence[str],
+            outputs:Sequence[str],
+            length_scale:Optional[float] = None,
+            noise:Optional[float] = None
+        ):
+
+        if not parameters or not outputs:
+            raise ValueError('`parameters` and `outputs` must not be empty.')
+
+        self.parameters = list(parameters)
+        self.outputs = list(outputs)
+        self.length_scale = length_scale
+        self.noise = noise
+        self._processes = {output: _Process() for output in self.outputs}
+
+
+    def __len__(self):
+        return max(len(process) for process in self._processes.values())
+
+
+    @property
+    def hyperparameters(self) -> dict:
+        return {
+            output: (process.length_scale, process.noise) \
+                for output, process in self._processes.items()
+        }
+
+
+    def update(self, rows:Union[dict, Iterable[dict]]) -> None:
+        """Add simulated rows.
+
+        KPIs missing from a row, or not finite, are ignored. It can be used
+        as the `callback` of a sweep, one row at a time: the hyperparameters
+        are tuned again, on every row, whenever the number of rows of a KPI
+        doubles since it was last tuned.
+
+        Parameters
+        ----------
+        rows : dict | SweepResults | Iterable[dict]
+            A row, a sweep results table or rows.
+
+        """
+
+        x = []
+        y = []
+        for row in _rows(rows):
+            x.append(self._encode(row))
+            y.append([_value(row.get(output)) for output in self.outputs])
+        if not x:
+            return
+
+        x = np.array(x)
+        y = np.array(y)
+        for j, process in enumerate(self._processes.values()):
+            valid = np.isfinite(y[:, j])
+            if not valid.any():
+                continue
+            process.update(x[valid], y[valid, j], self.length_scale, self.noise)
+
+
+    def fit(self) -> None:
+        """Tune the hyperparameters again, on every row added so far."""
+        for process in self._processes.values():
+            if len(process):
+                process.fit(process.x, process.y, self.length_scale, self.noise)
+
+
+    def predict(self, design:Sequence[dict]) -> dict:
+        """Predictive mean and standard deviation of each KPI.
+
+        The standard deviation is the uncertainty of the expected KPI, not of
+        the KPI of a single simulation, so it tends to zero where many
+        simulations were run. Every KPI must have rows first.
+
+        Parameters
+        ----------
+        design : Sequence[dict]
+            Parameter values of each configuration, by parameter path.
+
+        Returns
+        -------
+        dict[str, tuple[np.ndarray, np.ndarray]]
+            Mean and standard deviation of each KPI, with one value per
+            configuration.
+
+        """
+
+        empty = [output for output, process in self._processes.items() if len(process) == 0]
+        if empty:
+            raise ValueError(f'The metamodel has no rows of the KPIs {empty}. Update it first.')
+
+        x = np.array([self._encode(point) for point in design]).reshape(-1, len(self.parameters))
+        return {
+            output: process.predict(x) \
+                for output, process in self._processes.items()
+        }
+
+
+    def suggest(
+            self,
+            candidates:Sequence[dict],
+            n:int = 1,
+            output:Optional[str] = None,
+            maximize:bool = True
+        ) -> list:
+        """Candidates whose simulation is most informative.
+
+        Without an `output`, candidates are chosen by their uncertainty, summed
+        over every KPI in units of its standard deviation, to explore the
+        parameter space. With an `output`, they are chosen by their expected
+        improvement over the best prediction at the simulated rows, to find
+        its optimum.
+
+        Each chosen candidate is added as if simulated with its predicted
+        value, which only lowers the uncertainty around it, so the next ones
+        are chosen apart from it.
+
+        Parameters
+        ----------
+        candidates : Sequence[dict]
+            Parameter values of each candidate configuration.
+        n : int, default=1
+            Number of configurations to choose.
+        output : str, optional
+            KPI to be optimized.
+        maximize : bool, default=True
+            Whether the `output` is to be maximized, or minimized.
+
+        Returns
+        -------
+        list[dict]
+            Chosen candidates, in order of choice.
+
+        """
+
+        if output is not None and output not in self._processes:
+            raise ValueError(f"KPI '{output}' is not an output of the metamodel.")
+        if any(len(process) == 0 for process in self._processes.values()):
+            raise RuntimeError('The metamodel must be updated with rows of every KPI first.')
+
+        candidates = list(candidates)
+        x = np.array([self._encode(point) for point in candidates]).reshape(-1, len(self.parameters))
+        sign = 1 if maximize else -1
+        processes = deepcopy(self._processes)
+
+        chosen = []
+        available = np.ones(len(candidates), dtype=bool)
+        for _ in range(min(n, len(candidates))):
+            if output is None:
+                score = sum(
+                    process.predict(x, standardized=True)[1] \
+                        for process in processes.values()
+                )
+            else:
+                process = processes[output]
+                mean, std = process.predict(x)
+                best = np.max(sign * process.predict(process.x)[0])
+                score = _expected_improvement(sign*mean, std, best)
+
+            score = np.where(available, score, -np.inf)
+            i = int(np.argmax(score))
+            chosen.append(candidates[i])
+            available[i] = False
+            for process in processes.values():
+                process.add(x[i:i+1], process.predict(x[i:i+1])[0])
+
+        return chosen
+
+
+    def _encode(self, point:dict) -> list:
+        values = []
+        for parameter in self.parameters:
+            value = point.get(parameter)
+            if not isinstance(value, Number) or isinstance(value, bool):
+                raise TypeError(f"Parameter '{parameter}' must be numeric, not {value!r}.")
+            values.append(float(value))
+        return values
+
+
+    def __repr__(self):
+        return f'<Metamodel: {len(self.parameters)} parameters, {len(self.outputs)} outputs, {len(self)} rows>'
+
+
+
+class _Process:
+    """Gaussian process of a single KPI."""
+
+    def __init__(self):
+        self.x = np.empty((0, 0))
+        self.y = np.empty(0)
+        self.length_scale = None
+        self.noise = None
+        # Rows when the process was last tuned
+        self.tuned = 0
+
+    def __len__(self):
+        return len(self.y)
+
+    def fit(self, x, y, length_scale=None, noise=None) -> None:
+        """Set the scaling and hyperparameters, and factor every row."""
+
+        self.low = x.min(axis=0)
+        self.span = np.where(np.ptp(x, axis=0) > 0, np.ptp(x, axis=0), 1)
+        self.mean = y.mean()
+        self.scale = y.std() if y.std() > 0 else 1
+
+        u = self._scaled(x)
+        z = (y - self.mean) / self.scale
+        if length_scale is None or noise is None:
+            sample = np.random.default_rng(0).permutation(len(z))[:_MAX_TUNING_ROWS]
+            length_scales = _LENGTH_SCALES if length_scale is None else [length_scale]
+            noises = _NOISES if noise is None else [noise]
+            likelihood = {
+                (l, s): _log_likelihood(u[sample], z[sample], l, s) \
+                    for l in length_scales for s in noises
+            }
+            length_scale, noise = max(likelihood, key=likelihood.get)
+
+        self.length_scale = float(length_scale)
+        self.noise = float(noise)
+        self.x = x
+        self.y = y
+        self.tuned = len(y)
+        self.L = _cholesky(_kernel(u, u, self.length_scale) + self.noise*np.eye(len(z)))
+        self.w = _forward(self.L, z)
+
+    def update(self, x, y, length_scale=None, noise=None) -> None:
+        """Add rows, tuning again on every row when their number doubles."""
+        if len(self) + len(y) < 2*self.tuned:
+            self.add(x, y)
+        elif len(self) == 0:
+            self.fit(x, y, length_scale, noise)
+        else:
+            self.fit(np.vstack([self.x, x]), np.concatenate([self.y, y]), length_scale, noise)
+
+    def add(self, x, y) -> None:
+        """Extend the factorization with new rows."""
+        u = self._scaled(x)
+        z = (y - self.mean) / self.scale
+        v = _forward(self.L, _kernel(self._scaled(self.x), u, self.length_scale))
+        L22 = _cholesky(
+            _kernel(u, u, self.length_scale) + self.noise*np.eye(len(z)) - v.T @ v)
+        w2 = _forward(L22, z - v.T @ self.w)
+
+        n, m = len(self.L), len(z)
+        L = np.zeros((n + m, n + m))
+        L[:n, :n] = self.L
+        L[n:, :n] = v.T
+        L[n:, n:] = L22
+        self.L = L
+        self.w = np.concatenate([self.w, w2])
+        self.x = np.vstack([self.x, x])
+        self.y = np.concatenate([self.y, y])
+
+    def predict(self, x, standardized:bool=False) -> tuple:
+        """Mean and standard deviation of the expected KPI."""
+        v = _forward(self.L, _kernel(self._scaled(self.x), self._scaled(x), self.length_scale))
+        mean = v.T @ self.w
+        std = np.sqrt(np.maximum(1 - np.sum(v**2, axis=0), 0))
+        if standardized:
+            return mean, std
+        return self.mean + self.scale*mean, self.scale*std
+
+    def _scaled(self, x):
+        return (x - self.low) / self.span
+
+
+
+def _rows(rows) -> Iterable[dict]:
+    """Rows of a row, a sweep results table or an iterable of rows."""
+    if isinstance(rows, dict):
+        return [rows]
+    columns = getattr(rows, 'columns', None)
+    if isinstance(columns, dict):
+        return [dict(zip(columns, row)) for row in zip(*columns.values())]
+    return rows
+
+
+
+def _value(value) -> float:
+    """A KPI as a float, or NaN if missing."""
+    if isinstance(value, Number) and not isinstance(value, bool):
+        return float(value)
+    return np.nan
+
+
+
+def _kernel(a:np.ndarray, b:np.ndarray, length_scale:float) -> np.ndarray:
+    """Squared exponential covariance between two sets of scaled points."""
+    distance = np.sum(a**2, axis=1)[:, None] + np.sum(b**2, axis=1)[None, :] - 2*a @ b.T
+    return np.exp(-0.5 * np.maximum(distance, 0) / length_scale**2)
+
+
+
+def _cholesky(K:np.ndarray) -> np.ndarray:
+    """Cholesky factor, with jitter added if `K` is numerically singular."""
+    jitter = 0
+    for _ in range(6):
+        try:
+            return np.linalg.cholesky(K + jitter*np.eye(len(K)))
+        except np.linalg.LinAlgError:
+            jitter = 1e-8 if jitter == 0 else 10*jitter
+    raise np.linalg.LinAlgError('The covariance matrix is not positive definite.')
+
+
+
+def _forward(L:np.ndarray, b:np.ndarray) -> np.ndarray:
+    """Solve `L x = b` for a lower triangular `L`, in compiled LAPACK code."""
+    return np.linalg.solve(L, b)
+
+
+
+def _log_likelihood(u:np.ndarray, z:np.ndarray, length_scale:float, noise:float) -> float:
+    """Log marginal likelihood of standardized KPIs."""
+    try:
+        L = np.linalg.cholesky(_kernel(u, u, length_scale) + noise*np.eye(len(z)))
+    except np.linalg.LinAlgError:
+        return -np.inf
+    w = np.linalg.solve(L, z)
+    return -0.5*w @ w - np.sum(np.log(np.diag(L))) - 0.5*len(z)*math.log(2*math.pi)
+
+
+
+def _expected_improvement(mean:np.ndarray, std:np.ndarray, best:float) -> np.ndarray:
+    """Expected improvement over `best`, of a normal KPI to be maximized."""
+    gap = mean - best
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = np.where(std > 0, gap / std, 0)
+    cdf = 0.5 * (1 + np.vectorize(math.erf)(z / math.sqrt(2)))
+    pdf = np.exp(-0.5 * z**2) / math.sqrt(2*math.pi)
+    return np.where(std > 0, gap*cdf + std*pdf, np.maximum(gap, 0))
@@ -0,0 +1,77 @@
+"""The submodule that defines the `Assembly` object.
+
+`Assembly` is a model object that merges entities from several buffers into
+a single entity during simulation.
+
+Feed a `Line` object with this object.
+
+"""
+
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+import simpy
+
+from .machine import Machine
+
+
+
+@dataclass
+class Assembly(Machine):
+    """Machine that takes one entity from each of several buffers.
+
+    The entities are taken in the order of `input_buffer`, and processed as a
+    single assembled entity. In entity mode, the assembled entity is the part
+    taken from the first buffer.
+
+    Parameters
+    ----------
+    name : str
+        A distinct name for this object.
+    processing_time : Distribution | Number
+        How long it takes to assemble the entities.
+    input_buffer : Sequence[str]
+        Names of the `Buffer` objects that will provide one entity each.
+    output_buffer : str
+        Name of the `Buffer` object that will receive the assembled entity.
+    failure : Failure, optional
+        The failure behavior of this object.
+    
+    """
+
+    input_buffer : Sequence[str]
+
+
+    def _before_run(self, env:simpy.Environment, objects:dict):
+        self._parts = []
+        super()._before_run(env, objects)
+
+
+    def _bind_buffers(self, objects:dict):
+        self._input_buffer = [objects[name] for name in self.input_buffer]
+        self._output_buffer = objects[self.output_buffer]
+
+
+    def _take_part(self):
+        # Parts taken before a failure are kept in `_parts`
+        for buffer in self._input_buffer[len(self._parts):]:
+            self._parts.append((yield buffer._buffer.get()))
+        return self._assemble()
+
+
+    def _resume_take_part(self, event:simpy.Event):
+        self._parts.append((yield event))
+        return (yield from self._take_part())
+
+
+    def _cycle_state(self) -> Optional[tuple]:
+        state = super()._cycle_state()
+        if state is None:
+            return None
+        return state + (len(self._parts),)
+
+
+    def _assemble(self):
+        parts = self._parts
+        self._parts = []
+        return parts[0]
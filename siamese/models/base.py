@@ -1,12 +1,33 @@
 """Submodule for base models."""
 
 from abc import ABC, abstractmethod
+from typing import Optional
+
+from simpy.resources.base import Get, Put
 
 
 
 class Model(ABC):
     """Abstract base class for models."""
-    
+
+    # Attributes bound to a running simulation, which aren't checkpointed.
+    _runtime_attributes = ('env',)
+
+    # Random stream of a seeded simulation, shared by the model distributions.
+    _random = None
+
+    # Whether entities are tracked as `Part` records.
+    _entities = False
+
+    # Whether status changes are recorded for the timeline plot.
+    _timelines = False
+
+    # Attributes that accrue over a steady state cycle, by how they accrue.
+    _cycle_totals = ()
+    _cycle_records = ()
+    _cycle_timelines = ()
+    _cycle_timestamps = ()
+
     @abstractmethod
     def _before_run(self):
         """Events triggered right before simulation starts."""
@@ -14,5 +35,41 @@ class Model(ABC):
 
     @abstractmethod
     def _after_run(self):
-        """Events triggered right after simulation ends."""
+        """Events triggered right after each simulation run.
+
+        It must take snapshots of the results without changing the state of
+        the simulation, which may be continued afterwards.
+
+        """
+        pass
+
+    def _get_state(self) -> dict:
+        """Attributes of the model to be checkpointed."""
+        return {
+            attr: value for attr, value in self.__dict__.items() \
+                if attr not in self._runtime_attributes
+        }
+
+    def _cycle_state(self) -> Optional[tuple]:
+        """State that determines the future of a deterministic simulation.
+
+        It must be hashable, and `None` if the model isn't deterministic.
+
+        """
+        return None
+
+    def _interrupt(self):
+        """Interrupt the process of the model because of a failure.
+
+        A pending buffer request is withdrawn, so it doesn't take or give an
+        entity while the model is broken.
+
+        """
+        if isinstance(self.process.target, (Get, Put)):
+            self.process.target.cancel()
+        self.process.interrupt()
+
+    @abstractmethod
+    def _resume_run(self, env, objects:dict, **kwargs):
+        """Events triggered when a checkpointed simulation is restored."""
         pass
@@ -30,6 +30,8 @@ class Buffer(Model):
     name : str
     capacity : int
 
+    _runtime_attributes = ('env', '_buffer')
+
     def _before_run(self, env:simpy.Environment, _):
         self.env = env
         self._buffer = simpy.Store(env, self.capacity)
@@ -37,6 +39,18 @@ class Buffer(Model):
     def _after_run(self):
         pass
 
+    def _get_state(self) -> dict:
+        state = super()._get_state()
+        state['_items'] = list(self._buffer.items)
+        return state
+
+    def _resume_run(self, env:simpy.Environment, objects:dict):
+        self._before_run(env, objects)
+        self._buffer.items.extend(self.__dict__.pop('_items'))
+
+    def _cycle_state(self) -> tuple:
+        return ()
+
     @property
     def content(self):
         return len(self._buffer.items)
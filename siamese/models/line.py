@@ -5,17 +5,37 @@
 The `Model` objects are:
 - `Source`
 - `Machine`
+- `Assembly`
+- `Router`
 - `Buffer`
+- `Sink`
 
 """
 
-from typing import Optional
+from copy import deepcopy
+from dataclasses import fields
+import json
+import os
+import pickle
+import random
+from time import perf_counter
+from typing import Callable, Optional, Sequence, Union
 
 import simpy
 
-from siamese._reports import LineReport
+from siamese import _checkpoint, _config, _steady
+from siamese.cache import ResultCache
+from siamese.distributions import _Antithetic
+from siamese.status import BufferEvent, Status
+from siamese._hooks import METHODS
+from siamese._observers import Dispatcher
+from siamese._gradients import PerturbationAnalyzer
+from siamese._profiling import Profiler
+from siamese._reports import GradientReport, LineReport, ProfileReport, ReplicationReport
 from .base import Model
+from .buffer import Buffer
 from .machine import Machine
+from .sink import Sink
 from .source import Source
 
 try:
@@ -35,7 +55,10 @@ class Line:
     It wraps `Model` objects, which are:
     - `Source`
     - `Machine`
+    - `Assembly`
+    - `Router`
     - `Buffer`
+    - `Sink`
 
     Parameters
     ----------
@@ -46,15 +69,41 @@ class Line:
     -------
     add_model(model:Model)
         Add another `Model` object to the line.
+    copy()
+        Create a line with a copy of the models configuration.
+    checkpoint(path)
+        Save the state of the simulation to a file.
+    fork(parameters=None)
+        Create a copy of the simulation, with changed parameters.
+    from_config(config)
+        Create a line from a declarative configuration.
+    restore(path)
+        Create a line from a checkpoint file.
     plot(seed=None)
         Draw a network of the `Model` objects connection.
-    simulate(time)
+    replicate(time, n, seed=0, workers=None, ...)
+        Simulate independent replications of the line.
+    reset()
+        Discard the simulation state, so it restarts from time zero.
+    simulate(time, seed=None, cache=None, profile=False, ...)
         Run the simulation.
+    subscribe(model, status, callback)
+        Call a function whenever a model enters a status.
+    to_config(path=None)
+        Declarative configuration of the models of the line.
+    unsubscribe(model, status, callback)
+        Remove a subscribed function.
 
     Properties
     ----------
+    now : float
+        Current time of the simulation clock.
     report : LineReport
         Results of the simulation.
+    profile : ProfileReport
+        Performance counters of the last profiled simulation.
+    gradients : GradientReport
+        Sensitivity of the throughput to the parameters of the line.
 
     """
 
@@ -62,10 +111,32 @@ class Line:
     def __init__(self, *models):
 
         self.env = simpy.Environment()
+        self._profiler = None
+        self._analyzer = None
+        self._subscriptions = {}
+        self._registry = {}
+        self._started = False
         for model in models:
             self.add_model(model)
 
 
+    def __getstate__(self) -> dict:
+        # Lines are pickled through their checkpoint, or through their models
+        # configuration if the simulation has not started. Subscriptions are
+        # not pickled.
+        if self._started:
+            return {'checkpoint': _checkpoint.dump(self)}
+        return {'models': self.copy()._models}
+
+
+    def __setstate__(self, state:dict) -> None:
+        if 'checkpoint' in state:
+            self.__init__(*_checkpoint.models(state['checkpoint']))
+            _checkpoint.load(state['checkpoint'], self)
+        else:
+            self.__init__(*state['models'])
+
+
     def add_model(self, model:Model) -> None:
         """Add another `Model` object to the line.
         
@@ -82,9 +153,219 @@ class Line:
         if model.name in self.__dict__:
             raise ValueError('Duplicated object name.')
 
+        if self._started:
+            raise RuntimeError(
+                "Can't add models to a started simulation. "
+                'Use the `reset` method first.'
+            )
+
         setattr(self, model.name, model)
 
 
+    def copy(self) -> 'Line':
+        """Create a line with a copy of the models configuration.
+
+        Only the configuration (the dataclass fields) of the models is copied,
+        so the new line starts its own simulation from time zero.
+
+        Returns
+        -------
+        Line
+            A new, not simulated, line.
+
+        """
+
+        return type(self)(*[
+            type(model)(**{
+                field.name: deepcopy(getattr(model, field.name)) \
+                    for field in fields(model)
+            }) for model in self._models
+        ])
+
+
+    def checkpoint(self, path:str) -> None:
+        """Save the state of the simulation to a file.
+
+        The checkpoint holds the simulation clock, the pending events, the
+        buffers content, each model status and statistics, the in-progress
+        timers and the state of the random number generator.
+
+        Parameters
+        ----------
+        path : str
+            Path of the checkpoint file. It's replaced atomically, so a crash
+            while writing keeps the previous checkpoint intact.
+
+        """
+
+        if not self._started:
+            raise RuntimeError('The simulation has not started yet.')
+
+        state = _checkpoint.dump(self)
+        temp_path = f'{path}.tmp'
+        with open(temp_path, 'wb') as f:
+            pickle.dump(state, f)
+        os.replace(temp_path, path)
+
+
+    def fork(self, parameters:Optional[dict]=None) -> 'Line':
+        """Create a copy of the simulation, with changed parameters.
+
+        The new line continues from the current state of this one, such as
+        the end of a warm-up, when its `simulate` method is called. Both
+        lines draw the same values from then on, unless their parameters
+        make them diverge.
+
+        Parameters
+        ----------
+        parameters : dict, optional
+            Parameter values of the copy, by dotted path, as the design points
+            of `experiments.sweep`. A new processing time or failure applies
+            from the next value drawn, and a new buffer capacity from the next
+            request.
+
+        Returns
+        -------
+        Line
+            A line whose simulation stopped at the current time.
+
+        Examples
+        --------
+        >>> line.simulate(500, seed=42)
+        >>> faster = line.fork({'first_machine.processing_time': 8})
+        >>> faster.simulate(10000)
+
+        """
+
+        if not self._started:
+            raise RuntimeError('The simulation has not started yet.')
+
+        # Avoid circular imports
+        from siamese.experiments import _set_parameter
+
+        state = deepcopy(_checkpoint.dump(self))
+        line = type(self)(*_checkpoint.models(state))
+        for parameter, value in (parameters or {}).items():
+            _set_parameter(line, parameter, value)
+        state['models'] = [
+            (type(model), model.__dict__.copy()) for model in line._models
+        ]
+        _checkpoint.load(state, line)
+        return line
+
+
+    @classmethod
+    def restore(cls, path:str) -> 'Line':
+        """Create a line from a checkpoint file.
+
+        The simulation of the new line continues from the checkpoint time
+        when its `simulate` method is called.
+
+        Parameters
+        ----------
+        path : str
+            Path of a file created by the `checkpoint` method.
+
+        Returns
+        -------
+        Line
+            A line whose simulation stopped at the checkpoint time.
+
+        Examples
+        --------
+        >>> line.simulate(500, checkpoint_path='warmup.ckpt')
+        >>> scenario = Line.restore('warmup.ckpt')
+        >>> scenario.simulate(10000)
+
+        """
+
+        with open(path, 'rb') as f:
+            state = pickle.load(f)
+        line = cls(*_checkpoint.models(state))
+        _checkpoint.load(state, line)
+        return line
+
+
+    @classmethod
+    def from_config(cls, config:Union[dict, str]) -> 'Line':
+        """Create a line from a declarative configuration.
+
+        The configuration is validated as a whole before any model is
+        created, and the models are added to the line in bulk.
+
+        Parameters
+        ----------
+        config : dict | str
+            Configuration, or the path of a JSON or YAML file that holds it.
+            It has a `models` list, with the `type` and fields of each model,
+            and an optional `distributions` registry, with the distributions
+            that models reference by name, sharing the same instance.
+
+        Returns
+        -------
+        Line
+            A new, not simulated, line.
+
+        Examples
+        --------
+        >>> line = Line.from_config({
+        ...     'distributions': {'press': {'type': 'Uniform', 'min': 8, 'max': 12}},
+        ...     'models': [
+        ...         {'type': 'Source', 'name': 'source', 'processing_time': 5,
+        ...          'output_buffer': 'buffer1'},
+        ...         {'type': 'Buffer', 'name': 'buffer1', 'capacity': 10},
+        ...         {'type': 'Machine', 'name': 'press1', 'processing_time': 'press',
+        ...          'input_buffer': 'buffer1', 'output_buffer': 'buffer2'},
+        ...         ...
+        ...     ]
+        ... })
+        >>> line = Line.from_config('plant.yaml')
+
+        """
+
+        if isinstance(config, (str, os.PathLike)):
+            with open(config, encoding='utf-8') as f:
+                if str(config).endswith(('.yaml', '.yml')):
+                    config = _yaml().safe_load(f)
+                else:
+                    config = json.load(f)
+
+        models, registry = _config.build(config, cls)
+        line = cls()
+        line.__dict__.update({model.name: model for model in models})
+        line._registry = registry
+        return line
+
+
+    def to_config(self, path:Optional[str]=None) -> dict:
+        """Declarative configuration of the models of the line.
+
+        Distributions shared by many models are listed in the `distributions`
+        registry, so `from_config` creates the same line.
+
+        Parameters
+        ----------
+        path : str, optional
+            JSON or YAML file where the configuration is saved, by its
+            extension.
+
+        Returns
+        -------
+        dict
+            Configuration of the line.
+
+        """
+
+        config = _config.dump(self)
+        if path is not None:
+            with open(path, 'w', encoding='utf-8') as f:
+                if str(path).endswith(('.yaml', '.yml')):
+                    _yaml().safe_dump(config, f, sort_keys=False)
+                else:
+                    json.dump(config, f, indent=2)
+        return config
+
+
     def plot(self, seed:Optional[int]=None):
         """Draw a network of the `Model` objects connection.
 
@@ -100,7 +381,7 @@ class Line:
 
         # Add models
         for obj_name in self.__dict__:
-            if obj_name != 'env':
+            if isinstance(self.__dict__[obj_name], Model):
                 G.add_node(D[obj_name])
 
         # Connect models
@@ -110,8 +391,13 @@ class Line:
                 G.add_edge(D[obj.name], D[obj.output_buffer])
 
             elif isinstance(obj, Machine):
+                for buffer in _names(obj.input_buffer):
+                    G.add_edge(D[buffer], D[obj.name])
+                for buffer in _names(obj.output_buffer):
+                    G.add_edge(D[obj.name], D[buffer])
+
+            elif isinstance(obj, Sink):
                 G.add_edge(D[obj.input_buffer], D[obj.name])
-                G.add_edge(D[obj.name], D[obj.output_buffer])
         
         # Set models positions
         pos = nx.spring_layout(G, seed=seed)
@@ -137,28 +423,415 @@ class Line:
         )
 
 
+    def subscribe(
+            self,
+            model:Union[str, Model],
+            status:Union[Status, BufferEvent],
+            callback:Callable
+        ) -> None:
+        """Call a function whenever a model enters a status.
+
+        The callback is called as `callback(model, status, time)`, right after
+        `model` enters `status` at simulation `time`. Transitions without
+        subscribers are not instrumented.
+
+        Parameters
+        ----------
+        model : str | Model
+            Model, or name of the model, to be observed.
+        status : Status | BufferEvent
+            `Status` entered by a `Source` or `Machine`, or `BufferEvent` of a
+            `Buffer`.
+        callback : Callable
+            Function to be called.
+
+        Examples
+        --------
+        >>> blocks = []
+        >>> line.subscribe(
+        ...     model = 'first_machine',
+        ...     status = Status.BLOCKED,
+        ...     callback = lambda model, status, time: blocks.append(time)
+        ... )
+        >>> line.simulate(100)
+
+        """
+
+        name = model if isinstance(model, str) else model.name
+        obj = self.__dict__.get(name)
+        if not isinstance(obj, Model):
+            raise ValueError(f"There is no model named '{name}' in the line.")
+
+        if isinstance(obj, Buffer):
+            if not isinstance(status, BufferEvent):
+                raise ValueError('Buffers can only be observed through <BufferEvent> values.')
+        elif not isinstance(status, Status) or not hasattr(obj, METHODS[status]):
+            raise ValueError(f"Model '{name}' can't enter status {status}.")
+
+        if not callable(callback):
+            raise TypeError('`callback` must be callable.')
+
+        self._subscriptions.setdefault(name, {}) \
+            .setdefault(status, []).append(callback)
+
+
+    def unsubscribe(
+            self,
+            model:Union[str, Model],
+            status:Union[Status, BufferEvent],
+            callback:Callable
+        ) -> None:
+        """Remove a function subscribed through the `subscribe` method.
+
+        Parameters
+        ----------
+        model : str | Model
+            Model, or name of the model, being observed.
+        status : Status | BufferEvent
+            Observed status.
+        callback : Callable
+            Function to be removed.
+
+        """
+
+        name = model if isinstance(model, str) else model.name
+        try:
+            self._subscriptions[name][status].remove(callback)
+        except (KeyError, ValueError):
+            raise ValueError('Callback is not subscribed to this model status.')
+
+
     @property
     def report(self) -> str:
         """Results of the simulation."""
         return LineReport(self)
 
 
-    def simulate(self, time:int) -> None:
+    @property
+    def now(self) -> float:
+        """Current time of the simulation clock."""
+        return self.env.now
+
+
+    def replicate(
+            self,
+            time:int,
+            n:int,
+            seed:int = 0,
+            workers:Optional[int] = None,
+            confidence:float = 0.95,
+            percentiles:tuple = (5, 50, 95),
+            antithetic:bool = False,
+            controls:bool = False
+        ) -> ReplicationReport:
+        """Simulate independent replications of the line.
+
+        Replication `r` is a copy of the models configuration simulated from
+        time zero with the seed `seed + r`. This line is not simulated.
+
+        Two variance reduction techniques narrow the confidence intervals for
+        the same number of replications:
+        - Antithetic replications come in pairs that share a seed, the second
+          drawing the complement of every value of the first, and the pair
+          averages are the independent observations;
+        - Control variates adjust each KPI by the difference between the
+          observed and the expected mean of the times drawn by each `Source`
+          and `Machine`, weighted by their regression coefficients.
+
+        Parameters
+        ----------
+        time : int
+            Simulation horizon of each replication.
+        n : int
+            Number of replications.
+        seed : int, default=0
+            Seed of the first replication.
+        workers : int, optional
+            Number of worker processes. If `None`, the number of CPUs is used.
+            If 1, replications run in the current process.
+        confidence : float, default=0.95
+            Confidence level of the intervals of the means.
+        percentiles : tuple, default=(5, 50, 95)
+            Percentiles of each KPI, between 0 and 100.
+        antithetic : bool, default=False
+            Simulate antithetic pairs. Replications `2k` and `2k+1` use the
+            seed `seed + k`. `n` must be even.
+        controls : bool, default=False
+            Adjust the means with the processing times as control variates.
+
+        Returns
+        -------
+        ReplicationReport
+            Statistics of each KPI over the replications.
+
+        Examples
+        --------
+        >>> report = line.replicate(1000, n=30)
+        >>> report.to_frame()
+
+        >>> report = line.replicate(1000, n=10, antithetic=True, controls=True)
+
+        """
+
+        # Avoid circular imports
+        from siamese.experiments import sweep
+
+        results = sweep(
+            line = self,
+            design = [{}],
+            time = time,
+            replications = n,
+            seed = seed,
+            workers = workers,
+            antithetic = antithetic,
+            controls = controls
+        )
+        return ReplicationReport(results, confidence, percentiles, controls)
+
+
+    def reset(self) -> None:
+        """Discard the simulation state, so it restarts from time zero."""
+        self.env = simpy.Environment()
+        self._analyzer = None
+        self._started = False
+
+
+    @property
+    def profile(self) -> Optional[ProfileReport]:
+        """Performance counters of the last profiled simulation."""
+        if self._profiler is None:
+            return None
+        return ProfileReport(self._profiler)
+
+
+    @property
+    def gradients(self) -> Optional[GradientReport]:
+        """Sensitivity of the throughput to the parameters of the line, if
+        estimated since the simulation started."""
+        if self._analyzer is None:
+            return None
+        return GradientReport(self._analyzer)
+
+
+    @property
+    def _models(self) -> list:
+        return [obj for obj in self.__dict__.values() if isinstance(obj, Model)]
+
+
+    def _start(
+            self,
+            seed:Optional[Union[int, str]],
+            entities:bool,
+            antithetic:bool = False,
+            timeline:bool = False
+        ) -> None:
+        """Set up the models for a simulation that starts from time zero."""
+        stream = _Antithetic if antithetic else random.Random
+        for model in self._models:
+            model._random = None if seed is None \
+                else stream(f'{seed}/{model.name}')
+            model._entities = entities
+            model._timelines = timeline
+            model._before_run(self.env, self.__dict__)
+        self._started = True
+
+
+    def simulate(
+            self,
+            time:int,
+            seed:Optional[Union[int, str]] = None,
+            cache:Optional[ResultCache] = None,
+            profile:bool = False,
+            checkpoint_path:Optional[str] = None,
+            checkpoint_interval:Optional[int] = None,
+            entities:bool = False,
+            antithetic:bool = False,
+            gradients:bool = False,
+            timeline:bool = False,
+            progress:Optional[Callable] = None,
+            progress_interval:Optional[float] = None
+        ) -> None:
         """Run the simulation.
 
+        The first call starts the simulation from time zero. Further calls
+        continue it from the current clock, so a line can be simulated in
+        increments, with its reports inspected in-between. Use the `reset`
+        method to start over.
+
+        If every model has constant times and no failures, the simulation is
+        deterministic: once its state repeats, the whole cycles left until
+        `time` are skipped, and their statistics are extrapolated. Profiled
+        and observed runs, and runs that estimate gradients, are always
+        simulated event by event.
+
         Parameters
         ----------
         time : int
             Run the simulation until given time.
+        seed : int | str, optional
+            Seed of a reproducible simulation. Each model draws its values
+            from its own random stream, derived from the seed and the model
+            name. It can only be set when the simulation starts. If `None`,
+            values are drawn from the global `random` module.
+        cache : ResultCache, optional
+            Cache of seeded simulation results. Identical scenarios are loaded
+            from it instead of simulated. It is only used by seeded runs that
+            start from time zero, without profiling, observers or checkpoints.
+        profile : bool, default=False
+            Count events, status transitions, random draws and buffer
+            requests of each model, and measure the wall time spent in each
+            model process. The results are available in the `profile`
+            property. Models run uninstrumented when this is `False`.
+        checkpoint_path : str, optional
+            Save a checkpoint of the simulation to this file at every
+            `checkpoint_interval` and right before the simulation ends.
+        checkpoint_interval : int, optional
+            Simulation time between checkpoints.
+        entities : bool, default=False
+            Track each entity as a `Part` record, stamped by every model that
+            takes it, so `Sink` objects measure lead times. It can only be
+            set when the simulation starts.
+        antithetic : bool, default=False
+            Draw the complement of every value drawn by the run with the same
+            seed: each uniform `u` becomes `1 - u`. Paired with that run, it
+            makes an antithetic pair, whose average KPIs vary less than those
+            of two independent runs. It requires a `seed`, and can only be
+            set when the simulation starts.
+        gradients : bool, default=False
+            Estimate, alongside the simulation, the derivative of the
+            throughput of the `Sink` objects with respect to the mean
+            processing time of each `Source` and `Machine`, and an estimate
+            of its change with one more slot in each `Buffer`. The estimates are available
+            in the `gradients` property, and are updated by further calls.
+            It can only be set when the simulation starts.
+        timeline : bool, default=False
+            Record every status change of each `Source` and `Machine`, for
+            their `timeline` plots. It can only be set when the simulation
+            starts.
+        progress : Callable, optional
+            Function called as `progress(now)` at every `progress_interval`
+            of simulation time and when the simulation ends.
+        progress_interval : float, optional
+            Simulation time between calls of `progress`. If `None`, it's
+            only called when the simulation ends.
         
         """
 
-        for model in self.__dict__.values():
-            if hasattr(model, '_before_run'):
-                model._before_run(self.env, self.__dict__)
+        if checkpoint_interval is not None:
+            if checkpoint_path is None:
+                raise ValueError('`checkpoint_interval` requires a `checkpoint_path`.')
+            if checkpoint_interval <= 0:
+                raise ValueError('`checkpoint_interval` must be bigger than zero.')
+
+        if progress_interval is not None:
+            if progress is None:
+                raise ValueError('`progress_interval` requires a `progress` function.')
+            if progress_interval <= 0:
+                raise ValueError('`progress_interval` must be bigger than zero.')
+
+        if time <= self.env.now:
+            raise ValueError(
+                f'The simulation is already at time {self.env.now}. '
+                'Use the `reset` method to start over.'
+            )
+
+        if seed is not None and self._started:
+            raise ValueError('`seed` can only be set when the simulation starts.')
+
+        if entities and self._started:
+            raise ValueError('`entities` can only be set when the simulation starts.')
+
+        if antithetic and (seed is None or self._started):
+            raise ValueError('`antithetic` requires a `seed`, set when the simulation starts.')
+
+        if gradients and self._started:
+            raise ValueError('`gradients` can only be set when the simulation starts.')
+
+        if timeline and self._started:
+            raise ValueError('`timeline` can only be set when the simulation starts.')
+
+        if gradients and not any(isinstance(model, Sink) for model in self._models):
+            raise ValueError('`gradients` requires a `Sink` to measure the throughput.')
+
+        cache_key = None
+        if cache is not None and seed is not None and not self._started \
+                and not (profile or gradients or self._subscriptions or checkpoint_path):
+            cache_key = cache.key(self, time, seed, entities, antithetic, timeline)
+            results = cache.get(cache_key)
+            if results is not None:
+                _checkpoint.load(results, self)
+                self._profiler = None
+                if progress is not None:
+                    progress(self.env.now)
+                return
+
+        models = self._models
+        if not self._started:
+            self._start(seed, entities, antithetic, timeline)
+            if gradients:
+                self._analyzer = PerturbationAnalyzer(models)
+
+        self._profiler = Profiler() if profile else None
+        hooks = [hook for hook in (
+            self._profiler,
+            Dispatcher(self._subscriptions) if self._subscriptions else None,
+            self._analyzer
+        ) if hook is not None]
+
+        checkpoints = _stops(self.env.now, time, checkpoint_interval)
+        progresses = _stops(self.env.now, time, progress_interval)
+
+        for stop in sorted(checkpoints | progresses):
+            for hook in hooks:
+                for model in models:
+                    hook.attach(model)
+            start = perf_counter()
+            try:
+                if hooks:
+                    self.env.run(until=stop)
+                else:
+                    _steady.run(self, stop)
+            finally:
+                for hook in reversed(hooks):
+                    hook.detach()
+                if profile:
+                    self._profiler.run_time += perf_counter() - start
+            if checkpoint_path is not None and stop in checkpoints:
+                self.checkpoint(checkpoint_path)
+            if progress is not None and stop in progresses:
+                progress(self.env.now)
+
+        for model in models:
+            model._after_run()
+
+        if cache_key is not None:
+            results = _checkpoint.dump(self)
+            results['random'] = None
+            cache.put(cache_key, results)
+
+
+
+def _stops(now:float, time:float, interval:Optional[float]) -> set:
+    """Times at every `interval` from `now`, and the end time."""
+    stops = {time}
+    if interval is not None:
+        stop = now + interval
+        while stop < time:
+            stops.add(stop)
+            stop += interval
+    return stops
+
+
+
+def _names(buffers:Union[str, Sequence[str]]) -> list:
+    """Buffer names of a single or multiple buffers attribute."""
+    return [buffers] if isinstance(buffers, str) else list(buffers)
+
 
-        self.env.run(until=time)
 
-        for model in self.__dict__.values():
-            if hasattr(model, '_after_run'):
-                model._after_run()
+def _yaml():
+    try:
+        import yaml
+    except ImportError:
+        raise ImportError('YAML configurations require PyYAML to be installed.')
+    return yaml
@@ -15,6 +15,7 @@ import simpy
 from siamese import distributions as dist
 from siamese import failures as fail
 from siamese.status import Status
+from siamese._plots import status_timeline
 from siamese._reports import MachineReport
 from siamese._stats import Stats
 from .base import Model
@@ -25,6 +26,10 @@ from .base import Model
 class Machine(Model):
     """Object that holds an entities for some time.
 
+    A failure interrupts the machine whatever its status. A starving or
+    blocked machine withdraws its buffer request, so it neither takes nor
+    gives an entity until it is repaired.
+
     Parameters
     ----------
     name : str
@@ -46,19 +51,47 @@ class Machine(Model):
     output_buffer : str
     failure : Optional[fail.Failure] = None
 
+    _runtime_attributes = (
+        'env',
+        'process',
+        'failure_process',
+        'fixed',
+        '_input_buffer',
+        '_output_buffer'
+    )
+
+    _cycle_totals = (
+        '_time_starved',
+        '_time_processing',
+        '_time_blocked',
+        '_time_broken'
+    )
+    _cycle_records = (
+        '_starving_tracking',
+        '_processing_tracking',
+        '_blocking_tracking',
+        '_failure_tracking'
+    )
+    _cycle_timelines = ('_timeline',)
+    _cycle_timestamps = (
+        'starving_start_time',
+        'processing_start_time',
+        'blocking_start_time',
+        'failure_start_time'
+    )
+
 
     def _before_run(self, env:simpy.Environment, objects:dict):
         
         # Properties
-        self._input_buffer = objects[self.input_buffer]
-        self._output_buffer = objects[self.output_buffer]
-        self.processing_time = dist._create_dist(self.processing_time)
+        self._bind_buffers(objects)
+        self.processing_time = dist._create_dist(self.processing_time, self._random)
 
         # Stats
-        self.time_starved    = 0
-        self.time_processing = 0
-        self.time_blocked    = 0
-        self.time_broken     = 0
+        self._time_starved    = 0
+        self._time_processing = 0
+        self._time_blocked    = 0
+        self._time_broken     = 0
 
         # Micromanagement stats
         self.starving_start_time   = 0
@@ -70,6 +103,7 @@ class Machine(Model):
         self._processing_tracking = []
         self._blocking_tracking   = []
         self._failure_tracking    = []
+        self._timeline            = []
 
         self.status = Status.STARVING
         self.part = None
@@ -80,9 +114,9 @@ class Machine(Model):
 
         # Failure
         if isinstance(self.failure, fail.Failure):
-            self.tbf = dist._create_dist(self.failure.time_between_failures)
-            self.ttr = dist._create_dist(self.failure.time_to_repair)
-            env.process(self._run_failure())
+            self.tbf = dist._create_dist(self.failure.time_between_failures, self._random)
+            self.ttr = dist._create_dist(self.failure.time_to_repair, self._random)
+            self.failure_process = env.process(self._run_failure())
 
 
     def _run_process(self):
@@ -92,7 +126,7 @@ class Machine(Model):
                 # Starving
                 if self.status == Status.STARVING:
                     self._before_starving()
-                    self.part = yield self._input_buffer._buffer.get()
+                    self.part = yield from self._take_part()
                     self._after_starving()
 
                 # Processing
@@ -118,94 +152,243 @@ class Machine(Model):
     def _run_failure(self):
         while True:
             yield self.env.timeout(self.tbf.generate())
-            self.process.interrupt()
+            self._interrupt()
             self.fixed = self.env.event()
             yield self.fixed
 
 
+    def _resume_run(
+            self,
+            env:simpy.Environment,
+            objects:dict,
+            event:simpy.Event,
+            failure_event:Optional[simpy.Event] = None,
+            repairing:bool = False
+        ):
+        """Resume the processes of a checkpointed simulation.
+
+        `event` and `failure_event` are the events the process and the failure
+        process were waiting for when the checkpoint was created.
+
+        """
+
+        self._bind_buffers(objects)
+        self.processing_time = dist._create_dist(self.processing_time, self._random)
+        self.env = env
+        self.process = self.env.process(self._resume_process(event, repairing))
+
+        if repairing:
+            self.fixed = failure_event
+
+        # Failures may have been changed, added or removed by `Line.fork`
+        if isinstance(self.failure, fail.Failure):
+            self.tbf = dist._create_dist(self.failure.time_between_failures, self._random)
+            self.ttr = dist._create_dist(self.failure.time_to_repair, self._random)
+            if failure_event is None:
+                self.failure_process = env.process(self._run_failure())
+            else:
+                self.failure_process = env.process(self._resume_failure(failure_event, repairing))
+
+
+    def _resume_process(self, event:simpy.Event, repairing:bool):
+        try:
+
+            # Failure
+            if repairing:
+                yield event
+                self._after_failing()
+                self.fixed.succeed()
+
+            # Starving
+            elif self.status == Status.STARVING:
+                self.part = yield from self._resume_take_part(event)
+                self._after_starving()
+
+            # Processing
+            elif self.status == Status.PROCESSING:
+                yield event
+                self._after_processing()
+
+            # Block
+            elif self.status == Status.BLOCKED:
+                yield event
+                self._after_blocking()
+
+        # Failure
+        except simpy.Interrupt:
+            self._before_failing()
+            yield self.env.timeout(self.ttr.generate())
+            self._after_failing()
+            self.fixed.succeed()
+
+        yield from self._run_process()
+
+
+    def _resume_failure(self, event:simpy.Event, repairing:bool):
+        if not repairing:
+            yield event
+            self._interrupt()
+            self.fixed = self.env.event()
+        yield self.fixed
+        yield from self._run_failure()
+
+
+    def _bind_buffers(self, objects:dict):
+        self._input_buffer = objects[self.input_buffer]
+        self._output_buffer = objects[self.output_buffer]
+
+
+    def _take_part(self):
+        return (yield self._input_buffer._buffer.get())
+
+
+    def _resume_take_part(self, event:simpy.Event):
+        return (yield event)
+
+
     def _before_starving(self):
         self.starving_start_time = self.env.now
+        if self._timelines:
+            self._timeline.append((self.env.now, Status.STARVING))
 
 
     def _after_starving(self):
         starving_duration = self.env.now-self.starving_start_time
         if starving_duration > 0:
             self._starving_tracking.append(starving_duration)
-            self.time_starved += starving_duration
+            self._time_starved += starving_duration
+        if self._entities:
+            self.part.stamps.append((self.name, self.env.now))
         self.status = Status.PROCESSING
 
 
     def _before_processing(self):
         self.processing_start_time = self.env.now
+        if self._timelines:
+            self._timeline.append((self.env.now, Status.PROCESSING))
 
 
     def _after_processing(self):
         process_duration = self.env.now-self.processing_start_time
         self._processing_tracking.append(process_duration)
-        self.time_processing += process_duration
+        self._time_processing += process_duration
         self.status = Status.BLOCKED
 
 
     def _before_blocking(self):
         self.blocking_start_time = self.env.now
+        if self._timelines:
+            self._timeline.append((self.env.now, Status.BLOCKED))
 
 
     def _after_blocking(self):
         blocking_duration = self.env.now-self.blocking_start_time
         if blocking_duration > 0:
             self._blocking_tracking.append(blocking_duration)
-            self.time_blocked += blocking_duration
+            self._time_blocked += blocking_duration
         self.part = None
         self.status = Status.STARVING
 
 
     def _before_failing(self):
         self.failure_start_time = self.env.now
+        if self._timelines:
+            self._timeline.append((self.env.now, Status.FAILURE))
         self._add_current_status()
 
 
     def _after_failing(self):
         failure_duration = self.env.now-self.failure_start_time
         self._failure_tracking.append(failure_duration)
-        self.time_broken += failure_duration
+        self._time_broken += failure_duration
 
 
     def _after_run(self):
         self.items_processed = len(self._processing_tracking)
-        self._add_current_status()
+        time_starved, time_processing, time_blocked, time_broken = \
+            self._current_totals()
 
-        # Generate `Stats` objects
+        # Generate `Stats` snapshots, keeping the simulation state intact
         self.time_starved = Stats(
-            total = self.time_starved,
-            values = self._starving_tracking
+            total = time_starved,
+            values = list(self._starving_tracking)
         )
         self.time_processing = Stats(
-            total = self.time_processing,
-            values = self._processing_tracking
+            total = time_processing,
+            values = list(self._processing_tracking)
         )
         self.time_blocked = Stats(
-            total = self.time_blocked,
-            values = self._blocking_tracking
+            total = time_blocked,
+            values = list(self._blocking_tracking)
         )
         self.time_broken = Stats(
-            total = self.time_broken,
-            values = self._failure_tracking
+            total = time_broken,
+            values = list(self._failure_tracking)
         )
 
-        # Clear micromanagement stats
-        del self.starving_start_time
-        del self.processing_start_time
-        del self.blocking_start_time
-        del self.failure_start_time
-
 
     def _add_current_status(self):
+        """Add the time spent in the status a failure interrupts to its total."""
         if self.status == Status.STARVING:
-            self.time_starved += (self.env.now-self.starving_start_time)
+            self._time_starved += (self.env.now-self.starving_start_time)
+        elif self.status == Status.PROCESSING:
+            self._time_processing += (self.env.now-self.processing_start_time)
+        elif self.status == Status.BLOCKED:
+            self._time_blocked += (self.env.now-self.blocking_start_time)
+
+
+    def _current_totals(self) -> tuple:
+        """Time totals including the time spent in the current status."""
+        totals = [
+            self._time_starved,
+            self._time_processing,
+            self._time_blocked,
+            self._time_broken
+        ]
+        if self._repairing:
+            totals[3] += self.env.now-self.failure_start_time
+        elif self.status == Status.STARVING:
+            totals[0] += self.env.now-self.starving_start_time
         elif self.status == Status.PROCESSING:
-            self.time_processing += (self.env.now-self.processing_start_time)
+            totals[1] += self.env.now-self.processing_start_time
         elif self.status == Status.BLOCKED:
-            self.time_broken += (self.env.now-self.blocking_start_time)
+            totals[2] += self.env.now-self.blocking_start_time
+        return tuple(totals)
+
+
+    def _cycle_state(self) -> Optional[tuple]:
+        if self.failure is not None \
+                or not isinstance(self.processing_time, dist.Constant):
+            return None
+        return (self.status,)
+
+
+    @property
+    def _repairing(self) -> bool:
+        fixed = self.__dict__.get('fixed')
+        return fixed is not None and not fixed.triggered
+
+
+    def timeline(self, width:int=1000, **kwargs):
+        """Gantt chart of the status of this object during the simulation.
+
+        It requires a simulation run with `timeline=True`.
+
+        Parameters
+        ----------
+        width : int, default=1000
+            Number of time slots the chart is downsampled to, usually its
+            width in pixels.
+        **kwargs
+            Arguments of the `go.Bar` traces.
+
+        """
+        if not self._timelines:
+            raise RuntimeError(
+                'The status timeline was not recorded. '
+                'Simulate the line with `timeline=True`.'
+            )
+        return status_timeline(self.name, self._timeline, self.env.now, width, **kwargs)
 
 
     @property
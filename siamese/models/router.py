@@ -0,0 +1,118 @@
+"""The submodule that defines the `Router` object.
+
+`Router` is a model object that splits a stream of entities into several
+buffers during simulation.
+
+Feed a `Line` object with this object.
+
+"""
+
+from bisect import bisect
+from dataclasses import dataclass
+from itertools import accumulate
+import random
+from typing import Optional, Sequence
+
+import simpy
+
+from .machine import Machine
+
+
+
+RULES = ('round_robin', 'ratio', 'shortest_queue')
+
+
+
+@dataclass
+class Router(Machine):
+    """Machine that sends each processed entity to one of several buffers.
+
+    Routing rules:
+    - `'round_robin'`: buffers take turns, in order;
+    - `'ratio'`: each entity is sent to a buffer drawn with probabilities
+      proportional to `ratios`;
+    - `'shortest_queue'`: the buffer with the least entities, or the first of
+      them, if tied.
+
+    Parameters
+    ----------
+    name : str
+        A distinct name for this object.
+    processing_time : Distribution | Number
+        How long it takes to process an entity.
+    input_buffer : str
+        Name of the `Buffer` object that will provide the entity.
+    output_buffer : Sequence[str]
+        Names of the `Buffer` objects that may receive the processed entity.
+    failure : Failure, optional
+        The failure behavior of this object.
+    rule : str, default='round_robin'
+        Routing rule.
+    ratios : Sequence[float], optional
+        Weight of each output buffer for the `'ratio'` rule.
+    
+    """
+
+    output_buffer : Sequence[str]
+    rule : str = 'round_robin'
+    ratios : Optional[Sequence[float]] = None
+
+    _runtime_attributes = Machine._runtime_attributes + ('_outputs',)
+
+
+    def __post_init__(self):
+        if self.rule not in RULES:
+            raise ValueError(f"`rule` must be one of {RULES}.")
+        if self.rule == 'ratio':
+            if self.ratios is None or len(self.ratios) != len(self.output_buffer):
+                raise ValueError('`ratios` must have one weight for each output buffer.')
+            if min(self.ratios) < 0 or sum(self.ratios) <= 0:
+                raise ValueError('`ratios` must be non-negative, with a positive sum.')
+
+
+    def _before_run(self, env:simpy.Environment, objects:dict):
+        self._turn = 0
+        self._destination = 0
+        super()._before_run(env, objects)
+
+
+    def _bind_buffers(self, objects:dict):
+        self._input_buffer = objects[self.input_buffer]
+
+        # Index tables, so routing doesn't look up buffers by name
+        self._outputs = [objects[name] for name in self.output_buffer]
+        if self.rule == 'ratio':
+            total = sum(self.ratios)
+            self._cumulative = [w/total for w in accumulate(self.ratios)][:-1]
+        self._output_buffer = self._outputs[0]
+
+
+    def _cycle_state(self) -> Optional[tuple]:
+        state = super()._cycle_state()
+        if state is None or self.rule == 'ratio':
+            return None
+        return state + (self._turn, self._destination)
+
+
+    def _after_processing(self):
+        # Each entity is routed once, and keeps its destination when a
+        # failure interrupts its put
+        self._destination = self._route()
+        super()._after_processing()
+
+
+    def _before_blocking(self):
+        self._output_buffer = self._outputs[self._destination]
+        super()._before_blocking()
+
+
+    def _route(self) -> int:
+        if self.rule == 'round_robin':
+            i = self._turn
+            self._turn = (i + 1) % len(self._outputs)
+            return i
+        if self.rule == 'ratio':
+            stream = self._random or random
+            return bisect(self._cumulative, stream.random())
+        lengths = [buffer.content for buffer in self._outputs]
+        return lengths.index(min(lengths))
@@ -0,0 +1,110 @@
+"""The submodule that defines the `Sink` object.
+
+`Sink` is a model object that removes entities from the line during
+simulation.
+
+Feed a `Line` object with this object.
+
+"""
+
+from dataclasses import dataclass
+
+import simpy
+
+from siamese.entities import Part
+from siamese._reports import SinkReport
+from siamese._stats import Stats
+from .base import Model
+
+
+
+@dataclass
+class Sink(Model):
+    """Object that removes finished entities from the line.
+
+    It takes every entity of its input buffer as soon as it arrives. In entity
+    mode, the lead time of each part, from its creation to its removal, is
+    tracked.
+
+    Parameters
+    ----------
+    name : str
+        A distinct name for this object.
+    input_buffer : str
+        Name of the `Buffer` object that will provide the entities.
+    
+    """
+
+    name : str
+    input_buffer : str
+
+    _runtime_attributes = (
+        'env',
+        'process',
+        '_input_buffer'
+    )
+
+    _cycle_totals = ('_items_received',)
+    _cycle_records = ('_lead_time_tracking',)
+
+
+    def _before_run(self, env:simpy.Environment, objects:dict):
+
+        # Properties
+        self._input_buffer = objects[self.input_buffer]
+
+        # Stats
+        self._items_received = 0
+        self._lead_time_tracking = []
+
+        # Environment
+        self.env = env
+        self.process = self.env.process(self._run_process())
+
+
+    def _run_process(self):
+        while True:
+            part = yield self._input_buffer._buffer.get()
+            self._receive(part)
+
+
+    def _resume_run(self, env:simpy.Environment, objects:dict, event:simpy.Event, **kwargs):
+        """Resume the process of a checkpointed simulation.
+
+        `event` is the buffer request the process was waiting for when the
+        checkpoint was created.
+
+        """
+
+        self._input_buffer = objects[self.input_buffer]
+        self.env = env
+        self.process = self.env.process(self._resume_process(event))
+
+
+    def _resume_process(self, event:simpy.Event):
+        part = yield event
+        self._receive(part)
+        yield from self._run_process()
+
+
+    def _receive(self, part):
+        self._items_received += 1
+        if isinstance(part, Part):
+            self._lead_time_tracking.append(self.env.now-part.created)
+
+
+    def _cycle_state(self) -> tuple:
+        return ()
+
+
+    def _after_run(self):
+        self.items_received = self._items_received
+        self.lead_time = Stats(
+            total = sum(self._lead_time_tracking),
+            values = list(self._lead_time_tracking)
+        )
+
+
+    @property
+    def report(self) -> str:
+        return SinkReport(self)
@@ -0,0 +1,481 @@
+"""The multi-objective optimization submodule.
+
+`optimize` searches the options of a `Line`, such as buffer capacities and
+machine speed or reliability upgrades, for the best trade-offs between its
+throughput and the costs of the options, such as floor space and investment.
+It returns the Pareto front: the candidates that no other candidate beats in
+every objective.
+
+The search is an NSGA-II evolutionary algorithm [1]_:
+- Each generation is simulated as a single batch by `experiments.sweep`, so
+  candidates run in parallel worker processes, under common random numbers;
+- Each candidate is simulated once per search, and a `ResultCache` keeps the
+  simulations for later searches;
+- Candidates are screened by `throughput_bound`, an analytic upper bound of
+  their throughput, and are not simulated if even their bound is beaten by a
+  simulated candidate.
+
+Options are addressed by dotted paths, as in the `experiments` submodule.
+
+>>> from siamese.optimization import optimize
+>>> results = optimize(
+...     line,
+...     options = {
+...         'buffer1.capacity': range(1, 21),
+...         'first_machine.processing_time': [Exponential(10), Exponential(8)]
+...     },
+...     costs = {
+...         'floor_space': lambda c: 2 * c['buffer1.capacity'],
+...         'investment': lambda c: 5000 * (c['first_machine.processing_time'].mean < 10)
+...     },
+...     time = 10000
+... )
+>>> results.front
+
+References
+----------
+.. [1] Deb, K., Pratap, A., Agarwal, S. and Meyarivan, T. (2002). A fast and
+   elitist multiobjective genetic algorithm: NSGA-II. IEEE Transactions on
+   Evolutionary Computation, 6(2), 182-197.
+
+"""
+
+from typing import Callable, Optional, Union
+
+import numpy as np
+
+from siamese import failures as fail
+from siamese.cache import ResultCache
+from siamese.experiments import sweep, _set_parameter
+
+
+
+class ParetoResults:
+    """Candidates of a multi-objective search.
+
+    Attributes
+    ----------
+    objectives : list[str]
+        Names of the objectives: the output, to be maximized, followed by the
+        costs, to be minimized.
+    candidates : list[dict]
+        Parameter values and objectives of each simulated candidate.
+    front : list[dict]
+        Candidates that no other candidate beats in every objective, by
+        increasing output.
+    simulated : int
+        Number of simulated candidates.
+    screened : int
+        Number of candidates discarded by their throughput bound.
+
+    Methods
+    -------
+    to_frame()
+        Pareto front as a pandas DataFrame.
+
+    """
+
+    def __init__(self, objectives:list, candidates:list, screened:int):
+        self.objectives = objectives
+        self.candidates = candidates
+        self.simulated = len(candidates)
+        self.screened = screened
+
+        output, *costs = objectives
+        y = np.array([
+            [-c[output]] + [c[cost] for cost in costs] for c in candidates
+        ], dtype=float).reshape(len(candidates), len(objectives))
+        front = _fronts(y)[0] if len(candidates) else []
+        self.front = sorted((candidates[i] for i in front), key=lambda c: c[output])
+
+
+    def to_frame(self):
+        """Pareto front as a pandas DataFrame."""
+        try:
+            import pandas as pd
+        except ImportError:
+            raise ImportError('`to_frame` requires pandas to be installed.')
+        return pd.DataFrame(self.front)
+
+
+    def __str__(self):
+        width = max([len(name) for name in self.objectives] + [10])
+        lines = [
+            f'Pareto front: {len(self.front)} of {self.simulated} simulated '
+            f'candidates ({self.screened} screened)',
+            '  '.join(f'{name:>{width}}' for name in self.objectives),
+            '-' * ((width + 2) * len(self.objectives))
+        ]
+        for candidate in self.front:
+            lines.append('  '.join(
+                f'{candidate[name]:>{width}.4g}' for name in self.objectives))
+        return '\n'.join(lines)
+
+
+    def __repr__(self):
+        return self.__str__()
+
+
+
+def throughput_bound(line) -> float:
+    """Analytic upper bound of the throughput of a line.
+
+    Each `Source` and `Machine` can't produce faster than its availability,
+    which is the share of time it isn't being repaired, over its mean
+    processing time, nor faster than the entities it's fed. A `Router` sends
+    its expected share of entities to each output buffer, or all of them to
+    each one for the `'shortest_queue'` rule. The bound ignores blocking and
+    starvation, so it's tight for lines whose bottleneck is seldom blocked
+    or starved.
+
+    Parameters
+    ----------
+    line : Line
+        Line to be bounded. It doesn't need to be simulated.
+
+    Returns
+    -------
+    float
+        Upper bound of the entities received by every `Sink` per time unit.
+        It's infinite if a mean time is unknown.
+
+    """
+
+    # Avoid circular imports
+    from siamese.models.router import Router
+    from siamese.models.sink import Sink
+
+    models = line._models
+    producers = [m for m in models if hasattr(m, 'processing_time')]
+    rates = {m.name: _rate(m) for m in producers}
+    supply = {m.name: np.inf for m in models if hasattr(m, 'capacity')}
+
+    # Supplies only decrease from infinity, so they settle after as many
+    # passes as models in the longest path
+    for _ in range(len(models)):
+        inflow = dict.fromkeys(supply, 0.0)
+        for model in producers:
+            inputs = getattr(model, 'input_buffer', ())
+            inputs = [inputs] if isinstance(inputs, str) else inputs
+            flow = min([rates[model.name]] + [supply[name] for name in inputs])
+            outputs = model.output_buffer
+            if isinstance(outputs, str):
+                inflow[outputs] += flow
+            else:
+                for name, share in zip(outputs, _shares(model, Router)):
+                    inflow[name] += flow * share
+        if inflow == supply:
+            break
+        supply = inflow
+
+    return sum(supply[m.input_buffer] for m in models if isinstance(m, Sink))
+
+
+
+def optimize(
+        line,
+        options:dict,
+        costs:dict,
+        time:float,
+        output:Optional[Union[str, Callable]] = None,
+        population:int = 20,
+        generations:int = 10,
+        replications:int = 1,
+        seed:int = 0,
+        workers:Optional[int] = None,
+        cache:Optional[ResultCache] = None,
+        screen:bool = True
+    ) -> ParetoResults:
+    """Search the options of a line for the Pareto front of its objectives.
+
+    Parameters
+    ----------
+    line : Line
+        Base line.
+    options : dict[str, Sequence]
+        Possible values of each parameter, by parameter path, such as a range
+        of buffer capacities or a list of processing time distributions or
+        failures. Ordered options are mutated to their neighbours more often.
+    costs : dict[str, Callable]
+        Cost functions to be minimized, by name. Each one is called with the
+        parameter values of a candidate, by parameter path.
+    time : float
+        Simulation horizon.
+    output : str | Callable, optional
+        Name of a KPI column, or a function that computes it from a row of
+        KPIs, to be maximized. If `None`, the throughput of the line: the
+        entities received by every `Sink` per time unit.
+    population : int, default=20
+        Number of candidates of each generation.
+    generations : int, default=10
+        Number of generations after the initial population.
+    replications : int, default=1
+        Number of simulations of each candidate, whose outputs are averaged.
+    seed : int, default=0
+        Random state of the search and seed of the first replication.
+    workers : int, optional
+        Number of worker processes.
+    cache : ResultCache, optional
+        Cache of simulation results.
+    screen : bool, default=True
+        Discard candidates whose throughput bound is beaten by a simulated
+        candidate. It only applies to the default `output`.
+
+    Returns
+    -------
+    ParetoResults
+        Simulated candidates and their Pareto front.
+
+    """
+
+    # Avoid circular imports
+    from siamese.models.sink import Sink
+
+    if population < 2:
+        raise ValueError('`population` must be at least 2.')
+
+    paths = list(options)
+    options = [list(values) for values in options.values()]
+    if not paths or any(len(values) == 0 for values in options):
+        raise ValueError('Every parameter must have at least one option.')
+
+    sinks = [m.name for m in line._models if isinstance(m, Sink)]
+    if output is None:
+        if not sinks:
+            raise ValueError('The throughput of the line requires a `Sink`.')
+        name = 'throughput'
+        output = lambda row: sum(row[f'{sink}.items_received'] for sink in sinks) / time
+    else:
+        name = output if isinstance(output, str) else 'output'
+        screen = False
+    if name in costs:
+        raise ValueError(f"Cost '{name}' has the same name as the output.")
+    objectives = [name] + list(costs)
+
+    rng = np.random.default_rng(seed)
+    evaluated = {}
+    screened = set()
+    bounds = {}
+
+    def parameters(genes):
+        return {path: options[i][g] for i, (path, g) in enumerate(zip(paths, genes))}
+
+    def evaluate(batch):
+        """Objectives of candidates, simulating the new ones."""
+
+        new = []
+        for genes in dict.fromkeys(batch):
+            if genes in evaluated or genes in screened:
+                continue
+            candidate = parameters(genes)
+            cost = [costs[c](candidate) for c in costs]
+            if screen and evaluated:
+                scenario = line.copy()
+                for path, value in candidate.items():
+                    _set_parameter(scenario, path, value)
+                bound = np.array([-throughput_bound(scenario)] + cost)
+                if any(_dominates(y, bound) for y in evaluated.values()):
+                    screened.add(genes)
+                    bounds[genes] = bound
+                    continue
+            new.append((genes, candidate, cost))
+
+        if new:
+            results = sweep(
+                line = line,
+                design = [candidate for _, candidate, _ in new],
+                time = time,
+                replications = replications,
+                seed = seed,
+                workers = workers,
+                cache = cache
+            )
+            if len(results) < len(new) * replications:
+                raise RuntimeError('The evaluation of a generation was interrupted.')
+            values = _outputs(results, output, len(new), replications)
+            for (genes, _, cost), value in zip(new, values):
+                evaluated[genes] = np.array([-value] + cost)
+
+        # Screened candidates compete with their bound, which is dominated
+        return np.array([
+            evaluated[genes] if genes in evaluated else bounds[genes] \
+                for genes in batch
+        ])
+
+    sizes = np.array([len(values) for values in options])
+    parents = [tuple(int(g) for g in rng.integers(sizes)) for _ in range(population)]
+    y = evaluate(parents)
+
+    for _ in range(generations):
+        rank, crowding = _rank(y)
+        offspring = []
+        while len(offspring) < population:
+            a, b = (_tournament(rng, rank, crowding) for _ in range(2))
+            child = _crossover(rng, parents[a], parents[b])
+            offspring.append(_mutate(rng, child, sizes))
+        merged = parents + offspring
+        y_merged = np.vstack([y, evaluate(offspring)])
+        survivors = _select(y_merged, population)
+        parents = [merged[i] for i in survivors]
+        y = y_merged[survivors]
+
+    candidates = []
+    for genes, objective in evaluated.items():
+        candidate = parameters(genes)
+        candidate[name] = -float(objective[0])
+        candidate.update(zip(costs, objective[1:].tolist()))
+        candidates.append(candidate)
+
+    return ParetoResults(objectives, candidates, len(screened))
+
+
+
+def _rate(model) -> float:
+    """Entities per time unit a model can produce, or infinity if unknown."""
+
+    # Avoid circular imports
+    from siamese.distributions import _create_dist
+
+    mean = _create_dist(model.processing_time).expected_value
+    availability = 1
+    if isinstance(model.failure, fail.TimeFailure):
+        tbf = _create_dist(model.failure.time_between_failures).expected_value
+        ttr = _create_dist(model.failure.time_to_repair).expected_value
+        if tbf is None or ttr is None:
+            return np.inf
+        availability = tbf / (tbf + ttr)
+    if mean is None or mean <= 0:
+        return np.inf
+    return availability / mean
+
+
+
+def _shares(model, router_type) -> list:
+    """Expected share of the entities sent to each output buffer."""
+    n = len(model.output_buffer)
+    if not isinstance(model, router_type) or model.rule == 'shortest_queue':
+        return [1.0] * n
+    if model.rule == 'ratio':
+        total = sum(model.ratios)
+        return [w / total for w in model.ratios]
+    return [1 / n] * n
+
+
+
+def _outputs(results, output:Union[str, Callable], n:int, replications:int) -> np.ndarray:
+    """Mean output of each design point of a sweep."""
+
+    columns = results.columns
+    if callable(output):
+        values = [output(dict(zip(columns, row))) for row in zip(*columns.values())]
+    else:
+        if output not in columns:
+            raise ValueError(f"There is no KPI named '{output}'.")
+        values = columns[output]
+
+    y = np.zeros(n)
+    np.add.at(y, np.asarray(columns['point']), np.asarray(values, dtype=float))
+    return y / replications
+
+
+
+def _dominates(a:np.ndarray, b:np.ndarray) -> bool:
+    """Whether `a` is no worse than `b` in every objective, and better in one."""
+    return bool(np.all(a <= b) and np.any(a < b))
+
+
+
+def _fronts(y:np.ndarray) -> list:
+    """Indices of each successive non-dominated front of objectives `y`."""
+
+    n = len(y)
+    dominated_by = [[] for _ in range(n)]
+    counts = np.zeros(n, dtype=int)
+    for i in range(n):
+        for j in range(n):
+            if i != j and _dominates(y[i], y[j]):
+                dominated_by[i].append(j)
+                counts[j] += 1
+
+    fronts = []
+    current = [i for i in range(n) if counts[i] == 0]
+    while current:
+        fronts.append(current)
+        following = []
+        for i in current:
+            for j in dominated_by[i]:
+                counts[j] -= 1
+                if counts[j] == 0:
+                    following.append(j)
+        current = following
+    return fronts
+
+
+
+def _crowding(y:np.ndarray) -> np.ndarray:
+    """Crowding distance of each point of a front."""
+
+    n, m = y.shape
+    distance = np.zeros(n)
+    for k in range(m):
+        order = np.argsort(y[:, k], kind='stable')
+        span = y[order[-1], k] - y[order[0], k]
+        distance[order[0]] = distance[order[-1]] = np.inf
+        if span > 0 and n > 2:
+            distance[order[1:-1]] += (y[order[2:], k] - y[order[:-2], k]) / span
+    return distance
+
+
+
+def _rank(y:np.ndarray) -> tuple:
+    """Front index and crowding distance of each candidate."""
+    rank = np.zeros(len(y), dtype=int)
+    crowding = np.zeros(len(y))
+    for r, front in enumerate(_fronts(y)):
+        rank[front] = r
+        crowding[front] = _crowding(y[front])
+    return rank, crowding
+
+
+
+def _select(y:np.ndarray, n:int) -> list:
+    """Indices of the `n` best candidates, by front and crowding distance."""
+    selected = []
+    for front in _fronts(y):
+        if len(selected) + len(front) <= n:
+            selected.extend(front)
+        else:
+            crowding = _crowding(y[front])
+            order = np.argsort(-crowding, kind='stable')
+            selected.extend(front[i] for i in order[:n - len(selected)])
+            break
+    return selected
+
+
+
+def _tournament(rng, rank:np.ndarray, crowding:np.ndarray) -> int:
+    i, j = rng.integers(len(rank), size=2)
+    if rank[i] != rank[j]:
+        return int(i if rank[i] < rank[j] else j)
+    return int(i if crowding[i] >= crowding[j] else j)
+
+
+
+def _crossover(rng, a:tuple, b:tuple) -> tuple:
+    """Uniform crossover of two candidates."""
+    return tuple(x if keep else y for x, y, keep in zip(a, b, rng.random(len(a)) < 0.5))
+
+
+
+def _mutate(rng, genes:tuple, sizes:np.ndarray) -> tuple:
+    """Change each option with probability `1/k`, to a neighbour or at random."""
+
+    genes = list(genes)
+    for i, size in enumerate(sizes):
+        if size > 1 and rng.random() < 1 / len(sizes):
+            if rng.random() < 0.5:
+                step = 1 if rng.random() < 0.5 else -1
+                genes[i] = int(min(max(genes[i] + step, 0), size - 1))
+            else:
+                genes[i] = int(rng.integers(size))
+    return tuple(genes)
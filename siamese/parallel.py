@@ -0,0 +1,431 @@
+"""The parallel simulation submodule.
+
+The `simulate` function splits a `Line` at chosen buffers (the cuts) into
+partitions, and simulates each partition in its own process.
+
+Partitions exchange the entities that enter and leave the cut buffers through
+pipes, and synchronise with a conservative protocol: a partition only waits
+for its neighbours while one of its models is blocked by, or starving at, a
+cut buffer. Otherwise, it runs ahead, since an entity that enters or leaves a
+cut buffer later can't change what it already simulated.
+
+Every wait costs a message round trip, so splitting a line pays off when each
+partition holds many models and the cut buffers seldom run empty or full.
+
+Each model draws its values from its own seeded random stream, so the results
+match a sequential run of the same seed. Events of different partitions that
+happen at the exact same time may be processed in a different order, which
+only matters for lines with deterministic times.
+
+>>> from siamese import parallel
+>>> parallel.simulate(plant, time=10000, cuts=['shared_buffer'], seed=42)
+>>> plant.report
+
+"""
+
+from heapq import heappush
+import math
+import multiprocessing
+from multiprocessing.connection import wait
+from typing import Sequence, Union
+
+import simpy
+from simpy.core import NORMAL
+
+from siamese import _checkpoint
+from siamese.models.buffer import Buffer
+from siamese.models.line import Line, _names
+from siamese.models.router import Router
+
+
+
+# Steps between the messages a partition sends while it runs freely
+_FLUSH_STEPS = 64
+
+
+
+def simulate(
+        line:Line,
+        time:float,
+        cuts:Sequence[str],
+        seed:Union[int, str],
+        entities:bool = False
+    ) -> None:
+    """Simulate a line in parallel, partitioned at the cut buffers.
+
+    The line is simulated in place, from time zero, as `Line.simulate` would
+    do. Afterwards, its reports are available and its simulation can be
+    continued sequentially.
+
+    Parameters
+    ----------
+    line : Line
+        Line to be simulated. Its simulation must not have started.
+    time : float
+        Simulation horizon.
+    cuts : Sequence[str]
+        Names of the buffers where the line is split. Each cut buffer must be
+        filled by models of a single partition and emptied by models of
+        another one, and partitions must not be connected in a cycle.
+    seed : int | str
+        Seed of the simulation.
+    entities : bool, default=False
+        Track each entity as a `Part` record.
+
+    """
+
+    if line._started:
+        raise RuntimeError(
+            "Can't partition a started simulation. Use the `reset` method first."
+        )
+
+    partitions, roles = _partition(line, cuts)
+    if len(partitions) < 2:
+        raise ValueError('The cuts must split the line into at least two partitions.')
+
+    # One pipe for each pair of neighbour partitions
+    context = multiprocessing.get_context()
+    links = [{} for _ in partitions]
+    for writer, reader in roles.values():
+        if reader not in links[writer]:
+            links[writer][reader], links[reader][writer] = context.Pipe()
+
+    copy = line.copy()
+    results = []
+    workers = []
+    for index, names in enumerate(partitions):
+        receiver, sender = context.Pipe(duplex=False)
+        worker = context.Process(
+            target = _run_partition,
+            args = (
+                index,
+                [copy.__dict__[name] for name in names],
+                {cut: role for cut, role in roles.items() if index in role},
+                links[index],
+                time,
+                seed,
+                entities,
+                sender
+            ),
+            daemon = True
+        )
+        worker.start()
+        workers.append(worker)
+        results.append(receiver)
+
+    # Collect the states as they arrive, so any failure is raised at once
+    states = [None] * len(workers)
+    try:
+        pending = dict(zip(results, range(len(workers))))
+        while pending:
+            for receiver in wait(list(pending)):
+                index = pending.pop(receiver)
+                try:
+                    state = receiver.recv()
+                except EOFError:
+                    raise RuntimeError(f'Partition {index} stopped unexpectedly.')
+                if isinstance(state, BaseException):
+                    raise state
+                states[index] = state
+    finally:
+        for worker in workers:
+            worker.join(timeout=1)
+            if worker.is_alive():
+                worker.terminate()
+
+    _checkpoint.load(_merge(line, states, roles, time), line)
+    line._profiler = None
+    for model in line._models:
+        model._after_run()
+
+
+
+def _partition(line:Line, cuts:Sequence[str]) -> tuple:
+    """Split the models of a line into partitions.
+
+    Returns
+    -------
+    list[list[str]]
+        Names of the models of each partition, cut buffers included.
+    dict[str, tuple[int, int]]
+        Writer and reader partitions of each cut buffer.
+
+    """
+
+    cuts = list(cuts)
+    for cut in cuts:
+        if not isinstance(line.__dict__.get(cut), Buffer):
+            raise ValueError(f"There is no buffer named '{cut}' in the line.")
+
+    # Connected components of the line without the cut buffers
+    parent = {model.name: model.name for model in line._models if model.name not in cuts}
+    def find(name):
+        while parent[name] != name:
+            parent[name] = parent[parent[name]]
+            name = parent[name]
+        return name
+
+    writers = {cut: set() for cut in cuts}
+    readers = {cut: set() for cut in cuts}
+    for model in line._models:
+        for attr, users in (('input_buffer', readers), ('output_buffer', writers)):
+            for buffer in _names(getattr(model, attr, ())):
+                if buffer in users:
+                    users[buffer].add(model.name)
+                else:
+                    parent[find(model.name)] = find(buffer)
+                if buffer in cuts and attr == 'output_buffer' \
+                        and isinstance(model, Router) and model.rule == 'shortest_queue':
+                    raise ValueError(
+                        f"Router '{model.name}' can't route by shortest queue "
+                        f"to the cut buffer '{buffer}'."
+                    )
+
+    components = {}
+    for name in parent:
+        components.setdefault(find(name), []).append(name)
+    partitions = list(components.values())
+    index = {name: i for i, names in enumerate(partitions) for name in names}
+
+    roles = {}
+    for cut in cuts:
+        writer = {index[name] for name in writers[cut]}
+        reader = {index[name] for name in readers[cut]}
+        if len(writer) != 1 or len(reader) != 1 or writer == reader:
+            raise ValueError(
+                f"Buffer '{cut}' must be filled by a single partition and "
+                'emptied by another one.'
+            )
+        roles[cut] = (writer.pop(), reader.pop())
+        for i in roles[cut]:
+            partitions[i].append(cut)
+
+    # Partitions must form a forest
+    parent = list(range(len(partitions)))
+    def root(i):
+        while parent[i] != i:
+            i = parent[i]
+        return i
+    for a, b in set(tuple(sorted(role)) for role in roles.values()):
+        if root(a) == root(b):
+            raise ValueError('The cuts must not connect partitions in a cycle.')
+        parent[root(a)] = root(b)
+
+    return partitions, roles
+
+
+
+def _run_partition(
+        index:int,
+        models:list,
+        roles:dict,
+        links:dict,
+        time:float,
+        seed:Union[int, str],
+        entities:bool,
+        result
+    ) -> None:
+    """Simulate a partition in a worker process."""
+
+    try:
+        result.send(_Partition(index, models, roles, links).run(time, seed, entities))
+    except BaseException as error:
+        result.send(error)
+    finally:
+        result.close()
+
+
+
+class _Partition:
+    """A partition of a line, synchronised with its neighbours.
+
+    Promises are `(time, partition)` pairs. The promise a partition sends to a
+    neighbour is a lower bound of the time of the requests it will still send
+    it, apart from the replies to the requests of that neighbour, and ties are
+    broken by the partition index. Messages acknowledge the requests received,
+    so a partition doesn't rely on a promise sent before its own requests were
+    replayed.
+
+    """
+
+    def __init__(self, index:int, models:list, roles:dict, links:dict):
+        self.index = index
+        self.line = Line(*models)
+        self.roles = roles
+        self.links = links
+        self.peers = {cut: reader if writer == index else writer \
+            for cut, (writer, reader) in roles.items()}
+        self.promises = {peer: (0, peer) for peer in links}
+        self.sent = {peer: None for peer in links}
+        self.outbox = {peer: [] for peer in links}
+
+        # Requests sent and received, and sent requests not acknowledged yet
+        self.requests_sent = {peer: 0 for peer in links}
+        self.requests_received = {peer: 0 for peer in links}
+        self.unacknowledged = {peer: [] for peer in links}
+
+
+    def run(self, time:float, seed:Union[int, str], entities:bool) -> dict:
+        line = self.line
+        line._start(seed, entities)
+        env = line.env
+
+        # Cut buffers, by neighbour
+        self.queues = {peer: [] for peer in self.links}
+        for cut, peer in self.peers.items():
+            store = line.__dict__[cut]._buffer
+            if self.roles[cut][0] == self.index:
+                store._do_put = self._sent(cut, peer, 'put', store._do_put)
+                self.queues[peer].append(store.put_queue)
+            else:
+                store._do_get = self._sent(cut, peer, 'get', store._do_get)
+                self.queues[peer].append(store.get_queue)
+
+        steps = 0
+        while True:
+            if self._receive():
+                self._flush()
+            now = env.peek()
+            if now < time and (now, self.index) < self._limit():
+                env.step()
+                steps += 1
+                if steps % _FLUSH_STEPS == 0:
+                    self._flush()
+                continue
+
+            self._flush()
+            if now >= time and all(
+                    self._promised(peer)[0] >= time for peer in self.links):
+                break
+            wait(list(self.links.values()))
+
+        state = _checkpoint.dump(line)
+        state['random'] = None
+        return state
+
+
+    def _sent(self, cut:str, peer:int, kind:str, method):
+        """Wrap a store method to send the requests it fulfills."""
+        env = self.line.env
+        outbox = self.outbox[peer]
+        def wrapper(event):
+            result = method(event)
+            if event.triggered:
+                outbox.append((kind, cut, env.now, event.item if kind == 'put' else None))
+            return result
+        return wrapper
+
+
+    def _promised(self, peer:int) -> tuple:
+        """Promise of `peer`, including the replies to unacknowledged requests."""
+        promise = self.promises[peer]
+        if self.unacknowledged[peer]:
+            promise = min(promise, (self.unacknowledged[peer][0][1], peer))
+        elif self.outbox[peer]:
+            promise = min(promise, (self.outbox[peer][0][2], peer))
+        return promise
+
+
+    def _limit(self) -> tuple:
+        """Promises of the neighbours whose cut buffers hold waiting requests."""
+        return min((
+            self._promised(peer) for peer, queues in self.queues.items() \
+                if any(queues)
+        ), default=(math.inf, math.inf))
+
+
+    def _promise(self, peer:int) -> tuple:
+        """Lower bound of the time of the requests still to be sent to `peer`."""
+        return min([(self.line.env.peek(), self.index)] + [
+            self._promised(other) for other, queues in self.queues.items() \
+                if other != peer and any(queues)
+        ])
+
+
+    def _flush(self) -> None:
+        for peer, conn in self.links.items():
+            promise = (self._promise(peer), self.requests_received[peer])
+            outbox = self.outbox[peer]
+            if outbox or promise != self.sent[peer]:
+                if outbox:
+                    self.requests_sent[peer] += len(outbox)
+                    self.unacknowledged[peer].append(
+                        (self.requests_sent[peer], outbox[0][2])
+                    )
+                conn.send((list(outbox), promise))
+                outbox.clear()
+                self.sent[peer] = promise
+
+
+    def _receive(self) -> bool:
+        """Apply the messages of the neighbours, returning if any had requests."""
+        received = False
+        for peer, conn in self.links.items():
+            while conn.poll():
+                requests, (promise, acknowledged) = conn.recv()
+                for kind, cut, time, item in requests:
+                    self._apply(kind, cut, time, item)
+                self.promises[peer] = promise
+                self.requests_received[peer] += len(requests)
+                received = received or bool(requests)
+                unacknowledged = self.unacknowledged[peer]
+                while unacknowledged and unacknowledged[0][0] <= acknowledged:
+                    unacknowledged.pop(0)
+        return received
+
+
+    def _apply(self, kind:str, cut:str, time:float, item) -> None:
+        """Replay a request fulfilled by a neighbour at its time."""
+
+        env = self.line.env
+        store = self.line.__dict__[cut]._buffer
+
+        def replay(_=None):
+            if kind == 'put':
+                store.items.append(item)
+                store._trigger_get(None)
+            else:
+                store.items.pop(0)
+                store._trigger_put(None)
+
+        # Requests earlier than the clock didn't change the simulation so far
+        if time <= env.now:
+            replay()
+        else:
+            event = simpy.Event(env)
+            event._ok = True
+            event._value = None
+            event.callbacks.append(replay)
+            heappush(env._queue, (time, NORMAL, next(env._eid), event))
+
+
+
+def _merge(line:Line, states:list, roles:dict, time:float) -> dict:
+    """Merge the states of the partitions into the state of the line."""
+
+    models = {}
+    requests = {}
+    for i, state in enumerate(states):
+        for model_type, attributes in state['models']:
+            name = attributes['name']
+            if name not in roles or roles[name][1] == i:
+                models[name] = (model_type, attributes)
+        for name, queue in state['requests'].items():
+            requests.setdefault(name, []).extend(queue)
+
+    # Waiting gets before waiting puts, as in a single store
+    for name in roles:
+        requests[name].sort(key=lambda request: request[0] != 'get')
+
+    return {
+        'version': states[0]['version'],
+        'now': time,
+        'random': None,
+        'models': [models[model.name] for model in line._models],
+        'timeouts': sorted(
+            (entry for state in states for entry in state['timeouts']),
+            key = lambda entry: entry[0]
+        ),
+        'requests': requests,
+        'waiting': [owner for state in states for owner in state['waiting']]
+    }
@@ -0,0 +1,305 @@
+"""The global sensitivity analysis submodule.
+
+Functions that measure how much each parameter of a `Line` drives a KPI:
+- `sobol` estimates first-order and total Sobol indices through Saltelli
+  sampling;
+- `morris` estimates Morris elementary effects through random trajectories.
+
+Parameters (factors) are addressed by dotted paths, as in the `experiments`
+submodule. Each sampling plan is evaluated as a single batch by
+`experiments.sweep`, so the simulations run in parallel worker processes.
+
+>>> from siamese.sensitivity import sobol
+>>> results = sobol(
+...     line,
+...     factors = {
+...         'first_machine.processing_time.mode': (8.0, 12.0),
+...         'second_machine.failure.time_to_repair.max': (1.5, 4.0),
+...         'buffer1.capacity': (1, 20)
+...     },
+...     output = 'second_machine.items_processed',
+...     time = 1000,
+...     n = 256
+... )
+>>> results.ranking()
+
+"""
+
+from typing import Callable, Optional, Union
+
+import numpy as np
+
+from siamese.experiments import sweep, _scale
+
+
+
+class SensitivityResults:
+    """Sensitivity indices of each factor.
+
+    Attributes
+    ----------
+    method : str
+        Name of the method that estimated the indices.
+    factors : list[str]
+        Factor paths.
+    indices : dict[str, np.ndarray]
+        Each index, with one value per factor.
+    key : str
+        Name of the index used to rank factors.
+
+    Methods
+    -------
+    ranking()
+        Factors sorted by decreasing influence.
+
+    """
+
+    def __init__(self, method:str, factors:list, indices:dict, key:str):
+        self.method = method
+        self.factors = factors
+        self.indices = indices
+        self.key = key
+
+
+    def ranking(self) -> list:
+        """Factors sorted by decreasing influence.
+
+        Returns
+        -------
+        list[tuple[str, dict]]
+            Pairs of factor path and its indices.
+
+        """
+
+        order = np.argsort(-np.nan_to_num(self.indices[self.key], nan=-np.inf))
+        return [
+            (self.factors[i], {name: float(values[i]) \
+                for name, values in self.indices.items()}) for i in order
+        ]
+
+
+    def __str__(self):
+        names = list(self.indices)
+        width = max(len(factor) for factor in self.factors)
+        lines = [
+            f'{self.method} sensitivity',
+            f"{'Factor':<{width}}  " + '  '.join(f'{name:>10}' for name in names),
+            '-' * (width + 12*len(names))
+        ]
+        for factor, indices in self.ranking():
+            lines.append(f'{factor:<{width}}  ' \
+                + '  '.join(f'{indices[name]:>10.4f}' for name in names))
+        return '\n'.join(lines)
+
+
+    def __repr__(self):
+        return self.__str__()
+
+
+
+def sobol(
+        line,
+        factors:dict,
+        output:Union[str, Callable],
+        time:float,
+        n:int = 128,
+        replications:int = 1,
+        seed:int = 0,
+        workers:Optional[int] = None
+    ) -> SensitivityResults:
+    """First-order and total Sobol indices.
+
+    The line is simulated at `n * (k + 2)` points of a Saltelli sampling plan,
+    where `k` is the number of factors. Indices are estimated through the
+    Saltelli (first-order) and Jansen (total) estimators.
+
+    Parameters
+    ----------
+    line : Line
+        Base line.
+    factors : dict[str, tuple | Sequence]
+        Range of each factor, by parameter path. A `(min, max)` tuple defines
+        a continuous range, which is sampled as integers if both bounds are
+        integers. A list defines the possible values of the factor.
+    output : str | Callable
+        Name of a KPI column, such as `'last_machine.items_processed'`, or a
+        function that computes the output from a row of KPIs.
+    time : float
+        Simulation horizon.
+    n : int, default=128
+        Number of base samples.
+    replications : int, default=1
+        Number of simulations of each point, whose outputs are averaged.
+    seed : int, default=0
+        Random state of the sampling plan and seed of the first replication.
+    workers : int, optional
+        Number of worker processes.
+
+    Returns
+    -------
+    SensitivityResults
+        Indices `'S1'` (first-order) and `'ST'` (total), ranked by `'ST'`.
+
+    """
+
+    paths = list(factors)
+    k = len(paths)
+    rng = np.random.default_rng(seed)
+    a = rng.random((n, k))
+    b = rng.random((n, k))
+
+    plan = [a, b]
+    for i in range(k):
+        ab = a.copy()
+        ab[:, i] = b[:, i]
+        plan.append(ab)
+    y = _evaluate(line, factors, np.vstack(plan), output, time,
+        replications, seed, workers).reshape(k+2, n)
+
+    y_a, y_b, y_ab = y[0], y[1], y[2:]
+    variance = np.var(np.concatenate([y_a, y_b]))
+    if variance == 0:
+        first = total = np.full(k, np.nan)
+    else:
+        first = np.mean(y_b * (y_ab - y_a), axis=1) / variance
+        total = 0.5 * np.mean((y_a - y_ab)**2, axis=1) / variance
+
+    return SensitivityResults(
+        method = 'Sobol',
+        factors = paths,
+        indices = {'S1': first, 'ST': total},
+        key = 'ST'
+    )
+
+
+
+def morris(
+        line,
+        factors:dict,
+        output:Union[str, Callable],
+        time:float,
+        trajectories:int = 10,
+        levels:int = 4,
+        replications:int = 1,
+        seed:int = 0,
+        workers:Optional[int] = None
+    ) -> SensitivityResults:
+    """Morris elementary effects.
+
+    The line is simulated along `trajectories` random one-at-a-time paths over
+    a grid of `levels` levels per factor, for `trajectories * (k + 1)`
+    points, where `k` is the number of factors.
+
+    Parameters
+    ----------
+    line : Line
+        Base line.
+    factors : dict[str, tuple | Sequence]
+        Range of each factor, by parameter path, as in `sobol`.
+    output : str | Callable
+        Name of a KPI column, or a function that computes the output from a
+        row of KPIs.
+    time : float
+        Simulation horizon.
+    trajectories : int, default=10
+        Number of trajectories.
+    levels : int, default=4
+        Number of grid levels per factor. It should be even.
+    replications : int, default=1
+        Number of simulations of each point, whose outputs are averaged.
+    seed : int, default=0
+        Random state of the trajectories and seed of the first replication.
+    workers : int, optional
+        Number of worker processes.
+
+    Returns
+    -------
+    SensitivityResults
+        Indices `'mu'`, `'mu_star'` (mean absolute effect) and `'sigma'`
+        of the elementary effects, ranked by `'mu_star'`.
+
+    """
+
+    if levels < 2:
+        raise ValueError('`levels` must be at least 2.')
+
+    paths = list(factors)
+    k = len(paths)
+    rng = np.random.default_rng(seed)
+    delta = levels / (2 * (levels - 1))
+    grid = np.arange(levels // 2) / (levels - 1)
+
+    points = []
+    steps = []
+    for _ in range(trajectories):
+        x = rng.choice(grid, size=k)
+        order = rng.permutation(k)
+        points.append(x.copy())
+        for i in order:
+            x[i] += delta
+            points.append(x.copy())
+        steps.append(order)
+
+    # Map grid points to the center of their strata, so integer and
+    # categorical factors change between consecutive levels.
+    u = np.vstack(points) * (levels - 1) / levels + 1 / (2*levels)
+    y = _evaluate(line, factors, u, output, time, replications, seed, workers) \
+        .reshape(trajectories, k+1)
+
+    effects = np.empty((trajectories, k))
+    for t, order in enumerate(steps):
+        for j, i in enumerate(order):
+            effects[t, i] = (y[t, j+1] - y[t, j]) / delta
+
+    return SensitivityResults(
+        method = 'Morris',
+        factors = paths,
+        indices = {
+            'mu': effects.mean(axis=0),
+            'mu_star': np.abs(effects).mean(axis=0),
+            'sigma': effects.std(axis=0, ddof=1) if trajectories > 1 \
+                else np.full(k, np.nan)
+        },
+        key = 'mu_star'
+    )
+
+
+
+def _evaluate(
+        line,
+        factors:dict,
+        u:np.ndarray,
+        output:Union[str, Callable],
+        time:float,
+        replications:int,
+        seed:int,
+        workers:Optional[int]
+    ) -> np.ndarray:
+    """Simulate a sampling plan of uniform values and return its outputs."""
+
+    columns = [_scale(u[:, j], bounds) for j, bounds in enumerate(factors.values())]
+    design = [dict(zip(factors, values)) for values in zip(*columns)]
+
+    results = sweep(
+        line = line,
+        design = design,
+        time = time,
+        replications = replications,
+        seed = seed,
+        workers = workers
+    )
+
+    if len(results) < len(design) * replications:
+        raise RuntimeError('The sampling plan evaluation was interrupted.')
+
+    columns = results.columns
+    if callable(output):
+        values = [output(dict(zip(columns, row))) for row in zip(*columns.values())]
+    else:
+        if output not in columns:
+            raise ValueError(f"There is no KPI named '{output}'.")
+        values = columns[output]
+
+    y = np.zeros(len(design))
+    np.add.at(y, np.asarray(columns['point']), np.asarray(values, dtype=float))
+    return y / replications
@@ -0,0 +1,588 @@
+"""The what-if service submodule.
+
+`WhatIfService` is a local HTTP server that answers what-if questions about a
+set of lines: what their KPIs would be with some parameters overridden. Lines
+are loaded once, and a pool of worker processes that hold them is kept warm,
+so each question only pays for its own simulations. Answers are kept in
+memory, and in an optional `ResultCache`, so repeated questions are answered
+at once.
+
+Endpoints, all of them JSON:
+- `GET /health`: whether the service is up;
+- `GET /lines`: names of the lines and of their models;
+- `GET /lines/<name>`: configuration of a line, as `Line.to_config`;
+- `POST /simulate`: KPIs of a line with overridden parameters.
+
+The body of a `POST /simulate` request is:
+
+>>> {
+...     'line': 'plant',
+...     'parameters': {
+...         'buffer1.capacity': 12,
+...         'press1.processing_time': {'type': 'Uniform', 'min': 8, 'max': 11}
+...     },
+...     'time': 10000,
+...     'seed': 0,
+...     'replications': 10,
+...     'stream': True
+... }
+
+Parameters are addressed by dotted paths, as in the `experiments` submodule,
+and distributions and failures are given as in `Line.from_config`. Single
+replications answer the KPIs of each model, and many replications answer
+their statistics, as in `ReplicationReport`. Streamed answers are sent as
+JSON lines: one with the `time` reached by a `replication` at every tenth of
+the horizon, one with the number of replications `done` whenever one is
+done, and a last one with the answer.
+
+>>> from siamese.service import WhatIfService
+>>> service = WhatIfService({'plant': 'plant.yaml'}, port=8000, workers=4)
+>>> service.run()
+
+$ curl -X POST localhost:8000/simulate -d '{"line": "plant", "time": 1000}'
+
+"""
+
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import count
+import json
+import math
+import multiprocessing
+import os
+from typing import Optional, Union
+from urllib.parse import urlsplit
+
+from siamese import _config
+from siamese.cache import ResultCache
+from siamese.experiments import SweepResults, _run, _set_parameter
+from siamese._reports import ReplicationReport
+
+
+
+_REASONS = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    413: 'Payload Too Large',
+    500: 'Internal Server Error'
+}
+
+# Biggest request body accepted, in bytes
+_MAX_BODY = 1 << 20
+
+# Progress messages of each replication
+_STEPS = 10
+
+
+
+class WhatIfService:
+    """Local HTTP server of what-if simulations.
+
+    Parameters
+    ----------
+    lines : dict[str, Line | dict | str]
+        Lines by name, or their configurations, or the paths of their JSON or
+        YAML configuration files.
+    host : str, default='127.0.0.1'
+        Address the server listens to.
+    port : int, default=8000
+        Port the server listens to. If 0, a free port is picked.
+    workers : int, optional
+        Number of worker processes. If `None`, the number of CPUs is used.
+    cache : ResultCache, optional
+        Cache of simulation results, kept between runs of the service.
+    max_results : int, default=1024
+        Number of answers kept in memory, the least recently asked being
+        discarded first.
+
+    Attributes
+    ----------
+    lines : dict[str, Line]
+        Lines by name.
+    port : int
+        Port the server listens to, once started.
+    workers : int
+        Number of worker processes.
+    hits : int
+        Number of questions answered from memory.
+
+    Methods
+    -------
+    run()
+        Serve until interrupted.
+    start()
+        Start serving, in a running event loop.
+    close()
+        Stop serving and shut the worker processes down.
+    ask(query, progress=None)
+        Answer a what-if question, in a running event loop.
+
+    """
+
+    def __init__(
+            self,
+            lines:dict,
+            host:str = '127.0.0.1',
+            port:int = 8000,
+            workers:Optional[int] = None,
+            cache:Optional[ResultCache] = None,
+            max_results:int = 1024
+        ):
+
+        # Avoid circular imports
+        from siamese.models.line import Line
+
+        if not lines:
+            raise ValueError('At least one line must be served.')
+
+        self.lines = {
+            name: line if isinstance(line, Line) else Line.from_config(line) \
+                for name, line in lines.items()
+        }
+        for name, line in self.lines.items():
+            if line._started:
+                raise ValueError(f"Line '{name}' must not be simulated.")
+
+        self.host = host
+        self.port = port
+        self.workers = workers or os.cpu_count()
+        self.cache = cache
+        self.hits = 0
+        self._max_results = max_results
+        self._results = OrderedDict()
+        self._pending = {}
+        self._server = None
+        self._relay_task = None
+
+        # Workers send the progress of the replications of each question
+        self._progress = multiprocessing.Queue()
+        self._jobs = {}
+        self._job_ids = count()
+
+        self._executor = ProcessPoolExecutor(
+            max_workers = self.workers,
+            initializer = _set_lines,
+            initargs = (self.lines, self._progress)
+        )
+
+
+    def run(self) -> None:
+        """Serve until interrupted.
+
+        The service is closed, also when it fails to start, before the
+        `KeyboardInterrupt` or the error is raised again.
+
+        """
+
+        async def serve():
+            try:
+                await self.start()
+                await self._server.serve_forever()
+            finally:
+                await self.close()
+
+        asyncio.run(serve())
+
+
+    async def start(self) -> None:
+        """Start serving, in a running event loop."""
+
+        # Workers load the lines right away, instead of on the first question
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*[
+            loop.run_in_executor(self._executor, os.getpid) \
+                for _ in range(self.workers)
+        ])
+
+        self._relay_task = asyncio.create_task(self._relay())
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+
+    async def close(self) -> None:
+        """Stop serving and shut the worker processes down."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        # Waiting for the workers to exit would block the event loop
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None,
+            partial(self._executor.shutdown, cancel_futures=True))
+        if self._relay_task is not None:
+            self._progress.put(None)
+            await self._relay_task
+            self._relay_task = None
+
+
+    async def ask(self, query:dict, progress=None) -> dict:
+        """Answer a what-if question, in a running event loop.
+
+        Parameters
+        ----------
+        query : dict
+            Body of a `POST /simulate` request.
+        progress : Callable, optional
+            Coroutine function awaited with a progress message: the `time`
+            reached by a `replication`, at every tenth of the horizon, and
+            the number of replications `done`, whenever one is done.
+
+        Returns
+        -------
+        dict
+            Answer to the question, with whether it was `cached`.
+
+        """
+
+        name, parameters, time, seed, replications, confidence = self._parse(query)
+        key = json.dumps(
+            [name, query.get('parameters', {}), time, seed, replications, confidence],
+            sort_keys = True
+        )
+
+        if key in self._results:
+            self._results.move_to_end(key)
+            self.hits += 1
+            return {'cached': True, **self._results[key]}
+
+        # Identical questions asked at the same time share their simulations
+        if key in self._pending:
+            answer = await asyncio.shield(self._pending[key])
+            return {'cached': True, **answer}
+
+        loop = asyncio.get_running_loop()
+        self._pending[key] = pending = loop.create_future()
+        try:
+            answer = await self._simulate(
+                name, parameters, time, seed, replications, confidence, progress)
+        except Exception as error:
+            pending.set_exception(error)
+            pending.exception()
+            raise
+        except BaseException:
+            pending.cancel()
+            raise
+        finally:
+            del self._pending[key]
+
+        pending.set_result(answer)
+        self._results[key] = answer
+        if len(self._results) > self._max_results:
+            self._results.popitem(last=False)
+        return {'cached': False, **answer}
+
+
+    def _parse(self, query:dict) -> tuple:
+        """Validate a question and create its parameter values."""
+
+        if not isinstance(query, dict):
+            raise ValueError('The question must be a JSON object.')
+        unknown = set(query) - {
+            'line', 'parameters', 'time', 'seed', 'replications', 'confidence', 'stream'
+        }
+        if unknown:
+            raise ValueError(f'Unknown fields {sorted(unknown)}.')
+
+        name = query.get('line')
+        if name is None and len(self.lines) == 1:
+            name = next(iter(self.lines))
+        if name not in self.lines:
+            raise LookupError(f"There is no line named '{name}'.")
+
+        time = query.get('time')
+        if not _number(time) or time <= 0:
+            raise ValueError('`time` must be a positive number.')
+        seed = query.get('seed', 0)
+        if not isinstance(seed, int) or isinstance(seed, bool):
+            raise ValueError('`seed` must be an integer.')
+        replications = query.get('replications', 1)
+        if not isinstance(replications, int) or isinstance(replications, bool) \
+                or replications <= 0:
+            raise ValueError('`replications` must be a positive integer.')
+        confidence = query.get('confidence', 0.95)
+        if not _number(confidence) or not 0 < confidence < 1:
+            raise ValueError('`confidence` must be between 0 and 1.')
+
+        parameters = query.get('parameters', {})
+        if not isinstance(parameters, dict):
+            raise ValueError('`parameters` must be an object.')
+        parameters = {
+            path: _config.decode(value, f'parameters.{path}') \
+                for path, value in parameters.items()
+        }
+        probe = self.lines[name].copy()
+        for path, value in parameters.items():
+            _set_parameter(probe, path, value)
+
+        return name, parameters, time, seed, replications, confidence
+
+
+    async def _simulate(
+            self,
+            name:str,
+            parameters:dict,
+            time:float,
+            seed:int,
+            replications:int,
+            confidence:float,
+            progress
+        ) -> dict:
+        """Simulate every replication of a question in the worker processes."""
+
+        job = None
+        if progress is not None:
+            job = next(self._job_ids)
+            self._jobs[job] = (progress, set(), set(), asyncio.Event())
+
+        loop = asyncio.get_running_loop()
+        futures = [
+            loop.run_in_executor(self._executor, _replicate,
+                name, parameters, time, seed + r, r, self.cache, job) \
+                    for r in range(replications)
+        ]
+
+        results = SweepResults(parameters)
+        try:
+            for future in asyncio.as_completed(futures):
+                results.append(await future)
+                if progress is not None:
+                    await progress({'done': len(results), 'replications': replications})
+            if job is not None:
+                # Replications may finish before their messages are relayed
+                _, _, ended, relayed = self._jobs[job]
+                while len(ended) < replications:
+                    relayed.clear()
+                    await relayed.wait()
+        finally:
+            for future in futures:
+                future.cancel()
+            if job is not None:
+                # Messages relayed so far are sent before the answer
+                _, tasks, _, _ = self._jobs.pop(job)
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+        if replications == 1:
+            kpis = {}
+            row = dict(zip(results.columns, (values[0] for values in results.columns.values())))
+            for column, value in row.items():
+                if column in results.parameters or column in ('point', 'replication', 'seed'):
+                    continue
+                model, kpi = column.rsplit('.', 1)
+                kpis.setdefault(model, {})[kpi] = value
+            return {'kpis': _finite(kpis)}
+
+        return {'kpis': _finite(_statistics(ReplicationReport(results, confidence)))}
+
+
+    async def _relay(self) -> None:
+        """Pass the progress messages of the workers on to their questions."""
+
+        loop = asyncio.get_running_loop()
+        while True:
+            message = await loop.run_in_executor(None, self._progress.get)
+            if message is None:
+                return
+            job, replication, time = message
+            if job not in self._jobs:
+                continue
+            progress, tasks, ended, relayed = self._jobs[job]
+            if time is None:
+                ended.add(replication)
+                relayed.set()
+                continue
+            task = asyncio.create_task(progress({'replication': replication, 'time': time}))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+
+    async def _handle(self, reader, writer) -> None:
+        """Answer an HTTP request."""
+
+        try:
+            try:
+                method, path, body = await _read_request(reader)
+            except ValueError as error:
+                return await _respond(writer, 400, {'error': str(error)})
+            except OverflowError as error:
+                return await _respond(writer, 413, {'error': str(error)})
+            except asyncio.IncompleteReadError:
+                # The client disconnected mid-request
+                return
+
+            route = urlsplit(path).path.rstrip('/') or '/'
+            if route == '/health':
+                return await _respond(writer, 200, {'status': 'ok', 'lines': len(self.lines)})
+            if route == '/lines':
+                return await _respond(writer, 200, {
+                    name: [model.name for model in line._models] \
+                        for name, line in self.lines.items()
+                })
+            if route.startswith('/lines/'):
+                line = self.lines.get(route[len('/lines/'):])
+                if line is None:
+                    return await _respond(writer, 404, {'error': 'There is no such line.'})
+                return await _respond(writer, 200, line.to_config())
+            if route != '/simulate':
+                return await _respond(writer, 404, {'error': f"There is no endpoint '{route}'."})
+            if method != 'POST':
+                return await _respond(writer, 405, {'error': 'Use POST to simulate.'})
+
+            try:
+                query = json.loads(body or b'{}')
+            except ValueError:
+                return await _respond(writer, 400, {'error': 'The body is not valid JSON.'})
+
+            if isinstance(query, dict) and query.get('stream'):
+                return await self._stream(writer, query)
+
+            try:
+                answer = await self.ask(query)
+            except LookupError as error:
+                return await _respond(writer, 404, {'error': str(error)})
+            except (ValueError, TypeError) as error:
+                return await _respond(writer, 400, {'error': str(error)})
+            except Exception as error:
+                return await _respond(writer, 500,
+                    {'error': f'{type(error).__name__}: {error}'})
+            await _respond(writer, 200, answer)
+
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+    async def _stream(self, writer, query:dict) -> None:
+        """Answer a question as JSON lines, sent as replications are done."""
+
+        writer.write(
+            b'HTTP/1.1 200 OK\r\n'
+            b'Content-Type: application/x-ndjson\r\n'
+            b'Transfer-Encoding: chunked\r\n'
+            b'Connection: close\r\n\r\n'
+        )
+
+        async def send(message):
+            data = json.dumps(message).encode() + b'\n'
+            writer.write(b'%x\r\n%s\r\n' % (len(data), data))
+            await writer.drain()
+
+        try:
+            await send(await self.ask(query, send))
+        except Exception as error:
+            await send({'error': f'{type(error).__name__}: {error}'})
+        writer.write(b'0\r\n\r\n')
+        await writer.drain()
+
+
+
+# Lines of a worker process, by name, and the queue of its progress messages
+_lines = {}
+_progress = None
+
+
+
+def _set_lines(lines:dict, progress) -> None:
+    global _lines, _progress
+    _lines = lines
+    _progress = progress
+
+
+
+def _replicate(
+        name:str,
+        parameters:dict,
+        time:float,
+        seed:int,
+        replication:int,
+        cache:Optional[ResultCache],
+        job:Optional[int] = None
+    ) -> dict:
+    """Simulate a replication of a line of the worker process, sending its
+    progress if it's part of a `job`."""
+
+    if job is None:
+        return _run(_lines[name], parameters, time, seed, 0, replication, cache=cache)
+
+    def progress(now):
+        _progress.put((job, replication, now))
+
+    # A `None` time ends the messages of the replication
+    try:
+        return _run(_lines[name], parameters, time, seed, 0, replication, cache=cache,
+            progress=progress, progress_interval=time / _STEPS)
+    finally:
+        progress(None)
+
+
+
+def _statistics(report:ReplicationReport) -> dict:
+    """Statistics of each KPI of the first scenario of a report, by model."""
+    columns = report.to_dict()
+    stats = [c for c in columns if c not in ('point', 'model', 'kpi')]
+    kpis = {}
+    for i, (model, kpi) in enumerate(zip(columns['model'], columns['kpi'])):
+        if columns['point'][i] == report.points[0]:
+            kpis.setdefault(model, {})[kpi] = {s: columns[s][i].item() for s in stats}
+    return kpis
+
+
+
+async def _read_request(reader) -> tuple:
+    """Method, path and body of an HTTP request."""
+
+    line = await reader.readline()
+    try:
+        method, path, _ = line.decode('latin-1').split()
+    except ValueError:
+        raise ValueError('Malformed request line.')
+
+    length = 0
+    while True:
+        header = await reader.readline()
+        if header in (b'\r\n', b'\n', b''):
+            break
+        key, _, value = header.decode('latin-1').partition(':')
+        if key.strip().lower() == 'content-length':
+            try:
+                length = int(value)
+            except ValueError:
+                raise ValueError('Malformed Content-Length header.')
+
+    if length > _MAX_BODY:
+        raise OverflowError(f'The body must have at most {_MAX_BODY} bytes.')
+    body = await reader.readexactly(length) if length else b''
+    return method.upper(), path, body
+
+
+
+async def _respond(writer, status:int, content:Union[dict, list]) -> None:
+    data = json.dumps(content).encode()
+    writer.write(
+        f'HTTP/1.1 {status} {_REASONS[status]}\r\n'
+        'Content-Type: application/json\r\n'
+        f'Content-Length: {len(data)}\r\n'
+        'Connection: close\r\n\r\n'.encode() + data
+    )
+    await writer.drain()
+
+
+
+def _finite(value):
+    """Replace NaN and infinite values, which JSON doesn't allow, by `None`."""
+    if isinstance(value, dict):
+        return {k: _finite(v) for k, v in value.items()}
+    if hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+
+def _number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
@@ -13,3 +13,18 @@ class Status(Enum):
     PROCESSING = 2
     BLOCKED = 3
     FAILURE = 4
+
+
+
+class BufferEvent(Enum):
+    """Events of a `Buffer` that can be observed during a simulation.
+
+    `FULL` and `EMPTY` happen when the buffer reaches its capacity or gets
+    empty. `PUT` and `GET` happen whenever an entity enters or leaves it.
+    
+    """
+
+    FULL = 1
+    EMPTY = 2
+    PUT = 3
+    GET = 4
@@ -0,0 +1,253 @@
+"""The time series submodule.
+
+A `KPITracker` accumulates the KPIs of a `Line` in fixed time windows, such as
+shifts or hours, while the simulation runs:
+- Time in each status, throughput, utilization and OEE of each `Source` and
+  `Machine`;
+- Throughput and time-weighted WIP of each `Buffer`.
+
+Accumulators are updated at each status transition and buffer request observed
+through `Line.subscribe`, so no event is stored.
+
+>>> from siamese.timeseries import KPITracker
+>>> tracker = KPITracker(line, window=60)
+>>> line.simulate(8*60)
+>>> tracker.to_frame()
+
+"""
+
+from typing import Optional
+
+import numpy as np
+
+from siamese import _windows
+from siamese.distributions import _create_dist
+from siamese.status import BufferEvent, Status
+from siamese._hooks import METHODS
+from siamese.models.buffer import Buffer
+
+
+
+class KPITracker:
+    """Windowed KPIs of the models of a line.
+
+    Machine KPIs are computed over the time observed in each window:
+    - `availability` is the share of time not broken;
+    - `utilization` is the share of available time processing;
+    - `performance` is the ideal time of the entities produced, taken as the
+      mean processing time, over the available time;
+    - `oee` is the product of availability and performance, as every entity
+      is considered good.
+
+    Parameters
+    ----------
+    line : Line
+        Line to be observed.
+    window : float
+        Length of the time windows.
+    models : list[str], optional
+        Names of the models to be tracked, instead of every model.
+
+    Methods
+    -------
+    detach()
+        Stop observing the line.
+    to_numpy()
+        KPIs as NumPy arrays.
+    to_frame()
+        KPIs as a pandas DataFrame, indexed by window start.
+
+    """
+
+    def __init__(self, line, window:float, models:Optional[list]=None):
+
+        if window <= 0:
+            raise ValueError('`window` must be bigger than zero.')
+
+        if models is None:
+            models = [model.name for model in line._models]
+
+        self.line = line
+        self.window = window
+        self.machines = []
+        self.buffers = []
+        self._subscriptions = []
+
+        for name in models:
+            model = line.__dict__.get(name)
+            if isinstance(model, Buffer):
+                self.buffers.append(name)
+                events = (BufferEvent.PUT, BufferEvent.GET)
+            else:
+                events = [s for s in Status if hasattr(model, METHODS[s])]
+                if not events:
+                    continue
+                self.machines.append(name)
+            self._subscriptions.extend((name, event) for event in events)
+
+        self._machine_index = {name: i for i, name in enumerate(self.machines)}
+        self._buffer_index = {name: i for i, name in enumerate(self.buffers)}
+
+        # Machines
+        self._status = [None] * len(self.machines)
+        self._since = [None] * len(self.machines)
+        self._times = {status: [[] for _ in self.machines] for status in Status}
+        self._produced = [[] for _ in self.machines]
+
+        # Buffers
+        self._content = [0] * len(self.buffers)
+        self._changed = [line.now] * len(self.buffers)
+        self._area = [[] for _ in self.buffers]
+        self._observed = [[] for _ in self.buffers]
+        self._peak = [[] for _ in self.buffers]
+        self._puts = [[] for _ in self.buffers]
+
+        # Continue a started simulation from its current state
+        if line._started:
+            for i, name in enumerate(self.machines):
+                model = line.__dict__[name]
+                self._status[i] = Status.FAILURE if model._repairing else model.status
+                self._since[i] = line.now
+            for i, name in enumerate(self.buffers):
+                self._content[i] = line.__dict__[name].content
+
+        for name, event in self._subscriptions:
+            callback = self._on_request if isinstance(event, BufferEvent) \
+                else self._on_transition
+            line.subscribe(name, event, callback)
+
+
+    def detach(self) -> None:
+        """Stop observing the line."""
+        for name, event in self._subscriptions:
+            callback = self._on_request if isinstance(event, BufferEvent) \
+                else self._on_transition
+            self.line.unsubscribe(name, event, callback)
+        self._subscriptions = []
+
+
+    def to_numpy(self) -> dict:
+        """KPIs as NumPy arrays.
+
+        The time spent in the current status and the current buffer content
+        are accounted up to the current simulation time.
+
+        Returns
+        -------
+        dict[str, np.ndarray]
+            The start time of each window, as `'window'`, and the KPIs of each
+            window, as columns named `'model.kpi'`.
+
+        """
+
+        now = self.line.now
+        n = max(int(np.ceil(now / self.window)), 1)
+        columns = {'window': np.arange(n) * self.window}
+
+        # Machines
+        times = {}
+        for status in Status:
+            windows = [list(w) for w in self._times[status]]
+            for i, since in enumerate(self._since):
+                if self._status[i] == status:
+                    _windows.add(windows[i], since, now, self.window)
+            times[status] = _windows.to_array(windows, n)
+        produced = _windows.to_array(self._produced, n)
+
+        observed = sum(times.values())
+        available = observed - times[Status.FAILURE]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            availability = np.where(observed > 0, available / observed, np.nan)
+            utilization = np.where(available > 0,
+                times[Status.PROCESSING] / available, np.nan)
+            performance = np.where(available > 0,
+                produced * self._ideal_cycle_times()[:, None] / available, np.nan)
+
+        for i, name in enumerate(self.machines):
+            columns[f'{name}.throughput'] = produced[i]
+            columns[f'{name}.time_starved'] = times[Status.STARVING][i]
+            columns[f'{name}.time_processing'] = times[Status.PROCESSING][i]
+            columns[f'{name}.time_blocked'] = times[Status.BLOCKED][i]
+            columns[f'{name}.time_broken'] = times[Status.FAILURE][i]
+            columns[f'{name}.availability'] = availability[i]
+            columns[f'{name}.utilization'] = utilization[i]
+            columns[f'{name}.performance'] = performance[i]
+            columns[f'{name}.oee'] = availability[i] * performance[i]
+
+        # Buffers
+        area = [list(w) for w in self._area]
+        observed = [list(w) for w in self._observed]
+        peak = [list(w) for w in self._peak]
+        for i, content in enumerate(self._content):
+            _windows.add(area[i], self._changed[i], now, self.window, content)
+            _windows.add(observed[i], self._changed[i], now, self.window)
+            self._update_peak(peak[i], self._changed[i], now, content)
+        area = _windows.to_array(area, n)
+        observed = _windows.to_array(observed, n)
+        peak = _windows.to_array(peak, n)
+        puts = _windows.to_array(self._puts, n)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            wip = np.where(observed > 0, area / observed, np.nan)
+
+        for i, name in enumerate(self.buffers):
+            columns[f'{name}.throughput'] = puts[i]
+            columns[f'{name}.wip'] = wip[i]
+            columns[f'{name}.max_wip'] = peak[i]
+
+        return columns
+
+
+    def to_frame(self):
+        """KPIs as a pandas DataFrame, indexed by window start."""
+        try:
+            import pandas as pd
+        except ImportError:
+            raise ImportError('`to_frame` requires pandas to be installed.')
+        return pd.DataFrame(self.to_numpy()).set_index('window')
+
+
+    def _ideal_cycle_times(self) -> np.ndarray:
+        """Mean processing time of each machine, or NaN if it's unknown."""
+        times = []
+        for name in self.machines:
+            mean = _create_dist(self.line.__dict__[name].processing_time).expected_value
+            times.append(np.nan if mean is None else mean)
+        return np.array(times, dtype=float)
+
+
+    def _on_transition(self, model, status, time) -> None:
+        i = self._machine_index[model.name]
+        previous = self._status[i]
+        if previous is not None:
+            _windows.add(self._times[previous][i], self._since[i], time, self.window)
+            if previous == Status.PROCESSING and status == Status.BLOCKED:
+                _windows.count(self._produced[i], time, self.window)
+        self._status[i] = status
+        self._since[i] = time
+
+
+    def _on_request(self, model, event, time) -> None:
+        i = self._buffer_index[model.name]
+        content = self._content[i]
+        _windows.add(self._area[i], self._changed[i], time, self.window, content)
+        _windows.add(self._observed[i], self._changed[i], time, self.window)
+        self._update_peak(self._peak[i], self._changed[i], time, content)
+        if event == BufferEvent.PUT:
+            _windows.count(self._puts[i], time, self.window)
+            content += 1
+        else:
+            content -= 1
+        self._update_peak(self._peak[i], time, time, content)
+        self._content[i] = content
+        self._changed[i] = time
+
+
+    def _update_peak(self, windows:list, start:float, end:float, content:int) -> None:
+        """Raise the peak content of the windows between `start` and `end`."""
+        first = int(start // self.window)
+        last = max(int(np.ceil(end / self.window)) - 1, first)
+        if len(windows) <= last:
+            windows.extend([0] * (last + 1 - len(windows)))
+        for i in range(first, last + 1):
+            windows[i] = max(windows[i], content)
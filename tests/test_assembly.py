@@ -0,0 +1,62 @@
+"""Assemblies must take exactly one entity from each input buffer."""
+
+import pytest
+
+from siamese import Assembly, Buffer, Line, Sink, Source
+from siamese.distributions import Exponential
+from siamese.failures import TimeFailure
+
+
+
+def make_line(failure=None):
+    return Line(
+        Source('source1', processing_time=Exponential(2), output_buffer='buffer1'),
+        Buffer('buffer1', capacity=3),
+        Source('source2', processing_time=Exponential(1), output_buffer='buffer2'),
+        Buffer('buffer2', capacity=2),
+        Assembly('assembly', processing_time=Exponential(0.5), input_buffer=['buffer1', 'buffer2'],
+            output_buffer='buffer3', failure=failure),
+        Buffer('buffer3', capacity=10**6),
+        Sink('sink', 'buffer3')
+    )
+
+
+
+def record_parts(sink) -> list:
+    parts = []
+    receive = sink._receive
+    sink._receive = lambda part: parts.append(part) or receive(part)
+    return parts
+
+
+
+@pytest.mark.parametrize('failure', [None, TimeFailure(Exponential(5), Exponential(2))])
+def test_assembly_takes_one_entity_from_each_buffer(failure):
+    line = make_line(failure)
+    line.simulate(10000, seed=1)
+    assembled = line.assembly.items_processed
+
+    # Each source is ahead by at most what its buffer, the assembly and
+    # itself hold when the run stops
+    assert 0 <= line.source1.items_processed - assembled <= 3 + 2
+    assert 0 <= line.source2.items_processed - assembled <= 2 + 2
+    assert line.sink.items_received == assembled
+
+
+
+def test_slowest_input_paces_the_assembly():
+    line = make_line()
+    line.simulate(10000, seed=1)
+    assert line.assembly.items_processed == pytest.approx(10000 / 2, rel=0.05)
+    assert line.source2.time_blocked.total > line.source1.time_blocked.total
+
+
+
+def test_assembled_entity_is_the_part_of_the_first_buffer():
+    line = make_line(TimeFailure(Exponential(5), Exponential(2)))
+    parts = record_parts(line.sink)
+    line.simulate(1000, seed=1, entities=True)
+
+    assert {part.source for part in parts} == {'source1'}
+    assert [part.id for part in parts] == list(range(1, len(parts) + 1))
+    assert line.sink.lead_time.len == len(parts) > 0
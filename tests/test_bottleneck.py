@@ -0,0 +1,26 @@
+"""A machine that is always busy must be the sole bottleneck."""
+
+from siamese import Buffer, Line, Machine, Sink, Source
+from siamese.bottleneck import BottleneckDetector
+from siamese.distributions import Exponential, Uniform
+
+
+
+def test_always_busy_machine_is_sole_bottleneck():
+    line = Line(
+        Source('source', processing_time=Exponential(2), output_buffer='buffer1'),
+        Buffer('buffer1', capacity=5),
+        Machine('fast', processing_time=Uniform(2, 4), input_buffer='buffer1',
+            output_buffer='buffer2'),
+        Buffer('buffer2', capacity=5),
+        Machine('slow', processing_time=Uniform(4, 5), input_buffer='buffer2',
+            output_buffer='buffer3'),
+        Buffer('buffer3', capacity=5),
+        Sink('sink', 'buffer3')
+    )
+    detector = BottleneckDetector(line, window=5000)
+    line.simulate(5000, seed=1)
+
+    sole = detector.report.sole.sum(axis=1) / 5000
+    assert sole[1] > 0.98
+    assert sole[0] < 0.01
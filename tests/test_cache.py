@@ -0,0 +1,17 @@
+"""The result cache must only remove the folders it created."""
+
+from siamese.cache import ResultCache
+
+
+
+def test_opening_a_cache_keeps_unrelated_folders(tmp_path):
+    project = tmp_path / 'project'
+    project.mkdir()
+    (project / 'data.csv').write_text('1,2,3')
+    stale = tmp_path / 'siamese-cache' / '0.0.0-old'
+    stale.mkdir(parents=True)
+
+    ResultCache(str(tmp_path))
+
+    assert (project / 'data.csv').exists()
+    assert not stale.exists()
@@ -0,0 +1,97 @@
+"""The command-line runner must report its outcome through its exit code."""
+
+import csv
+import json
+
+import pytest
+
+from siamese import Line
+from siamese.cli import EXIT_FAILURE, EXIT_INTERRUPTED, EXIT_OK, EXIT_USAGE, main
+
+
+
+CONFIG = {
+    'models': [
+        {'type': 'Source', 'name': 'source', 'processing_time': {'type': 'Exponential', 'mean': 3},
+            'output_buffer': 'buffer1'},
+        {'type': 'Buffer', 'name': 'buffer1', 'capacity': 3},
+        {'type': 'Machine', 'name': 'machine', 'processing_time': 2,
+            'input_buffer': 'buffer1', 'output_buffer': 'buffer2'},
+        {'type': 'Buffer', 'name': 'buffer2', 'capacity': 3},
+        {'type': 'Sink', 'name': 'sink', 'input_buffer': 'buffer2'}
+    ]
+}
+
+
+
+@pytest.fixture
+def config(tmp_path):
+    path = tmp_path / 'line.json'
+    path.write_text(json.dumps(CONFIG))
+    return str(path)
+
+
+
+def test_run_writes_the_kpis(config, capsys):
+    assert main(['run', config, '--time', '100', '--seed', '1']) == EXIT_OK
+    out, err = capsys.readouterr()
+    line = Line.from_config(CONFIG)
+    line.simulate(100, seed=1)
+    kpis = json.loads(out)
+    assert kpis['sink']['items_received'] == line.report.to_dict()['sink']['items_received']
+    assert err.count('Simulated') == 10
+    assert 'Simulated 100 of 100 (100%)' in err
+
+
+
+def test_quiet_run_prints_the_same_kpis_only(config, capsys):
+    main(['run', config, '--time', '100', '--seed', '1'])
+    out, _ = capsys.readouterr()
+    assert main(['run', config, '--time', '100', '--seed', '1', '--quiet']) == EXIT_OK
+    quiet_out, quiet_err = capsys.readouterr()
+    assert quiet_out == out
+    assert quiet_err == ''
+
+
+
+def test_trace_streams_every_status_change(config, tmp_path):
+    path = tmp_path / 'trace.csv'
+    assert main(['run', config, '--time', '100', '--seed', '1', '--quiet',
+        '--trace', str(path)]) == EXIT_OK
+    with open(path, newline='') as f:
+        rows = list(csv.DictReader(f))
+    times = [float(row['time']) for row in rows]
+    assert times == sorted(times)
+    assert {row['model'] for row in rows} == {'source', 'buffer1', 'machine', 'buffer2'}
+    assert {'PROCESSING', 'BLOCKED'} <= {row['status'] for row in rows}
+
+
+
+@pytest.mark.parametrize('arguments', [
+    ['--time', '0'],
+    ['--time', '100', '--replications', '2', '--trace', 'trace.csv'],
+    ['--time', '100', '--output', 'kpis.txt']
+])
+def test_invalid_arguments_exit_with_usage(config, arguments):
+    assert main(['run', config, *arguments, '--quiet']) == EXIT_USAGE
+
+
+
+def test_invalid_config_exits_with_usage(tmp_path):
+    path = tmp_path / 'line.json'
+    path.write_text(json.dumps({'models': [{'type': 'Buffer', 'name': 'buffer', 'capacity': -1}]}))
+    assert main(['validate', str(path), '--quiet']) == EXIT_USAGE
+    assert main(['run', str(tmp_path / 'missing.json'), '--time', '1', '--quiet']) == EXIT_USAGE
+
+
+
+@pytest.mark.parametrize('error, code', [
+    (ValueError, EXIT_FAILURE),
+    (RuntimeError, EXIT_FAILURE),
+    (KeyboardInterrupt, EXIT_INTERRUPTED)
+])
+def test_simulation_errors_exit_with_failure(config, monkeypatch, error, code):
+    def simulate(self, *args, **kwargs):
+        raise error('simulation error')
+    monkeypatch.setattr(Line, 'simulate', simulate)
+    assert main(['run', config, '--time', '100', '--quiet']) == code
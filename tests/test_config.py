@@ -0,0 +1,80 @@
+"""Configurations must round-trip through `Line`, before and after a run."""
+
+import pytest
+
+from siamese import Line
+
+
+
+CONFIG = {
+    'distributions': {
+        'press': {'type': 'Triangular', 'min': 8, 'mode': 10, 'max': 14}
+    },
+    'models': [
+        {'type': 'Source', 'name': 'source', 'processing_time': 5,
+            'output_buffer': 'buffer1'},
+        {'type': 'Buffer', 'name': 'buffer1', 'capacity': 10},
+        {'type': 'Machine', 'name': 'press1', 'processing_time': 'press',
+            'input_buffer': 'buffer1', 'output_buffer': 'buffer2',
+            'failure': {'type': 'TimeFailure', 'time_between_failures': 500,
+                'time_to_repair': {'type': 'Exponential', 'mean': 20}}},
+        {'type': 'Buffer', 'name': 'buffer2', 'capacity': 5},
+        {'type': 'Machine', 'name': 'press2', 'processing_time': 'press',
+            'input_buffer': 'buffer2', 'output_buffer': 'buffer3'},
+        {'type': 'Buffer', 'name': 'buffer3', 'capacity': 5},
+        {'type': 'Sink', 'name': 'sink', 'input_buffer': 'buffer3'}
+    ]
+}
+
+
+
+def test_config_round_trips():
+    assert Line.from_config(CONFIG).to_config() == CONFIG
+
+
+
+@pytest.mark.parametrize('seed', [None, 1])
+def test_config_round_trips_after_a_run(seed):
+    line = Line.from_config(CONFIG)
+    line.simulate(1000, seed=seed)
+    assert line.to_config() == CONFIG
+
+
+
+def test_explicit_defaults_are_accepted():
+    config = {
+        'distributions': {
+            'press': {'type': 'Choice', 'values': [8, 10], 'weights': None}
+        },
+        'models': [
+            {'type': 'Source', 'name': 'source', 'processing_time': 5,
+                'output_buffer': 'buffer1', 'failure': None},
+            {'type': 'Buffer', 'name': 'buffer1', 'capacity': 10},
+            {'type': 'Machine', 'name': 'press', 'processing_time': 'press',
+                'input_buffer': 'buffer1', 'output_buffer': 'buffer2'},
+            {'type': 'Buffer', 'name': 'buffer2', 'capacity': 5},
+            {'type': 'Sink', 'name': 'sink', 'input_buffer': 'buffer2'}
+        ]
+    }
+    line = Line.from_config(config)
+    assert line.press.processing_time.weights is None
+
+    # Defaults are left out of the exported configuration
+    exported = line.to_config()
+    assert exported['distributions']['press'] == {'type': 'Choice', 'values': [8, 10]}
+    assert 'failure' not in exported['models'][0]
+    assert Line.from_config(exported).to_config() == exported
+
+
+
+def test_file_config_round_trips(tmp_path):
+    path = str(tmp_path / 'line.json')
+    Line.from_config(CONFIG).to_config(path)
+    assert Line.from_config(path).to_config() == CONFIG
+
+
+
+def test_invalid_config_names_the_field():
+    config = {'models': CONFIG['models'][:1] + [{'type': 'Buffer', 'name': 'buffer1', 'capacity': 0}]}
+    with pytest.raises(ValueError, match=r'models\[buffer1\]\.capacity'):
+        Line.from_config(config)
@@ -0,0 +1,135 @@
+"""Empirical and weighted distributions must draw values as configured."""
+
+from collections import Counter
+import random
+
+import numpy as np
+import pytest
+
+from siamese import Buffer, Line, Machine, Sink, Source
+from siamese.distributions import Choice, Empirical, _alias_table
+from siamese.experiments import sweep
+
+
+
+def bound(distribution, seed=1):
+    distribution._random = random.Random(seed)
+    return distribution
+
+
+
+def test_alias_table_reproduces_the_weights():
+    weights = [1, 0, 5, 2.5, 0.5]
+    probability, alias = _alias_table(weights)
+    shares = list(probability)
+    for i, j in enumerate(alias):
+        shares[j] += 1 - probability[i]
+    assert np.allclose(np.array(shares) / len(weights), np.array(weights) / sum(weights))
+
+
+
+@pytest.mark.parametrize('vectorized', [False, True])
+def test_weighted_choice_follows_the_weights(vectorized):
+    choice = bound(Choice([1, 2, 3, 4], weights=[1, 0, 2, 7]))
+    values = choice.sample(100000) if vectorized \
+        else [choice.generate() for _ in range(100000)]
+    counts = Counter(np.asarray(values).tolist())
+    assert counts[2] == 0
+    assert [counts[v] / 100000 for v in (1, 3, 4)] \
+        == pytest.approx([0.1, 0.2, 0.7], abs=0.01)
+    assert np.mean(values) == pytest.approx(choice.expected_value, rel=0.01)
+
+
+
+@pytest.mark.parametrize('vectorized', [False, True])
+def test_empirical_draws_the_samples(vectorized):
+    samples = [3, 1, 2, 2, 10]
+    empirical = bound(Empirical(samples))
+    values = empirical.sample(50000) if vectorized \
+        else [empirical.generate() for _ in range(50000)]
+    assert set(np.asarray(values).tolist()) == set(samples)
+    assert np.mean(values) == pytest.approx(empirical.expected_value, rel=0.02)
+    assert empirical.expected_value == pytest.approx(np.mean(samples))
+
+
+
+@pytest.mark.parametrize('vectorized', [False, True])
+def test_interpolated_empirical_draws_between_the_samples(vectorized):
+    empirical = bound(Empirical([3, 1, 2, 10], interpolate=True))
+    values = np.asarray(empirical.sample(50000) if vectorized
+        else [empirical.generate() for _ in range(50000)])
+    assert values.min() >= 1 and values.max() <= 10
+    assert len(np.unique(values)) > 1000
+    # Each interval between consecutive sorted samples is equally likely
+    assert np.mean(values < 2) == pytest.approx(1 / 3, abs=0.01)
+    assert np.mean(values) == pytest.approx(empirical.expected_value, rel=0.02)
+
+
+
+def test_seeded_draws_are_reproducible():
+    for distribution in (Choice([1, 2, 3], weights=[1, 2, 3]), Empirical([1, 2, 5], True)):
+        draws = []
+        for _ in range(2):
+            bound(distribution, 5)
+            draws.append([distribution.generate() for _ in range(10)])
+        assert draws[0] == draws[1]
+        assert np.array_equal(bound(distribution, 5).sample(10), bound(distribution, 5).sample(10))
+
+
+
+def test_changed_parameters_are_drawn():
+    choice = bound(Choice([1, 2, 3], weights=[1, 1, 1]))
+    choice.weights = [0, 0, 1]
+    assert set(choice.sample(100).tolist()) == {choice.generate()} == {3}
+
+    choice = bound(Choice([1, 2, 3]))
+    choice.weights = [0, 1, 0]
+    assert choice.generate() == 2
+
+    empirical = bound(Empirical([1, 1, 1]))
+    empirical.samples = [10, 20]
+    assert {empirical.generate() for _ in range(100)} == {10, 20}
+    assert empirical.expected_value == 15
+
+
+
+def test_changed_parameters_are_validated():
+    choice = Choice([1, 2, 3])
+    choice.weights = [1, 1]
+    with pytest.raises(ValueError):
+        choice.generate()
+
+    # Related parameters can be changed one at a time
+    choice.values = [1, 2]
+    assert choice.generate() in (1, 2)
+
+
+
+def test_sweep_over_weights():
+    line = Line(
+        Source('source', processing_time=1, output_buffer='buffer1'),
+        Buffer('buffer1', capacity=1),
+        Machine('machine', processing_time=Choice([1, 2], weights=[1, 0]),
+            input_buffer='buffer1', output_buffer='buffer2'),
+        Buffer('buffer2', capacity=1),
+        Sink('sink', 'buffer2')
+    )
+    design = [{'machine.processing_time.weights': w} for w in ([1, 0], [0, 1])]
+    results = sweep(line, design, time=1000, workers=1)
+    received = dict(zip(results.columns['point'], results.columns['sink.items_received']))
+    assert received[0] == pytest.approx(1000, abs=2)
+    assert received[1] == pytest.approx(500, abs=2)
+
+
+
+@pytest.mark.parametrize('make', [
+    lambda: Choice([]),
+    lambda: Choice([1, 2], weights=[1]),
+    lambda: Choice([1, 2], weights=[-1, 2]),
+    lambda: Choice([1, 2], weights=[0, 0]),
+    lambda: Empirical([]),
+    lambda: Empirical([1, float('nan')])
+])
+def test_invalid_parameters_are_rejected(make):
+    with pytest.raises(ValueError):
+        make()
@@ -0,0 +1,87 @@
+"""Entity mode must track each part without changing the simulation."""
+
+import pickle
+
+import pytest
+
+from siamese import Buffer, Line, Machine, Sink, Source
+from siamese.distributions import Exponential
+from siamese.entities import Part
+from siamese.failures import TimeFailure
+
+
+
+def make_line(processing_time=1, failure=None):
+    return Line(
+        Source('source', processing_time=processing_time, output_buffer='buffer0'),
+        Buffer('buffer0', capacity=5),
+        Machine('machine1', processing_time=0.5, input_buffer='buffer0', output_buffer='buffer1',
+            failure=failure),
+        Buffer('buffer1', capacity=5),
+        Machine('machine2', processing_time=0.8, input_buffer='buffer1', output_buffer='buffer2'),
+        Buffer('buffer2', capacity=5),
+        Sink('sink', 'buffer2')
+    )
+
+
+
+def record_parts(sink) -> list:
+    parts = []
+    receive = sink._receive
+    sink._receive = lambda part: parts.append(part) or receive(part)
+    return parts
+
+
+
+def test_part_is_a_compact_record():
+    part = Part(1, 'source', 2.5)
+    part.stamps.append(('machine', 3.0))
+    assert not hasattr(part, '__dict__')
+    assert part.time_at('machine') == 3.0
+    assert part.time_at('other') is None
+
+    copy = pickle.loads(pickle.dumps(part))
+    assert (copy.id, copy.source, copy.created, copy.stamps) \
+        == (1, 'source', 2.5, [('machine', 3.0)])
+
+
+
+def test_sink_tracks_lead_times():
+    line = make_line()
+    line.simulate(1000, entities=True)
+    lead_time = line.sink.lead_time
+    assert lead_time.len == line.sink.items_received > 900
+    assert lead_time.min == pytest.approx(1.3)
+    assert lead_time.max == pytest.approx(1.3)
+
+
+
+@pytest.mark.parametrize('failure', [None, TimeFailure(Exponential(5), Exponential(2))])
+def test_parts_are_stamped_by_every_machine(failure):
+    line = make_line(Exponential(1), failure)
+    parts = record_parts(line.sink)
+    line.simulate(1000, seed=1, entities=True)
+
+    assert [part.id for part in parts] == list(range(1, len(parts) + 1))
+    for part in parts:
+        assert [name for name, _ in part.stamps] == ['machine1', 'machine2']
+        assert part.created <= part.time_at('machine1') <= part.time_at('machine2') - 0.5
+
+
+
+def test_entity_mode_is_off_by_default():
+    line = make_line(Exponential(1))
+    parts = record_parts(line.sink)
+    line.simulate(1000, seed=1)
+    assert set(parts) == {1}
+    assert line.sink.lead_time.len == 0
+
+
+
+def test_entity_mode_does_not_change_the_simulation():
+    off = make_line(Exponential(1))
+    off.simulate(1000, seed=1)
+    on = make_line(Exponential(1))
+    on.simulate(1000, seed=1, entities=True)
+    assert on.sink.items_received == off.sink.items_received
+    assert on.machine2.time_starved.total == pytest.approx(off.machine2.time_starved.total)
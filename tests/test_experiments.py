@@ -0,0 +1,66 @@
+"""Resumed sweeps must load the same rows a fresh sweep simulates."""
+
+import pytest
+
+from siamese import Buffer, Line, Machine, Sink, Source
+from siamese.distributions import Exponential
+from siamese.experiments import sweep
+
+
+
+def make_line():
+    return Line(
+        Source('source', processing_time=Exponential(3), output_buffer='buffer1'),
+        Buffer('buffer1', capacity=3),
+        Machine('machine', processing_time=Exponential(2), input_buffer='buffer1',
+            output_buffer='buffer2'),
+        Buffer('buffer2', capacity=3),
+        Sink('sink', 'buffer2')
+    )
+
+
+
+def rows(results):
+    columns = results.columns
+    return sorted(
+        (dict(zip(columns, row)) for row in zip(*columns.values())),
+        key = lambda row: (row['point'], row['replication'])
+    )
+
+
+
+DESIGN = [{'buffer1.capacity': 2}, {'buffer1.capacity': 5}]
+
+
+
+def test_resumed_sweep_matches_fresh_sweep(tmp_path):
+    path = str(tmp_path / 'sweep.csv')
+    fresh = sweep(make_line(), DESIGN, time=200, replications=2, workers=1)
+    sweep(make_line(), DESIGN[:1], time=200, replications=2, workers=1, path=path)
+    resumed = sweep(make_line(), DESIGN, time=200, replications=2, workers=1, path=path)
+    assert len(resumed) == 4
+    assert repr(rows(resumed)) == repr(rows(fresh))
+
+
+
+def test_resumed_sweep_adds_the_parameters_of_appended_points(tmp_path):
+    path = str(tmp_path / 'sweep.csv')
+    design = DESIGN + [{'buffer1.capacity': 2, 'buffer2.capacity': 1}]
+    fresh = sweep(make_line(), design, time=200, replications=2, workers=1)
+    sweep(make_line(), DESIGN, time=200, replications=2, workers=1, path=path)
+    sweep(make_line(), design, time=200, replications=2, workers=1, path=path)
+
+    # The file holds every row, whether loaded or resumed
+    loaded = sweep(make_line(), design, time=200, replications=2, workers=1, path=path)
+    assert len(loaded) == 6
+    assert repr(rows(loaded)) == repr(rows(fresh))
+
+
+
+@pytest.mark.parametrize('changes', [{'time': 300}, {'seed': 1}, {'design': DESIGN[::-1]}])
+def test_sweep_with_other_settings_is_not_resumed(tmp_path, changes):
+    path = str(tmp_path / 'sweep.csv')
+    settings = {'design': DESIGN, 'time': 200, 'seed': 0}
+    sweep(make_line(), replications=1, workers=1, path=path, **settings)
+    with pytest.raises(ValueError):
+        sweep(make_line(), replications=1, workers=1, path=path, **{**settings, **changes})
@@ -0,0 +1,104 @@
+"""Broken models must neither take nor give entities until repaired."""
+
+import pytest
+
+from siamese import Buffer, Line, Machine, Sink, Source
+from siamese.distributions import Exponential
+from siamese.failures import TimeFailure
+
+
+
+def make_line(source_time, machine2_time):
+    return Line(
+        Source('source', processing_time=Exponential(source_time), output_buffer='buffer0',
+            failure=TimeFailure(Exponential(20), Exponential(3))),
+        Buffer('buffer0', capacity=2),
+        Machine('machine1', processing_time=Exponential(1), input_buffer='buffer0',
+            output_buffer='buffer1', failure=TimeFailure(Exponential(10), Exponential(3))),
+        Buffer('buffer1', capacity=1),
+        Machine('machine2', processing_time=Exponential(machine2_time), input_buffer='buffer1',
+            output_buffer='buffer2'),
+        Buffer('buffer2', capacity=10**6),
+        Sink('sink', 'buffer2')
+    )
+
+
+
+def record_repairs(model) -> list:
+    repairs = []
+    before, after = model._before_failing, model._after_failing
+    model._before_failing = lambda: repairs.append([model.env.now]) or before()
+    model._after_failing = lambda: repairs[-1].append(model.env.now) or after()
+    return repairs
+
+
+
+def record_parts(sink) -> list:
+    parts = []
+    receive = sink._receive
+    sink._receive = lambda part: parts.append(part) or receive(part)
+    return parts
+
+
+
+# A slow source starves the first machine, a slow second machine blocks it
+@pytest.mark.parametrize('source_time, machine2_time', [(2, 0.5), (0.5, 2)])
+def test_entities_cross_failures_once(source_time, machine2_time):
+    line = make_line(source_time, machine2_time)
+    line.simulate(5000, seed=1)
+    produced = line.source.items_processed
+
+    # What each model gave is what the next one took, give or take the
+    # entities held when the run stops
+    assert 0 <= produced - line.machine1.items_processed <= 2 + 2
+    assert 0 <= line.machine1.items_processed - line.machine2.items_processed <= 1 + 2
+    assert line.sink.items_received == line.machine2.items_processed
+    assert line.machine1.time_broken.total > 0
+    if machine2_time > 1:
+        assert line.machine1.time_blocked.total > 0
+    else:
+        assert line.machine1.time_starved.total > 0
+
+
+
+@pytest.mark.parametrize('source_time, machine2_time', [(2, 0.5), (0.5, 2)])
+def test_broken_machine_takes_no_entity(source_time, machine2_time):
+    line = make_line(source_time, machine2_time)
+    repairs = record_repairs(line.machine1)
+    parts = record_parts(line.sink)
+    line.simulate(5000, seed=1, entities=True)
+
+    assert [part.id for part in parts] == list(range(1, len(parts) + 1))
+    taken = [part.time_at('machine1') for part in parts]
+    assert len(repairs) > 100
+    for start, *end in repairs:
+        assert not any(start < time < (end or [line.now])[0] for time in taken)
+
+
+
+def test_blocked_time_before_a_failure_is_counted_as_blocked():
+    line = Line(
+        Source('source', processing_time=1, output_buffer='buffer0',
+            failure=TimeFailure(35, 5)),
+        Buffer('buffer0', capacity=1),
+        Machine('machine1', processing_time=1, input_buffer='buffer0', output_buffer='buffer1',
+            failure=TimeFailure(25, 5)),
+        Buffer('buffer1', capacity=1),
+        Machine('machine2', processing_time=10, input_buffer='buffer1', output_buffer='buffer2'),
+        Buffer('buffer2', capacity=10),
+        Sink('sink', 'buffer2')
+    )
+    models = [line.source, line.machine1]
+    repairs = [record_repairs(model) for model in models]
+    line.simulate(1000)
+
+    # Both models are mostly blocked when they fail, and the time they were
+    # blocked for is blocked time, not broken time
+    for model, intervals in zip(models, repairs):
+        assert len(intervals) > 10
+        repaired = sum((end or [line.now])[0] - start for start, *end in intervals)
+        assert model.time_broken.total == pytest.approx(repaired)
+        assert model.time_blocked.total > 0.6 * 1000
+        totals = getattr(model, 'time_starved', None), model.time_processing, \
+            model.time_blocked, model.time_broken
+        assert sum(stats.total for stats in totals if stats is not None) == pytest.approx(1000)
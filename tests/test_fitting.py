@@ -0,0 +1,81 @@
+"""Fitted distributions must match the sample, however it is read."""
+
+import numpy as np
+import pytest
+
+from siamese.distributions import Choice, Exponential, Gamma, Weibull
+from siamese.fitting import fit, fit_many
+
+
+
+@pytest.fixture
+def sample():
+    return np.random.default_rng(1).gamma(4, 2.5, size=50000)
+
+
+
+def test_best_fit_recovers_the_parameters(sample):
+    best = fit(sample).best
+    assert isinstance(best, Gamma)
+    assert best.shape == pytest.approx(4, rel=0.03)
+    assert best.scale == pytest.approx(2.5, rel=0.03)
+
+
+
+def test_exponential_log_likelihood(sample):
+    results = fit(sample, families=[Exponential])
+    mean = sample.mean()
+    assert results.best.mean == pytest.approx(mean)
+    assert results.log_likelihood[0] \
+        == pytest.approx(-len(sample) * np.log(mean) - sample.sum() / mean)
+    assert results.aic[0] == pytest.approx(2 - 2 * results.log_likelihood[0])
+
+
+
+def test_results_are_ranked_by_aic(sample):
+    results = fit(sample)
+    assert results.aic == sorted(results.aic)
+    assert str(results).startswith('Distributions fitted to 50,000 observations')
+
+
+
+def test_chunks_and_files_give_the_same_fit(sample, tmp_path):
+    path = tmp_path / 'sample.npy'
+    np.save(path, sample)
+    whole = fit(sample)
+    for results in (fit(sample, chunk_size=999), fit(str(path), chunk_size=4096)):
+        assert [type(d) for d in results.distributions] == [type(d) for d in whole.distributions]
+        assert results.log_likelihood == pytest.approx(whole.log_likelihood)
+
+
+
+def test_non_finite_values_are_ignored(sample):
+    dirty = np.concatenate([sample, [np.nan, np.inf]])
+    assert fit(dirty).log_likelihood == pytest.approx(fit(sample).log_likelihood)
+
+
+
+def test_families_that_cant_describe_the_sample_are_skipped():
+    sample = np.random.default_rng(2).normal(0, 1, size=1000)
+    results = fit(sample)
+    assert not any(isinstance(d, (Exponential, Gamma, Weibull)) for d in results.distributions)
+
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_fit_many_fits_each_sample(sample, workers):
+    data = {'first': sample, 'second': sample[:1000]}
+    results = fit_many(data, workers=workers)
+    assert results['first'].log_likelihood == pytest.approx(fit(sample).log_likelihood)
+    assert results['second'].n == 1000
+
+
+
+@pytest.mark.parametrize('data, families', [
+    ([1.0], [Exponential]),
+    ([1.0, 2.0], [Choice]),
+    ([-1.0, -2.0], [Exponential])
+])
+def test_invalid_fits_are_rejected(data, families):
+    with pytest.raises(ValueError):
+        fit(data, families=families)
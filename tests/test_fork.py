@@ -0,0 +1,93 @@
+"""Forks must continue the simulation of their line from its current state."""
+
+import pytest
+
+from siamese import Buffer, Line, Machine, Sink, Source
+from siamese.distributions import Exponential
+from siamese.experiments import branch
+from siamese.failures import TimeFailure
+
+
+
+def make_line():
+    return Line(
+        Source('source', processing_time=Exponential(3), output_buffer='buffer1'),
+        Buffer('buffer1', capacity=3),
+        Machine('machine', processing_time=Exponential(2), input_buffer='buffer1',
+            output_buffer='buffer2', failure=TimeFailure(Exponential(40), Exponential(4))),
+        Buffer('buffer2', capacity=3),
+        Sink('sink', 'buffer2')
+    )
+
+
+
+def kpis(line):
+    return {
+        model: {kpi: round(value, 6) for kpi, value in values.items() if value == value}
+            for model, values in line.report.to_dict().items()
+    }
+
+
+
+def test_fork_continues_as_its_line():
+    line = make_line()
+    line.simulate(500, seed=1)
+    fork = line.fork()
+    fork.simulate(3000)
+    line.simulate(3000)
+    assert kpis(fork) == kpis(line)
+
+
+
+def test_fork_changes_only_its_parameters():
+    line = make_line()
+    line.simulate(500, seed=1)
+    received = line.sink.items_received
+    fork = line.fork({'machine.processing_time': Exponential(1), 'buffer1.capacity': 10})
+    fork.simulate(3000)
+    same = line.fork()
+    same.simulate(3000)
+
+    assert line.now == 500
+    assert line.sink.items_received == received
+    assert line.machine.processing_time.mean == 2
+    assert line.buffer1.capacity == 3
+    assert fork.buffer1.capacity == 10
+    assert fork.machine.time_starved.total > same.machine.time_starved.total
+
+
+
+def test_fork_of_a_line_that_has_not_started_is_rejected():
+    with pytest.raises(RuntimeError):
+        make_line().fork()
+
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_branch_simulates_each_point_from_the_line(workers):
+    line = make_line()
+    line.simulate(500, seed=1)
+    design = [{}, {'buffer1.capacity': 10}]
+    results = branch(line, design, time=3000, workers=workers)
+
+    rows = sorted(
+        (dict(zip(results.columns, row)) for row in zip(*results.columns.values())),
+        key = lambda row: row['point']
+    )
+    assert line.now == 500
+    line.simulate(3000)
+    assert rows[0]['sink.items_received'] == line.sink.items_received
+
+    expected = make_line()
+    expected.simulate(500, seed=1)
+    expected = expected.fork(design[1])
+    expected.simulate(3000)
+    assert rows[1]['sink.items_received'] == expected.sink.items_received
+
+
+
+def test_branch_horizon_must_be_ahead():
+    line = make_line()
+    line.simulate(500, seed=1)
+    with pytest.raises(ValueError):
+        branch(line, [{}], time=500, workers=1)
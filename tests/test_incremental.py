@@ -0,0 +1,77 @@
+"""Simulations continued in increments must match single runs."""
+
+import pytest
+
+from siamese import Buffer, Line, Machine, Sink, Source
+from siamese.distributions import Exponential
+from siamese.failures import TimeFailure
+
+
+
+def make_line():
+    return Line(
+        Source('source', processing_time=Exponential(3), output_buffer='buffer1'),
+        Buffer('buffer1', capacity=3),
+        Machine('machine', processing_time=Exponential(2), input_buffer='buffer1',
+            output_buffer='buffer2', failure=TimeFailure(Exponential(50), Exponential(5))),
+        Buffer('buffer2', capacity=3),
+        Sink('sink', 'buffer2')
+    )
+
+
+
+def kpis(line):
+    return {
+        model: {kpi: value for kpi, value in values.items() if value == value}
+            for model, values in line.report.to_dict().items()
+    }
+
+
+
+def test_increments_match_a_single_run():
+    single = make_line()
+    single.simulate(1000, seed=1)
+    incremental = make_line()
+    incremental.simulate(100, seed=1)
+    for time in (250, 600.5, 1000):
+        incremental.simulate(time)
+        assert incremental.now == time
+    assert kpis(incremental) == kpis(single)
+
+
+
+def test_reports_in_between_are_snapshots():
+    line = make_line()
+    line.simulate(500, seed=1)
+    received = line.sink.items_received
+    line.simulate(1000)
+    assert line.sink.items_received > received
+
+    halfway = make_line()
+    halfway.simulate(500, seed=1)
+    assert halfway.sink.items_received == received
+
+
+
+def test_reset_starts_over():
+    line = make_line()
+    line.simulate(500, seed=1)
+    first = kpis(line)
+    line.reset()
+    assert line.now == 0
+    line.simulate(500, seed=1)
+    assert kpis(line) == first
+
+
+
+@pytest.mark.parametrize('options', [
+    {'time': 400},
+    {'time': 500},
+    {'time': 600, 'seed': 2},
+    {'time': 600, 'entities': True}
+])
+def test_invalid_continuations_are_rejected(options):
+    line = make_line()
+    line.simulate(500, seed=1)
+    with pytest.raises(ValueError):
+        line.simulate(**options)
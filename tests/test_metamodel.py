@@ -0,0 +1,51 @@
+"""Metamodels updated one row at a time must keep up with their rows."""
+
+import numpy as np
+import pytest
+
+from siamese.metamodel import Metamodel, _forward
+
+
+
+def rows(n):
+    rng = np.random.default_rng(0)
+    return [
+        {'a': a, 'b': b, 'y': 100*np.sin(a/3) + b}
+            for a, b in zip(rng.uniform(0, 20, n).tolist(), rng.uniform(0, 5, n).tolist())
+    ]
+
+
+
+def test_updates_one_row_at_a_time_match_a_batch_update():
+    design = [{'a': 5.0, 'b': 2.0}, {'a': 15.0, 'b': 1.0}]
+    expected = [100*np.sin(point['a']/3) + point['b'] for point in design]
+
+    incremental = Metamodel(['a', 'b'], ['y'])
+    for row in rows(60):
+        incremental.update(row)
+    batch = Metamodel(['a', 'b'], ['y'])
+    batch.update(rows(60))
+
+    assert len(incremental) == 60
+    assert incremental.hyperparameters == batch.hyperparameters
+    mean, _ = incremental.predict(design)['y']
+    assert np.allclose(mean, expected, atol=2)
+
+
+
+def test_forward_substitution_solves_the_factor():
+    rng = np.random.default_rng(1)
+    L = np.tril(rng.uniform(0.5, 1, (50, 50)))
+    b = rng.normal(size=(50, 3))
+    assert np.allclose(L @ _forward(L, b), b)
+    assert np.allclose(L @ _forward(L, b[:, 0]), b[:, 0])
+
+
+
+def test_predict_requires_rows():
+    metamodel = Metamodel(['a', 'b'], ['y', 'z'])
+    with pytest.raises(ValueError, match='Update it first'):
+        metamodel.predict([{'a': 1.0, 'b': 1.0}])
+    metamodel.update(rows(10))
+    with pytest.raises(ValueError, match="'z'"):
+        metamodel.predict([{'a': 1.0, 'b': 1.0}])
@@ -0,0 +1,88 @@
+"""Observers must see every subscribed transition, and nothing else."""
+
+import pytest
+
+from siamese import Buffer, Line, Machine, Sink, Source
+from siamese.distributions import Exponential
+from siamese.failures import TimeFailure
+from siamese.status import BufferEvent, Status
+
+
+
+def make_line():
+    return Line(
+        Source('source', processing_time=Exponential(1), output_buffer='buffer1'),
+        Buffer('buffer1', capacity=2),
+        Machine('machine', processing_time=Exponential(1.5), input_buffer='buffer1',
+            output_buffer='buffer2', failure=TimeFailure(Exponential(50), Exponential(5))),
+        Buffer('buffer2', capacity=10**6),
+        Sink('sink', 'buffer2')
+    )
+
+
+
+def test_observed_run_matches_unobserved_run():
+    plain = make_line()
+    plain.simulate(500, seed=1)
+    observed = make_line()
+    observed.subscribe('machine', Status.BLOCKED, lambda *args: None)
+    observed.subscribe('buffer1', BufferEvent.FULL, lambda *args: None)
+    observed.simulate(500, seed=1)
+    assert observed.sink.items_received == plain.sink.items_received
+    assert observed.machine.time_blocked.total == plain.machine.time_blocked.total
+
+
+
+def test_callbacks_see_every_transition():
+    line = make_line()
+    events = []
+    def callback(model, status, time):
+        events.append((model.name, status, time))
+    for status in Status:
+        line.subscribe(line.machine, status, callback)
+    line.subscribe('buffer2', BufferEvent.PUT, callback)
+    line.simulate(500, seed=1)
+
+    processing = [e for e in events if e[1] == Status.PROCESSING]
+    failures = [e for e in events if e[1] == Status.FAILURE]
+    puts = [e for e in events if e[1] == BufferEvent.PUT]
+    # Processing interrupted by a failure is entered again after the repair
+    assert line.machine.items_processed <= len(processing) \
+        <= line.machine.items_processed + 1 + len(failures)
+    assert len(failures) == len(line.machine.time_broken.values) + line.machine._repairing
+    assert len(puts) == line.sink.items_received
+    assert [e[2] for e in events] == sorted(e[2] for e in events)
+
+
+
+def test_buffer_full_and_empty_events():
+    line = make_line()
+    full, empty = [], []
+    line.subscribe('buffer1', BufferEvent.FULL, lambda model, status, time: full.append(time))
+    line.subscribe('buffer1', BufferEvent.EMPTY, lambda model, status, time: empty.append(time))
+    line.simulate(500, seed=1)
+    assert full and empty
+
+
+
+def test_unsubscribed_callbacks_are_not_called():
+    line = make_line()
+    calls = []
+    callback = lambda *args: calls.append(args)
+    line.subscribe('machine', Status.BLOCKED, callback)
+    line.unsubscribe('machine', Status.BLOCKED, callback)
+    line.simulate(100, seed=1)
+    assert calls == []
+    assert '_before_blocking' not in line.machine.__dict__
+
+
+
+@pytest.mark.parametrize('model, status', [
+    ('missing', Status.BLOCKED),
+    ('buffer1', Status.BLOCKED),
+    ('source', Status.STARVING),
+    ('machine', BufferEvent.PUT)
+])
+def test_invalid_subscriptions_are_rejected(model, status):
+    with pytest.raises(ValueError):
+        make_line().subscribe(model, status, lambda *args: None)
@@ -0,0 +1,111 @@
+"""Searches must return the non-dominated candidates they simulated."""
+
+import numpy as np
+import pytest
+
+from siamese import Buffer, Line, Machine, Router, Sink, Source
+from siamese.distributions import Exponential
+from siamese.failures import TimeFailure
+from siamese.optimization import _crowding, _dominates, _fronts, optimize, throughput_bound
+
+
+
+def make_line():
+    return Line(
+        Source('source', processing_time=Exponential(1), output_buffer='buffer1'),
+        Buffer('buffer1', capacity=1),
+        Machine('machine1', processing_time=Exponential(1.2), input_buffer='buffer1',
+            output_buffer='buffer2'),
+        Buffer('buffer2', capacity=1),
+        Machine('machine2', processing_time=Exponential(1.2), input_buffer='buffer2',
+            output_buffer='buffer3'),
+        Buffer('buffer3', capacity=10**6),
+        Sink('sink', 'buffer3')
+    )
+
+
+
+def test_fronts_sort_candidates_by_dominance():
+    y = np.array([[1, 4], [2, 2], [4, 1], [3, 3], [4, 4], [2, 2]])
+    assert [sorted(front) for front in _fronts(y)] == [[0, 1, 2, 5], [3], [4]]
+
+
+
+def test_crowding_keeps_the_extremes():
+    y = np.array([[1, 4], [2, 2], [4, 1], [3, 1.5]])
+    distance = _crowding(y)
+    assert np.isinf(distance[[0, 2]]).all()
+    assert distance[1] == pytest.approx(2 / 3 + 2.5 / 3)
+
+
+
+def test_throughput_bound_of_a_serial_line():
+    line = make_line()
+    assert throughput_bound(line) == pytest.approx(1 / 1.2)
+    line.machine2.failure = TimeFailure(Exponential(30), Exponential(10))
+    assert throughput_bound(line) == pytest.approx(0.75 / 1.2)
+
+
+
+def test_throughput_bound_splits_by_ratio():
+    line = Line(
+        Source('source', processing_time=1, output_buffer='buffer0'),
+        Buffer('buffer0', capacity=1),
+        Router('router', processing_time=0.1, input_buffer='buffer0',
+            output_buffer=['buffer1', 'buffer2'], rule='ratio', ratios=[1, 3]),
+        Buffer('buffer1', capacity=1),
+        Buffer('buffer2', capacity=1),
+        Machine('machine', processing_time=2, input_buffer='buffer2', output_buffer='buffer3'),
+        Buffer('buffer3', capacity=1),
+        Sink('sink1', 'buffer1'),
+        Sink('sink2', 'buffer3')
+    )
+    assert throughput_bound(line) == pytest.approx(0.25 + 0.5)
+
+
+
+@pytest.mark.parametrize('screen', [False, True])
+def test_front_is_not_dominated(screen):
+    results = optimize(
+        make_line(),
+        options = {'buffer1.capacity': range(1, 8), 'buffer2.capacity': range(1, 8)},
+        costs = {'space': lambda c: c['buffer1.capacity'] + c['buffer2.capacity']},
+        time = 2000,
+        population = 6,
+        generations = 4,
+        workers = 1,
+        screen = screen
+    )
+
+    assert results.objectives == ['throughput', 'space']
+    assert results.simulated == len(results.candidates)
+    assert 0 < len(results.front) <= results.simulated
+    assert [c['throughput'] for c in results.front] \
+        == sorted(c['throughput'] for c in results.front)
+    # Along the front, more throughput costs more space
+    assert [c['space'] for c in results.front] \
+        == sorted(c['space'] for c in results.front)
+    y = [np.array([-c['throughput'], c['space']]) for c in results.candidates]
+    for candidate in results.front:
+        point = np.array([-candidate['throughput'], candidate['space']])
+        assert not any(_dominates(other, point) for other in y)
+    if not screen:
+        assert results.screened == 0
+
+
+
+@pytest.mark.parametrize('kwargs', [
+    {'population': 1},
+    {'options': {'buffer1.capacity': []}},
+    {'costs': {'throughput': lambda c: 0}}
+])
+def test_invalid_searches_are_rejected(kwargs):
+    arguments = {
+        'options': {'buffer1.capacity': range(1, 4)},
+        'costs': {'space': lambda c: c['buffer1.capacity']},
+        'time': 100,
+        'workers': 1
+    }
+    arguments.update(kwargs)
+    with pytest.raises(ValueError):
+        optimize(make_line(), **arguments)
@@ -0,0 +1,66 @@
+"""Parallel runs must simulate the same as sequential runs of the same seed."""
+
+import pytest
+
+from siamese import Buffer, Line, Machine, Sink, Source, parallel
+from siamese.distributions import Exponential
+from siamese.failures import TimeFailure
+
+
+
+def make_line():
+    return Line(
+        Source('source', processing_time=Exponential(1), output_buffer='buffer0'),
+        Buffer('buffer0', capacity=3),
+        Machine('machine1', processing_time=Exponential(0.8), input_buffer='buffer0',
+            output_buffer='buffer1', failure=TimeFailure(Exponential(50), Exponential(5))),
+        Buffer('buffer1', capacity=4),
+        Machine('machine2', processing_time=Exponential(0.9), input_buffer='buffer1',
+            output_buffer='buffer2'),
+        Buffer('buffer2', capacity=2),
+        Sink('sink', 'buffer2')
+    )
+
+
+
+def kpis(line):
+    return {
+        model: {kpi: round(value, 6) for kpi, value in values.items() if value == value}
+            for model, values in line.report.to_dict().items()
+    }
+
+
+
+@pytest.mark.parametrize('cuts', [['buffer0'], ['buffer1'], ['buffer0', 'buffer1']])
+def test_parallel_run_matches_sequential_run(cuts):
+    sequential = make_line()
+    sequential.simulate(2000, seed=7)
+    line = make_line()
+    parallel.simulate(line, 2000, cuts=cuts, seed=7)
+    assert kpis(line) == kpis(sequential)
+
+
+
+def test_parallel_run_can_be_continued():
+    sequential = make_line()
+    sequential.simulate(2000, seed=7)
+    sequential.simulate(3000)
+    line = make_line()
+    parallel.simulate(line, 2000, cuts=['buffer1'], seed=7)
+    line.simulate(3000)
+    assert kpis(line) == kpis(sequential)
+
+
+
+@pytest.mark.parametrize('cuts', [[], ['machine1'], ['missing']])
+def test_invalid_cuts_are_rejected(cuts):
+    with pytest.raises(ValueError):
+        parallel.simulate(make_line(), 100, cuts=cuts, seed=1)
+
+
+
+def test_started_line_is_rejected():
+    line = make_line()
+    line.simulate(100, seed=1)
+    with pytest.raises(RuntimeError):
+        parallel.simulate(line, 200, cuts=['buffer1'], seed=1)
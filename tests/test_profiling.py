@@ -0,0 +1,80 @@
+"""Profiled runs must simulate exactly the same as unprofiled runs."""
+
+import gc
+
+from siamese import Buffer, Line, Machine, Sink, Source
+from siamese.distributions import Exponential
+from siamese.failures import TimeFailure
+
+
+
+def make_line():
+    return Line(
+        Source('source', processing_time=Exponential(3), output_buffer='buffer1'),
+        Buffer('buffer1', capacity=3),
+        Machine('machine', processing_time=Exponential(1.5), input_buffer='buffer1',
+            output_buffer='buffer2', failure=TimeFailure(Exponential(50), Exponential(5))),
+        Buffer('buffer2', capacity=3),
+        Sink('sink', 'buffer2')
+    )
+
+
+
+def kpis(line):
+    return {
+        model: {kpi: value for kpi, value in values.items() if value == value}
+            for model, values in line.report.to_dict().items()
+    }
+
+
+
+def test_profiled_run_matches_unprofiled_run():
+    plain = make_line()
+    plain.simulate(500, seed=1)
+    profiled = make_line()
+    profiled.simulate(500, seed=1, profile=True)
+    assert kpis(profiled) == kpis(plain)
+
+
+
+def test_run_continued_after_profiling_matches_unprofiled_run():
+    plain = make_line()
+    plain.simulate(200, seed=1)
+    plain.simulate(500)
+    profiled = make_line()
+    profiled.simulate(200, seed=1, profile=True)
+    gc.collect()
+    profiled.simulate(500)
+    assert kpis(profiled) == kpis(plain)
+
+
+
+def test_profiled_run_with_checkpoints_matches_unprofiled_run(tmp_path):
+    plain = make_line()
+    plain.simulate(500, seed=1)
+    profiled = make_line()
+    profiled.simulate(500, seed=1, profile=True,
+        checkpoint_path=str(tmp_path / 'line.ckpt'), checkpoint_interval=50)
+    assert kpis(profiled) == kpis(plain)
+
+
+
+def test_shared_distribution_draws_are_counted_by_model():
+    distribution = Exponential(2)
+    line = Line(
+        Source('source', processing_time=1, output_buffer='buffer1'),
+        Buffer('buffer1', capacity=3),
+        Machine('machine1', processing_time=distribution, input_buffer='buffer1',
+            output_buffer='buffer2'),
+        Buffer('buffer2', capacity=3),
+        Machine('machine2', processing_time=distribution, input_buffer='buffer2',
+            output_buffer='buffer3'),
+        Buffer('buffer3', capacity=3),
+        Sink('sink', 'buffer3')
+    )
+    line.simulate(500, profile=True)
+    profile = line.profile.to_dict()
+    for model in (line.machine1, line.machine2):
+        # Plus the processing time in progress, if any
+        draws = profile[model.name]['draws']['processing_time']
+        assert draws - model.items_processed in (0, 1)
@@ -0,0 +1,72 @@
+"""Replication reports must match the replications they summarize."""
+
+import numpy as np
+import pytest
+
+from siamese import Buffer, Line, Machine, Sink, Source
+from siamese.distributions import Exponential
+from siamese._stats import t_quantile
+
+
+
+def make_line():
+    return Line(
+        Source('source', processing_time=Exponential(3), output_buffer='buffer1'),
+        Buffer('buffer1', capacity=3),
+        Machine('machine', processing_time=Exponential(2), input_buffer='buffer1',
+            output_buffer='buffer2'),
+        Buffer('buffer2', capacity=3),
+        Sink('sink', 'buffer2')
+    )
+
+
+
+def test_report_matches_independent_runs():
+    report = make_line().replicate(500, n=10, seed=5, workers=1, percentiles=(50,))
+    j = report.kpis.index('sink.items_received')
+
+    values = []
+    for r in range(10):
+        line = make_line()
+        line.simulate(500, seed=5 + r)
+        values.append(line.sink.items_received)
+
+    half_width = t_quantile(0.975, 9) * np.std(values, ddof=1) / np.sqrt(10)
+    assert report.n.tolist() == [10]
+    assert report.mean[0, j] == pytest.approx(np.mean(values))
+    assert report.std[0, j] == pytest.approx(np.std(values, ddof=1))
+    assert report.percentile[50][0, j] == pytest.approx(np.median(values))
+    assert report.ci_high[0, j] - report.mean[0, j] == pytest.approx(half_width)
+    assert report.mean[0, j] - report.ci_low[0, j] == pytest.approx(half_width)
+
+
+
+def test_t_quantile_matches_tables():
+    assert t_quantile(0.975, 1) == pytest.approx(12.706, abs=1e-3)
+    assert t_quantile(0.975, 9) == pytest.approx(2.262, abs=1e-3)
+    assert t_quantile(0.95, 30) == pytest.approx(1.697, abs=1e-3)
+
+
+
+def test_variance_reduction_narrows_the_intervals():
+    plain = make_line().replicate(1000, n=20, workers=1)
+    reduced = make_line().replicate(1000, n=20, workers=1, antithetic=True, controls=True)
+    j = plain.kpis.index('sink.items_received')
+    assert (reduced.ci_high - reduced.ci_low)[0, j] < (plain.ci_high - plain.ci_low)[0, j]
+
+
+
+def test_report_exports(tmp_path):
+    report = make_line().replicate(200, n=3, workers=1)
+    frame = report.to_frame()
+    assert len(frame) == len(report.kpis)
+    report.to_csv(str(tmp_path / 'report.csv'))
+    assert (tmp_path / 'report.csv').read_text().startswith('point,model,kpi,n,mean')
+    assert str(report)
+
+
+
+@pytest.mark.parametrize('options', [{'confidence': 1}, {'n': 3, 'antithetic': True}])
+def test_invalid_replications_are_rejected(options):
+    with pytest.raises(ValueError):
+        make_line().replicate(100, workers=1, **{'n': 4, **options})
@@ -0,0 +1,82 @@
+"""Routers must route each entity once, whatever interrupts its put."""
+
+import pytest
+
+from siamese import Buffer, Line, Machine, Router, Sink, Source
+from siamese.distributions import Exponential
+from siamese.failures import TimeFailure
+
+
+
+def make_line(rule, ratios=None, failure=None):
+    return Line(
+        Source('source', processing_time=1, output_buffer='buffer0'),
+        Buffer('buffer0', capacity=2),
+        Router('router', processing_time=Exponential(1), input_buffer='buffer0',
+            output_buffer=['buffer1', 'buffer2', 'buffer3'], rule=rule, ratios=ratios,
+            failure=failure),
+        Buffer('buffer1', capacity=1),
+        Buffer('buffer2', capacity=1),
+        Buffer('buffer3', capacity=1),
+        Machine('machine1', processing_time=4, input_buffer='buffer1', output_buffer='buffer4'),
+        Machine('machine2', processing_time=6, input_buffer='buffer2', output_buffer='buffer4'),
+        Machine('machine3', processing_time=8, input_buffer='buffer3', output_buffer='buffer4'),
+        Buffer('buffer4', capacity=10**6),
+        Sink('sink', 'buffer4')
+    )
+
+
+
+def record_routes(router) -> list:
+    routes = []
+    route = router._route
+    router._route = lambda: routes.append(route()) or routes[-1]
+    return routes
+
+
+
+def test_round_robin_takes_turns():
+    line = make_line('round_robin')
+    routes = record_routes(line.router)
+    line.simulate(1000, seed=1)
+    assert routes == [i % 3 for i in range(len(routes))]
+    assert len(routes) > 100
+
+
+
+def test_ratio_follows_the_ratios():
+    line = Line(
+        Source('source', processing_time=1, output_buffer='buffer0'),
+        Buffer('buffer0', capacity=2),
+        Router('router', processing_time=0.5, input_buffer='buffer0',
+            output_buffer=['buffer1', 'buffer2'], rule='ratio', ratios=[1, 3]),
+        Buffer('buffer1', capacity=10**6),
+        Buffer('buffer2', capacity=10**6),
+        Sink('sink1', 'buffer1'),
+        Sink('sink2', 'buffer2')
+    )
+    line.simulate(10000, seed=1)
+    share = line.sink2.items_received / line.router.items_processed
+    assert share == pytest.approx(0.75, abs=0.02)
+
+
+
+def test_shortest_queue_fills_the_emptiest_buffer():
+    line = make_line('shortest_queue')
+    line.simulate(1000, seed=1)
+    # The fastest machine empties its buffer most often
+    assert line.machine1.items_processed > line.machine2.items_processed \
+        > line.machine3.items_processed
+
+
+
+@pytest.mark.parametrize('rule, ratios', [('round_robin', None), ('ratio', [1, 1, 1])])
+def test_entities_keep_their_destination_across_failures(rule, ratios):
+    line = make_line(rule, ratios, TimeFailure(Exponential(5), Exponential(2)))
+    routes = record_routes(line.router)
+    line.simulate(1000, seed=1)
+
+    # Entities are routed when processed, and only then
+    assert len(routes) == len(line.router._processing_tracking)
+    assert line.router.time_broken.total > 0
+    assert line.router.time_blocked.total > 0
@@ -0,0 +1,66 @@
+"""Sensitivity indices must single out the factors that drive the output."""
+
+import numpy as np
+import pytest
+
+from siamese import Buffer, Line, Machine, Sink, Source
+from siamese.sensitivity import morris, sobol
+
+
+
+def make_line():
+    return Line(
+        Source('source', processing_time=1, output_buffer='buffer1'),
+        Buffer('buffer1', capacity=3),
+        Machine('machine', processing_time=3, input_buffer='buffer1',
+            output_buffer='buffer2'),
+        Buffer('buffer2', capacity=3),
+        Sink('sink', 'buffer2')
+    )
+
+
+
+# The machine is always the bottleneck, so the source and the buffer only
+# shift the start of the run
+FACTORS = {
+    'source.processing_time': (0.5, 1.0),
+    'machine.processing_time': (2.0, 4.0),
+    'buffer1.capacity': (1, 5)
+}
+
+
+
+def test_sobol_ranks_the_bottleneck_first():
+    results = sobol(make_line(), FACTORS, output='sink.items_received',
+        time=200, n=32, workers=1)
+    ranking = results.ranking()
+    assert ranking[0][0] == 'machine.processing_time'
+    assert ranking[0][1]['ST'] > 0.9
+    for _, indices in ranking[1:]:
+        assert abs(indices['S1']) < 0.05
+        assert indices['ST'] < 0.05
+
+
+
+def test_morris_ranks_the_bottleneck_first():
+    results = morris(make_line(), FACTORS, output='sink.items_received',
+        time=200, trajectories=6, workers=1)
+    ranking = results.ranking()
+    assert ranking[0][0] == 'machine.processing_time'
+    assert ranking[0][1]['mu'] < 0
+    assert (results.indices['mu_star'][[0, 2]] < 0.1 * ranking[0][1]['mu_star']).all()
+
+
+
+def test_output_can_be_computed_from_the_kpis():
+    def throughput(row):
+        return row['sink.items_received'] / 200
+    results = sobol(make_line(), FACTORS, output=throughput, time=200, n=8, workers=1)
+    assert results.ranking()[0][0] == 'machine.processing_time'
+
+
+
+def test_unknown_output_is_rejected():
+    with pytest.raises(ValueError):
+        morris(make_line(), FACTORS, output='sink.missing', time=100,
+            trajectories=2, workers=1)
@@ -0,0 +1,159 @@
+"""The what-if service must answer over localhost, streaming its progress."""
+
+import asyncio
+import json
+
+from siamese import Line
+from siamese.service import WhatIfService
+
+
+
+CONFIG = {
+    'models': [
+        {'type': 'Source', 'name': 'source', 'processing_time': {'type': 'Exponential', 'mean': 3},
+            'output_buffer': 'buffer1'},
+        {'type': 'Buffer', 'name': 'buffer1', 'capacity': 3},
+        {'type': 'Machine', 'name': 'machine', 'processing_time': {'type': 'Exponential', 'mean': 2},
+            'input_buffer': 'buffer1', 'output_buffer': 'buffer2'},
+        {'type': 'Buffer', 'name': 'buffer2', 'capacity': 3},
+        {'type': 'Sink', 'name': 'sink', 'input_buffer': 'buffer2'}
+    ]
+}
+
+
+
+def serve(test):
+    """Run a test coroutine against a started service, failing on errors
+    the service leaves unhandled."""
+
+    async def main():
+        errors = []
+        asyncio.get_running_loop().set_exception_handler(
+            lambda loop, context: errors.append(context))
+        service = WhatIfService({'plant': CONFIG}, port=0, workers=1)
+        await service.start()
+        try:
+            await test(service)
+        finally:
+            await service.close()
+        assert errors == []
+
+    asyncio.run(main())
+
+
+
+async def request(service, method:str, path:str, body=None) -> tuple:
+    """Status and raw body of an HTTP request."""
+    reader, writer = await asyncio.open_connection('127.0.0.1', service.port)
+    data = b'' if body is None else json.dumps(body).encode()
+    writer.write(
+        f'{method} {path} HTTP/1.1\r\nHost: localhost\r\n'
+        f'Content-Length: {len(data)}\r\n\r\n'.encode() + data
+    )
+    response = await reader.read()
+    writer.close()
+    head, _, content = response.partition(b'\r\n\r\n')
+    return int(head.split()[1]), head, content
+
+
+
+def chunks(content:bytes) -> list:
+    """JSON lines of a chunked body."""
+    messages = []
+    while True:
+        size, _, content = content.partition(b'\r\n')
+        size = int(size, 16)
+        if size == 0:
+            return messages
+        messages.append(json.loads(content[:size]))
+        content = content[size + 2:]
+
+
+
+def test_simulate_answers_the_kpis_of_a_local_run():
+    async def test(service):
+        status, _, content = await request(service, 'POST', '/simulate',
+            {'line': 'plant', 'time': 500, 'seed': 3})
+        assert status == 200
+        answer = json.loads(content)
+        assert answer['cached'] is False
+
+        line = Line.from_config(CONFIG)
+        line.simulate(500, seed=3)
+        assert answer['kpis']['sink']['items_received'] == line.sink.items_received
+
+        _, _, content = await request(service, 'POST', '/simulate',
+            {'line': 'plant', 'time': 500, 'seed': 3})
+        assert json.loads(content)['cached'] is True
+
+    serve(test)
+
+
+
+def test_single_replication_streams_its_progress():
+    async def test(service):
+        status, head, content = await request(service, 'POST', '/simulate',
+            {'line': 'plant', 'time': 1000, 'stream': True})
+        assert status == 200
+        assert b'Transfer-Encoding: chunked' in head
+
+        *progress, answer = chunks(content)
+        times = [message['time'] for message in progress if 'time' in message]
+        assert times == sorted(times)
+        assert len(times) == 10
+        assert times[-1] == 1000
+        assert {'done': 1, 'replications': 1} in progress
+        assert 'sink' in answer['kpis']
+
+    serve(test)
+
+
+
+def test_replications_stream_their_progress():
+    async def test(service):
+        _, _, content = await request(service, 'POST', '/simulate',
+            {'line': 'plant', 'time': 200, 'replications': 3, 'stream': True,
+                'parameters': {'buffer1.capacity': 5}})
+        *progress, answer = chunks(content)
+        assert [m['done'] for m in progress if 'done' in m] == [1, 2, 3]
+        # Every replication is relayed up to the horizon before the answer
+        times = {}
+        for m in progress:
+            if 'time' in m:
+                times[m['replication']] = max(m['time'], times.get(m['replication'], 0))
+        assert times == {0: 200, 1: 200, 2: 200}
+        assert 'mean' in answer['kpis']['sink']['items_received']
+
+    serve(test)
+
+
+
+def test_invalid_questions_are_rejected():
+    async def test(service):
+        status, _, _ = await request(service, 'POST', '/simulate', {'line': 'plant', 'time': -1})
+        assert status == 400
+        status, _, _ = await request(service, 'POST', '/simulate', {'line': 'other', 'time': 1})
+        assert status == 404
+        status, _, _ = await request(service, 'POST', '/simulate',
+            {'line': 'plant', 'time': 1, 'replications': True})
+        assert status == 400
+        status, _, _ = await request(service, 'GET', '/simulate')
+        assert status == 405
+
+    serve(test)
+
+
+
+def test_client_disconnected_mid_request_is_dropped():
+    async def test(service):
+        _, writer = await asyncio.open_connection('127.0.0.1', service.port)
+        writer.write(b'POST /simulate HTTP/1.1\r\nContent-Length: 100\r\n\r\n{"line"')
+        await writer.drain()
+        writer.close()
+        await asyncio.sleep(0.1)
+
+        status, _, content = await request(service, 'GET', '/health')
+        assert status == 200
+        assert json.loads(content)['status'] == 'ok'
+
+    serve(test)
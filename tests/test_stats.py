@@ -0,0 +1,56 @@
+"""Stats of empty records must not fail, and timelines must be opt-in."""
+
+import math
+
+import pytest
+
+from siamese import Buffer, Line, Machine, Sink, Source
+from siamese.distributions import Exponential
+from siamese._stats import Stats
+
+
+
+def make_line():
+    return Line(
+        Source('source', processing_time=Exponential(3), output_buffer='buffer1'),
+        Buffer('buffer1', capacity=3),
+        Machine('machine', processing_time=2, input_buffer='buffer1',
+            output_buffer='buffer2'),
+        Buffer('buffer2', capacity=3),
+        Sink('sink', 'buffer2')
+    )
+
+
+
+def test_summary_of_no_values_is_nan():
+    stats = Stats(total=0, values=[])
+    assert all(math.isnan(value) for value in stats.summary().values())
+    stats.boxplot()
+
+
+
+def test_summary_of_a_line_without_failures():
+    line = make_line()
+    line.simulate(100, seed=1)
+    assert math.isnan(line.machine.time_broken.summary()['median'])
+    assert line.machine.time_processing.summary()['median'] == 2
+
+
+
+def test_timeline_is_only_recorded_when_requested():
+    line = make_line()
+    line.simulate(100, seed=1)
+    assert line.machine._timeline == []
+    with pytest.raises(RuntimeError):
+        line.machine.timeline()
+
+
+
+def test_recorded_timeline_matches_the_stats():
+    line = make_line()
+    line.simulate(100, seed=1, timeline=True)
+    line.machine.timeline(width=50)
+    processing = [time for time, status in line.machine._timeline \
+        if status.name == 'PROCESSING']
+    assert len(processing) == len(line.machine.time_processing.values) \
+        + (line.machine.status.name == 'PROCESSING')
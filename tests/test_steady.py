@@ -0,0 +1,83 @@
+"""Fast-forwarded runs must simulate the same as event-by-event runs."""
+
+import pytest
+
+from siamese import Assembly, Buffer, Line, Machine, Router, Sink, Source
+
+
+
+def router_line():
+    return Line(
+        Source('source', processing_time=1, output_buffer='buffer0'),
+        Buffer('buffer0', capacity=2),
+        Router('router', processing_time=0.5, input_buffer='buffer0',
+            output_buffer=['buffer1', 'buffer2'], rule='round_robin'),
+        Buffer('buffer1', capacity=2),
+        Buffer('buffer2', capacity=3),
+        Machine('machine1', processing_time=3, input_buffer='buffer1', output_buffer='buffer3'),
+        Machine('machine2', processing_time=5, input_buffer='buffer2', output_buffer='buffer3'),
+        Buffer('buffer3', capacity=2),
+        Machine('machine3', processing_time=1.3, input_buffer='buffer3', output_buffer='buffer4'),
+        Buffer('buffer4', capacity=1),
+        Sink('sink', 'buffer4')
+    )
+
+
+
+def assembly_line():
+    return Line(
+        Source('source1', processing_time=2, output_buffer='buffer1'),
+        Buffer('buffer1', capacity=3),
+        Source('source2', processing_time=0.7, output_buffer='buffer2'),
+        Buffer('buffer2', capacity=1),
+        Assembly('assembly', processing_time=2.5, input_buffer=['buffer1', 'buffer2'],
+            output_buffer='buffer3'),
+        Buffer('buffer3', capacity=2),
+        Machine('machine', processing_time=1.1, input_buffer='buffer3', output_buffer='buffer4'),
+        Buffer('buffer4', capacity=2),
+        Sink('sink', 'buffer4')
+    )
+
+
+
+def kpis(line):
+    return {
+        model: {kpi: round(value, 6) for kpi, value in values.items() if value == value}
+            for model, values in line.report.to_dict().items()
+    }
+
+
+
+@pytest.mark.parametrize('make_line', [router_line, assembly_line])
+@pytest.mark.parametrize('time', [10000, 12345.5])
+def test_fast_forward_matches_event_by_event_run(make_line, time):
+    # Profiled runs are simulated event by event
+    fast = make_line()
+    fast.simulate(time)
+    slow = make_line()
+    slow.simulate(time, profile=True)
+    assert kpis(fast) == kpis(slow)
+
+
+
+def test_fast_forward_continued_matches_event_by_event_run():
+    fast = router_line()
+    fast.simulate(5000.25)
+    fast.simulate(10000)
+    slow = router_line()
+    slow.simulate(10000, profile=True)
+    assert kpis(fast) == kpis(slow)
+
+
+
+def test_fast_forward_extrapolates_the_timeline():
+    fast = router_line()
+    fast.simulate(10000, timeline=True)
+    slow = router_line()
+    slow.simulate(10000, profile=True, timeline=True)
+    for name in ('machine1', 'machine2', 'machine3'):
+        timelines = [
+            [(round(time, 6), status) for time, status in line.__dict__[name]._timeline]
+                for line in (fast, slow)
+        ]
+        assert timelines[0] == timelines[1]
@@ -0,0 +1,63 @@
+"""Windowed KPIs must add up to the totals of the run."""
+
+import numpy as np
+import pytest
+
+from siamese import Buffer, Line, Machine, Sink, Source
+from siamese.distributions import Exponential
+from siamese.failures import TimeFailure
+from siamese.timeseries import KPITracker
+
+
+
+def make_line(failure=None):
+    return Line(
+        Source('source', processing_time=1, output_buffer='buffer1'),
+        Buffer('buffer1', capacity=4),
+        Machine('machine', processing_time=2, input_buffer='buffer1',
+            output_buffer='buffer2', failure=failure),
+        Buffer('buffer2', capacity=10**6),
+        Sink('sink', 'buffer2')
+    )
+
+
+
+def test_windows_add_up_to_the_run_totals():
+    line = make_line(TimeFailure(Exponential(50), Exponential(5)))
+    tracker = KPITracker(line, window=60)
+    line.simulate(600, seed=1)
+    kpis = tracker.to_numpy()
+
+    assert len(kpis['window']) == 10
+    times = sum(kpis[f'machine.time_{s}'] for s in ('starved', 'processing', 'blocked', 'broken'))
+    assert np.allclose(times, 60)
+    assert kpis['machine.time_broken'].sum() == pytest.approx(line.machine.time_broken.total)
+    assert kpis['machine.throughput'].sum() == line.machine.items_processed
+    assert kpis['buffer2.throughput'].sum() == line.sink.items_received + line.buffer2.content
+    assert (kpis['buffer1.max_wip'] <= 4).all()
+
+
+
+def test_utilization_and_performance_of_a_saturated_machine():
+    line = make_line()
+    tracker = KPITracker(line, window=60)
+    line.simulate(600)
+    kpis = tracker.to_numpy()
+
+    # Always processing, at its ideal cycle time, after the first entity
+    assert np.allclose(kpis['machine.availability'], 1)
+    assert np.allclose(kpis['machine.utilization'][1:], 1)
+    assert np.allclose(kpis['machine.performance'][1:], 1)
+    assert np.allclose(kpis['machine.oee'], kpis['machine.performance'])
+
+
+
+def test_processing_lost_to_failures_lowers_performance_only():
+    # Processing interrupted by a failure starts over after the repair
+    line = make_line(TimeFailure(Exponential(20), Exponential(2)))
+    tracker = KPITracker(line, window=1000)
+    line.simulate(10000, seed=1)
+    frame = tracker.to_frame()
+    assert (frame['machine.performance'] < frame['machine.utilization']).all()
+    assert np.allclose(frame['machine.oee'],
+        frame['machine.availability'] * frame['machine.performance'])
@@ -0,0 +1,69 @@
+"""Antithetic pairs must be negatively correlated, on every draw path."""
+
+import random
+
+import numpy as np
+import pytest
+
+from siamese import Buffer, Line, Machine, Sink, Source
+from siamese.distributions import Choice, Distribution, Empirical, Exponential, _Antithetic
+from siamese.experiments import sweep
+from siamese._reports import ReplicationReport
+
+
+
+def make_line():
+    return Line(
+        Source('source', processing_time=Exponential(3), output_buffer='buffer1'),
+        Buffer('buffer1', capacity=3),
+        Machine('machine', processing_time=Exponential(2), input_buffer='buffer1',
+            output_buffer='buffer2'),
+        Buffer('buffer2', capacity=3),
+        Sink('sink', 'buffer2')
+    )
+
+
+
+def test_paired_replications_are_negatively_correlated():
+    results = sweep(make_line(), [{}], time=1000, replications=100, workers=1,
+        antithetic=True)
+    rows = sorted(zip(results.columns['replication'], results.columns['sink.items_received']))
+    items = np.array([value for _, value in rows], dtype=float)
+    assert np.corrcoef(items[0::2], items[1::2])[0, 1] < -0.3
+
+
+
+@pytest.mark.parametrize('distribution', [
+    Empirical(list(range(100))),
+    Empirical(list(range(100)), interpolate=True),
+    Choice([1, 2, 3, 4]),
+    Exponential(2)
+])
+@pytest.mark.parametrize('vectorized', [False, True])
+def test_antithetic_draws_are_negatively_correlated(distribution, vectorized):
+    values = []
+    for stream in (random.Random('seed'), _Antithetic('seed')):
+        distribution._random = stream
+        if vectorized:
+            values.append(distribution.sample(1000))
+        else:
+            values.append([distribution.generate() for _ in range(1000)])
+    assert np.corrcoef(*values)[0, 1] < -0.6
+
+
+
+class Lognormal(Distribution):
+    """Distribution with no known mean."""
+
+    def generate(self):
+        return self._random.lognormvariate(0, 0.5)
+
+
+
+def test_controls_skip_models_without_a_known_mean():
+    line = make_line()
+    line.machine.processing_time = Lognormal()
+    results = sweep(line, [{}], time=500, replications=10, workers=1, controls=True)
+    assert results.controls == ['source.processing_time_deviation']
+    report = ReplicationReport(results, controls=True)
+    assert np.isfinite(report.mean[0, report.kpis.index('sink.items_received')])